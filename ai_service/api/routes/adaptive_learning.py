@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from engines.adaptive_learning_engine import AdaptiveLearningEngine
+from core.serialization import EngineJSONResponse
+from db.result_writer import result_writer
 
 router = APIRouter()
 adaptive_engine = AdaptiveLearningEngine()
@@ -11,6 +14,19 @@ class AdaptiveLearningRequest(BaseModel):
     current_activity: Dict[str, Any]
     performance_data: List[Dict]
 
+class PerformanceResult(BaseModel):
+    student_id: str
+    activity: str
+    difficulty: str = "moderate"
+    score: float
+
+class BanditUpdateRequest(BaseModel):
+    results: List[PerformanceResult]
+
+class BanditSelectRequest(BaseModel):
+    student_ids: List[str]
+    top_n: int = 1
+
 class AdaptiveLearningResponse(BaseModel):
     analysis_type: str
     difficulty_adjustment: str
@@ -19,6 +35,7 @@ class AdaptiveLearningResponse(BaseModel):
     optimal_pace: str
     next_activities: List[Dict]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/adjust", response_model=AdaptiveLearningResponse)
 async def adjust_learning(request: AdaptiveLearningRequest):
@@ -28,10 +45,42 @@ async def adjust_learning(request: AdaptiveLearningRequest):
             request.current_activity,
             request.performance_data
         )
-        return result
+        result_id = result_writer.submit(request.student_id, "adaptive_learning", result,
+                                         {"current_activity": request.current_activity})
+        return EngineJSONResponse({**result, "result_id": result_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Adaptive learning adjustment failed: {str(e)}")
 
+@router.post("/bandit/update")
+async def update_bandit(request: BanditUpdateRequest):
+    try:
+        return adaptive_engine.record_results([r.model_dump() for r in request.results])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Performance update failed: {str(e)}")
+
+@router.post("/bandit/select")
+async def select_activities(request: BanditSelectRequest):
+    try:
+        return {"selections": adaptive_engine.select_batch(request.student_ids, request.top_n)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Activity selection failed: {str(e)}")
+
+@router.post("/bandit/save")
+async def save_bandit():
+    try:
+        # Waits on other workers' saves for the bandit file lock.
+        await run_in_threadpool(adaptive_engine.save)
+        return {"status": "saved", "students_tracked": adaptive_engine.bandit.n_students}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bandit save failed: {str(e)}")
+
+@router.on_event("shutdown")
+def persist_bandit():
+    try:
+        adaptive_engine.save()
+    except Exception as e:
+        print(f"Error saving adaptive learning bandit: {e}")
+
 @router.post("/personalize")
 async def personalize_content(student_id: str, learning_profile: Dict):
     try:
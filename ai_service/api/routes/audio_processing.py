@@ -4,6 +4,8 @@ import librosa
 import numpy as np
 import os
 from typing import Dict, Any
+from core.metrics import UPLOAD_BYTES, MEDIA_DECODE_SECONDS
+from core.serialization import EngineJSONResponse
 
 router = APIRouter()
 
@@ -24,8 +26,10 @@ async def extract_audio_features(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "audio")
 
-        y, sr = librosa.load(file_path, sr=None)
+        with MEDIA_DECODE_SECONDS.time("audio", "load"):
+            y, sr = librosa.load(file_path, sr=None)
 
         mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
         mfcc_mean = np.mean(mfcc, axis=1).tolist()
@@ -46,7 +50,7 @@ async def extract_audio_features(file: UploadFile = File(...)):
 
         os.remove(file_path)
 
-        return {
+        return EngineJSONResponse({
             "mfcc": mfcc_mean,
             "pitch": pitch if not np.isnan(pitch) else 0.0,
             "tempo": float(tempo),
@@ -54,7 +58,7 @@ async def extract_audio_features(file: UploadFile = File(...)):
             "zero_crossing_rate": zcr,
             "spectral_centroid": spectral_centroid,
             "analysis_status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Audio processing error: {str(e)}")
 
@@ -67,6 +71,7 @@ async def convert_speech_to_text(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "audio")
 
         try:
             import speech_recognition as sr
@@ -79,10 +84,10 @@ async def convert_speech_to_text(file: UploadFile = File(...)):
 
         os.remove(file_path)
 
-        return {
+        return EngineJSONResponse({
             "text": text,
             "status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech-to-text error: {str(e)}")
 
@@ -95,8 +100,10 @@ async def analyze_fluency(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "audio")
 
-        y, sr = librosa.load(file_path, sr=None)
+        with MEDIA_DECODE_SECONDS.time("audio", "load"):
+            y, sr = librosa.load(file_path, sr=None)
 
         energy = librosa.feature.melspectrogram(y=y, sr=sr, power=2)
         energy_mean = np.mean(energy)
@@ -115,13 +122,13 @@ async def analyze_fluency(file: UploadFile = File(...)):
 
         os.remove(file_path)
 
-        return {
+        return EngineJSONResponse({
             "speech_rate": float(speech_rate),
             "pause_count": int(pause_count),
             "duration_seconds": float(duration),
             "fluency_score": float(fluency_score),
             "analysis_status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fluency analysis error: {str(e)}")
 
@@ -1,14 +1,19 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 from engines.behavior_engine import BehaviorRecognitionEngine
+from core.batching import batcher_for
+from core.serialization import EngineJSONResponse
+from db.result_writer import result_writer
 
 router = APIRouter()
 behavior_engine = BehaviorRecognitionEngine()
+behavior_batches = batcher_for("behavior", behavior_engine.analyze_many)
 
 class BehaviorAnalysisRequest(BaseModel):
     video_data: str
     student_id: str
+    session_id: Optional[str] = None
 
 class BehaviorAnalysisResponse(BaseModel):
     analysis_type: str
@@ -19,12 +24,15 @@ class BehaviorAnalysisResponse(BaseModel):
     patterns: List[str]
     alerts: List[str]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/analyze", response_model=BehaviorAnalysisResponse)
 async def analyze_behavior(request: BehaviorAnalysisRequest):
     try:
-        result = behavior_engine.analyze(request.video_data, request.student_id)
-        return result
+        result = await behavior_batches.submit({"video_data": request.video_data, "student_id": request.student_id})
+        result_id = result_writer.submit(request.student_id, "behavior", result, {"video_data": "reference"},
+                                         request.session_id)
+        return EngineJSONResponse({**result, "result_id": result_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Behavior analysis failed: {str(e)}")
 
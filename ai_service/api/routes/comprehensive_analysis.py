@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
+import os
+import shutil
 from engines.speech_engine import SpeechAnalysisEngine
 from engines.behavior_engine import BehaviorRecognitionEngine
 from engines.emotion_engine import EmotionDetectionEngine
 from engines.progress_engine import ProgressPredictionEngine
 from engines.autism_screening_engine import AutismScreeningEngine
 from engines.risk_detection_engine import RiskDetectionEngine
+from engines.bulk_scoring import (BULK_SCORING_DIR, BULK_SCORING_WORKERS, check_output_format, prune_scoring_files,
+                                  scoring_jobs)
+from engines.model_manager import ModelManager
+from core.batching import batcher_for
+from core.serialization import EngineJSONResponse
 
 router = APIRouter()
 
@@ -16,6 +25,16 @@ emotion_engine = EmotionDetectionEngine()
 progress_engine = ProgressPredictionEngine()
 autism_engine = AutismScreeningEngine()
 risk_engine = RiskDetectionEngine()
+screening_models = ModelManager(autism_engine)
+screening_batches = batcher_for("autism_screening", autism_engine.analyze_many)
+
+@router.on_event("startup")
+async def start_model_watch():
+    await screening_models.start()
+
+@router.on_event("shutdown")
+async def stop_model_watch():
+    await screening_models.stop()
 
 class SpeechAnalysisRequest(BaseModel):
     student_id: str
@@ -58,75 +77,84 @@ class AutismScreeningRequest(BaseModel):
 @router.post("/speech/analyze")
 async def analyze_speech_comprehensive(request: SpeechAnalysisRequest):
     try:
-        result = speech_engine.analyze(
-            request.audio_data or "",
-            request.student_id
-        )
-
-        areas_for_improvement = []
-        if result.get('pronunciation_score', 0) < 0.7:
-            areas_for_improvement.append("Pronunciation clarity")
-        if result.get('fluency_score', 0) < 0.7:
-            areas_for_improvement.append("Speech fluency")
-        if result.get('clarity_score', 0) < 0.7:
-            areas_for_improvement.append("Articulation")
-
-        return {
-            **result,
-            "areas_for_improvement": areas_for_improvement,
-            "overall_assessment": _get_speech_assessment(result),
-            "intervention_priority": _determine_priority(result.get('confidence', 0.5))
-        }
+        return EngineJSONResponse(_speech_analysis(request))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech analysis failed: {str(e)}")
 
+def _speech_analysis(request: SpeechAnalysisRequest) -> Dict[str, Any]:
+    result = speech_engine.analyze(
+        request.audio_data or "",
+        request.student_id
+    )
+
+    areas_for_improvement = []
+    if result.get('pronunciation_score', 0) < 0.7:
+        areas_for_improvement.append("Pronunciation clarity")
+    if result.get('fluency_score', 0) < 0.7:
+        areas_for_improvement.append("Speech fluency")
+    if result.get('clarity_score', 0) < 0.7:
+        areas_for_improvement.append("Articulation")
+
+    return {
+        **result,
+        "areas_for_improvement": areas_for_improvement,
+        "overall_assessment": _get_speech_assessment(result),
+        "intervention_priority": _determine_priority(result.get('confidence', 0.5))
+    }
+
 @router.post("/behavior/analyze")
 async def analyze_behavior_comprehensive(request: BehaviorAnalysisRequest):
     try:
-        result = behavior_engine.analyze(
-            request.video_data or "",
-            request.student_id
-        )
-
-        behavioral_summary = {
-            "attention_quality": "Good" if result.get('attention_span_seconds', 0) > 60 else "Needs Improvement",
-            "social_engagement": "Good" if result.get('social_interaction_score', 0) > 0.7 else "Needs Support",
-            "activity_appropriateness": result.get('activity_level', 'moderate')
-        }
-
-        return {
-            **result,
-            "behavioral_summary": behavioral_summary,
-            "intervention_recommendations": _get_behavioral_interventions(result),
-            "strengths": _identify_behavioral_strengths(result)
-        }
+        return EngineJSONResponse(_behavior_analysis(request))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Behavior analysis failed: {str(e)}")
 
+def _behavior_analysis(request: BehaviorAnalysisRequest) -> Dict[str, Any]:
+    result = behavior_engine.analyze(
+        request.video_data or "",
+        request.student_id
+    )
+
+    behavioral_summary = {
+        "attention_quality": "Good" if result.get('attention_span_seconds', 0) > 60 else "Needs Improvement",
+        "social_engagement": "Good" if result.get('social_interaction_score', 0) > 0.7 else "Needs Support",
+        "activity_appropriateness": result.get('activity_level', 'moderate')
+    }
+
+    return {
+        **result,
+        "behavioral_summary": behavioral_summary,
+        "intervention_recommendations": _get_behavioral_interventions(result),
+        "strengths": _identify_behavioral_strengths(result)
+    }
+
 @router.post("/emotion/analyze")
 async def analyze_emotion_comprehensive(request: EmotionAnalysisRequest):
     try:
-        result = emotion_engine.analyze(
-            request.image_data or "",
-            request.student_id
-        )
-
-        emotional_state = {
-            "primary_emotion": result.get('primary_emotion', 'neutral'),
-            "stress_level": "High" if result.get('stress_level', 0) > 0.7 else "Normal",
-            "engagement_level": "High" if result.get('engagement_level', 0) > 0.7 else "Moderate",
-            "emotional_stability": _assess_emotional_stability(result)
-        }
-
-        return {
-            **result,
-            "emotional_state": emotional_state,
-            "support_recommendations": _get_emotional_support(result),
-            "environmental_adjustments": _suggest_environment_changes(result)
-        }
+        return EngineJSONResponse(_emotion_analysis(request))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Emotion analysis failed: {str(e)}")
 
+def _emotion_analysis(request: EmotionAnalysisRequest) -> Dict[str, Any]:
+    result = emotion_engine.analyze(
+        request.image_data or "",
+        request.student_id
+    )
+
+    emotional_state = {
+        "primary_emotion": result.get('primary_emotion', 'neutral'),
+        "stress_level": "High" if result.get('stress_level', 0) > 0.7 else "Normal",
+        "engagement_level": "High" if result.get('engagement_level', 0) > 0.7 else "Moderate",
+        "emotional_stability": _assess_emotional_stability(result)
+    }
+
+    return {
+        **result,
+        "emotional_state": emotional_state,
+        "support_recommendations": _get_emotional_support(result),
+        "environmental_adjustments": _suggest_environment_changes(result)
+    }
+
 @router.post("/progress/predict")
 async def predict_progress_comprehensive(request: ProgressPredictionRequest):
     try:
@@ -142,12 +170,12 @@ async def predict_progress_comprehensive(request: ProgressPredictionRequest):
             "key_milestones": _identify_milestones(result)
         }
 
-        return {
+        return EngineJSONResponse({
             **result,
             "progress_insights": progress_insights,
             "acceleration_strategies": _suggest_acceleration(result),
             "areas_requiring_focus": _identify_focus_areas(result)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Progress prediction failed: {str(e)}")
 
@@ -167,12 +195,12 @@ async def detect_risks_comprehensive(request: RiskDetectionRequest):
             "early_warnings": result.get('early_warnings', [])
         }
 
-        return {
+        return EngineJSONResponse({
             **result,
             "risk_summary": risk_summary,
             "immediate_actions": _get_immediate_actions(result),
             "monitoring_plan": _create_monitoring_plan(result)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Risk detection failed: {str(e)}")
 
@@ -187,7 +215,7 @@ async def screen_autism(request: AutismScreeningRequest):
             'family_asd': request.family_asd
         }
 
-        result = autism_engine.analyze_behavioral_features(features)
+        result = await screening_batches.submit({"student_data": features})
 
         screening_summary = {
             "risk_level": result.get('asd_risk', 'unknown'),
@@ -196,22 +224,82 @@ async def screen_autism(request: AutismScreeningRequest):
             "behavioral_score": result.get('behavioral_score', 0)
         }
 
-        return {
+        return EngineJSONResponse({
             **result,
             "screening_summary": screening_summary,
             "next_steps": _get_autism_next_steps(result),
             "resources": _get_autism_resources(result)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Autism screening failed: {str(e)}")
 
+@router.post("/autism/bulk-score")
+async def start_bulk_screening(background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                               output_format: str = Form("csv"), workers: Optional[int] = Form(None),
+                               keep_columns: Optional[str] = Form(None)):
+    try:
+        check_output_format(output_format)
+        columns = [col.strip() for col in keep_columns.split(",")] if keep_columns else None
+        # A client may ask for fewer processes than the server allows, not more.
+        workers = min(max(1, workers), BULK_SCORING_WORKERS) if workers else None
+        await run_in_threadpool(prune_scoring_files)
+        job_id = scoring_jobs.create("autism_screening", "bulk_scoring")
+        os.makedirs(BULK_SCORING_DIR, exist_ok=True)
+        input_path = os.path.join(BULK_SCORING_DIR, f"{job_id}.input.csv")
+        # Copied in 1 MB blocks; the upload is never held in memory whole.
+        with open(input_path, "wb") as f:
+            await run_in_threadpool(shutil.copyfileobj, file.file, f, 1 << 20)
+        output_path = os.path.join(BULK_SCORING_DIR, f"{job_id}.{output_format}")
+        background_tasks.add_task(run_bulk_screening, job_id, input_path, output_path, output_format, columns, workers)
+        return {"status": "scoring_started", "job_id": job_id, "filename": file.filename}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_bulk_screening(job_id: str, input_path: str, output_path: str, output_format: str,
+                       keep_columns: Optional[List[str]], workers: Optional[int]):
+    def on_progress(progress: Dict[str, Any]):
+        scoring_jobs.update(job_id, current_epoch=progress["shards_done"], total_epochs=progress["shards"],
+                            progress=progress)
+
+    scoring_jobs.update(job_id, status="running")
+    try:
+        result = autism_engine.score_file(input_path, output_path, output_format, keep_columns, workers, on_progress)
+        scoring_jobs.update(job_id, status="completed", result=result)
+    except Exception as e:
+        print(f"Bulk scoring job {job_id} failed: {e}")
+        scoring_jobs.update(job_id, status="failed", error=str(e))
+    finally:
+        os.remove(input_path)
+
+@router.get("/autism/bulk-score/{job_id}")
+async def get_bulk_screening(job_id: str):
+    try:
+        return scoring_jobs.get(job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/autism/bulk-score/{job_id}/download")
+async def download_bulk_screening(job_id: str):
+    try:
+        job = scoring_jobs.get(job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Scoring job {job_id} is {job['status']}")
+    path = job["result"]["output_path"]
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Output of scoring job {job_id} has expired")
+    return FileResponse(path, filename=f"screening_scores_{job_id}.{job['result']['output_format']}")
+
 @router.post("/comprehensive")
 async def comprehensive_analysis(student_id: str, data_package: Dict[str, Any]):
     try:
         results = {}
 
         if 'speech_data' in data_package:
-            results['speech'] = await analyze_speech_comprehensive(
+            results['speech'] = _speech_analysis(
                 SpeechAnalysisRequest(
                     student_id=student_id,
                     **data_package['speech_data']
@@ -219,7 +307,7 @@ async def comprehensive_analysis(student_id: str, data_package: Dict[str, Any]):
             )
 
         if 'behavior_data' in data_package:
-            results['behavior'] = await analyze_behavior_comprehensive(
+            results['behavior'] = _behavior_analysis(
                 BehaviorAnalysisRequest(
                     student_id=student_id,
                     **data_package['behavior_data']
@@ -227,7 +315,7 @@ async def comprehensive_analysis(student_id: str, data_package: Dict[str, Any]):
             )
 
         if 'emotion_data' in data_package:
-            results['emotion'] = await analyze_emotion_comprehensive(
+            results['emotion'] = _emotion_analysis(
                 EmotionAnalysisRequest(
                     student_id=student_id,
                     **data_package['emotion_data']
@@ -236,12 +324,12 @@ async def comprehensive_analysis(student_id: str, data_package: Dict[str, Any]):
 
         overall_assessment = _generate_overall_assessment(results)
 
-        return {
+        return EngineJSONResponse({
             "student_id": student_id,
             "individual_analyses": results,
             "overall_assessment": overall_assessment,
             "integrated_recommendations": _generate_integrated_recommendations(results)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Comprehensive analysis failed: {str(e)}")
 
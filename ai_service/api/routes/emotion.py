@@ -1,14 +1,19 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 from engines.emotion_engine import EmotionDetectionEngine
+from core.batching import batcher_for
+from core.serialization import EngineJSONResponse
+from db.result_writer import result_writer
 
 router = APIRouter()
 emotion_engine = EmotionDetectionEngine()
+emotion_batches = batcher_for("emotion", emotion_engine.analyze_many)
 
 class EmotionDetectionRequest(BaseModel):
     image_data: str
     student_id: str
+    session_id: Optional[str] = None
 
 class EmotionDetectionResponse(BaseModel):
     analysis_type: str
@@ -18,12 +23,15 @@ class EmotionDetectionResponse(BaseModel):
     stress_level: float
     engagement_level: float
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/detect", response_model=EmotionDetectionResponse)
 async def detect_emotion(request: EmotionDetectionRequest):
     try:
-        result = emotion_engine.analyze(request.image_data, request.student_id)
-        return result
+        result = await emotion_batches.submit({"image_data": request.image_data, "student_id": request.student_id})
+        result_id = result_writer.submit(request.student_id, "emotion", result, {"image_data": "reference"},
+                                         request.session_id)
+        return EngineJSONResponse({**result, "result_id": result_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Emotion detection failed: {str(e)}")
 
@@ -1,13 +1,23 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List
+import json
+from typing import Dict, Any, List, Optional
 from engines.iep_engine import AutoIEPEngine
+from core.serialization import EngineJSONResponse
+from db.database import database, DatabaseNotConfigured
+from db.result_writer import result_writer
 
 router = APIRouter()
 iep_engine = AutoIEPEngine()
 
 class IEPGenerationRequest(BaseModel):
-    student_data: Dict[str, Any]
+    student_data: Optional[Dict[str, Any]] = None
+    student_id: Optional[str] = None
+
+class BulkIEPGenerationRequest(BaseModel):
+    students: List[Dict[str, Any]] = []
+    student_ids: List[str] = []
 
 class IEPGenerationResponse(BaseModel):
     analysis_type: str
@@ -17,15 +27,48 @@ class IEPGenerationResponse(BaseModel):
     focus_areas: List[str]
     timeline: Dict[str, Any]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/generate", response_model=IEPGenerationResponse)
 async def generate_iep(request: IEPGenerationRequest):
+    if request.student_data is None and request.student_id is None:
+        raise HTTPException(status_code=400, detail="student_data or student_id is required")
     try:
-        result = iep_engine.generate(request.student_data)
-        return result
+        student_data = request.student_data
+        if student_data is None:
+            student_data = await database.fetch_student(request.student_id)
+            if student_data is None:
+                raise LookupError(f"Student {request.student_id} not found")
+        result = iep_engine.generate(student_data)
+        student_id = request.student_id or result.get("student_id")
+        result_id = None
+        if student_id:
+            result_id = result_writer.submit(student_id, "auto_iep", result,
+                                             {"student_data": "request" if request.student_data is not None else "database"})
+        return EngineJSONResponse({**result, "result_id": result_id})
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"IEP generation failed: {str(e)}")
 
+@router.post("/generate-bulk")
+async def generate_iep_bulk(request: BulkIEPGenerationRequest):
+    students = list(request.students)
+    try:
+        if request.student_ids:
+            found = {s["id"]: s for s in await database.fetch_students(request.student_ids)}
+            students.extend(found.get(student_id, {"id": student_id}) for student_id in request.student_ids)
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def stream_drafts():
+        for draft in iep_engine.generate_many(students):
+            yield json.dumps(draft) + "\n"
+
+    return StreamingResponse(stream_drafts(), media_type="application/x-ndjson")
+
 @router.post("/update")
 async def update_iep_goals(student_id: str, progress_data: List[Dict]):
     try:
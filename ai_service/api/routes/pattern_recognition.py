@@ -1,15 +1,21 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import date
 from engines.pattern_recognition_engine import PatternRecognitionEngine
+from core.serialization import EngineJSONResponse
+from db.database import database, DatabaseNotConfigured
+from db.result_writer import result_writer
 
 router = APIRouter()
 pattern_engine = PatternRecognitionEngine()
 
 class PatternRecognitionRequest(BaseModel):
     student_id: str
-    historical_data: List[Dict[str, Any]]
+    historical_data: Optional[List[Dict[str, Any]]] = None
     data_type: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
 
 class PatternRecognitionResponse(BaseModel):
     analysis_type: str
@@ -19,16 +25,24 @@ class PatternRecognitionResponse(BaseModel):
     anomalies: List[Dict]
     insights: List[str]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/analyze", response_model=PatternRecognitionResponse)
 async def recognize_patterns(request: PatternRecognitionRequest):
     try:
+        historical_data = await database.resolve_progress_history(
+            request.student_id, request.historical_data, request.start_date, request.end_date
+        )
         result = pattern_engine.analyze(
             request.student_id,
-            request.historical_data,
+            historical_data,
             request.data_type
         )
-        return result
+        result_id = result_writer.submit(request.student_id, "pattern_recognition", result,
+                                         request.model_dump(mode="json", include={"data_type", "start_date", "end_date"}))
+        return EngineJSONResponse({**result, "result_id": result_id})
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Pattern recognition failed: {str(e)}")
 
@@ -1,14 +1,21 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import date
 from engines.progress_engine import ProgressPredictionEngine
+from core.serialization import EngineJSONResponse
+from db.database import database, DatabaseNotConfigured
+from db.result_writer import result_writer
 
 router = APIRouter()
 progress_engine = ProgressPredictionEngine()
 
 class ProgressPredictionRequest(BaseModel):
     student_id: str
-    progress_data: List[Dict[str, Any]]
+    progress_data: Optional[List[Dict[str, Any]]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    session_id: Optional[str] = None
 
 class ProgressPredictionResponse(BaseModel):
     analysis_type: str
@@ -18,23 +25,37 @@ class ProgressPredictionResponse(BaseModel):
     estimated_timeline: Dict[str, int]
     intervention_suggestions: List[str]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/predict", response_model=ProgressPredictionResponse)
 async def predict_progress(request: ProgressPredictionRequest):
     try:
-        result = progress_engine.predict(request.student_id, request.progress_data)
-        return result
+        progress_data = await database.resolve_progress_history(
+            request.student_id, request.progress_data, request.start_date, request.end_date
+        )
+        result = progress_engine.predict(request.student_id, progress_data)
+        result_id = result_writer.submit(request.student_id, "progress_prediction", result,
+                                         request.model_dump(mode="json", include={"start_date", "end_date"}),
+                                         request.session_id)
+        return EngineJSONResponse({**result, "result_id": result_id})
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Progress prediction failed: {str(e)}")
 
 @router.post("/forecast")
 async def forecast_development(request: ProgressPredictionRequest):
     try:
-        result = progress_engine.forecast(request.student_id, request.progress_data)
+        progress_data = await database.resolve_progress_history(
+            request.student_id, request.progress_data, request.start_date, request.end_date
+        )
+        result = progress_engine.forecast(request.student_id, progress_data)
         return {
             "short_term_forecast": result["short_term"],
             "long_term_forecast": result["long_term"],
             "key_milestones": result["milestones"]
         }
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Development forecast failed: {str(e)}")
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from engines.recommendation_engine import RecommendationEngine
+from core.serialization import EngineJSONResponse
 
 router = APIRouter()
 recommendation_engine = RecommendationEngine()
@@ -10,6 +11,10 @@ class RecommendationRequest(BaseModel):
     student_id: str
     current_performance: Dict[str, Any]
     focus_areas: List[str]
+    top_k: int = 3
+    difficulty: Optional[str] = None
+    modality: Optional[str] = None
+    available_materials: Optional[List[str]] = None
 
 class RecommendationResponse(BaseModel):
     analysis_type: str
@@ -26,12 +31,24 @@ async def generate_recommendations(request: RecommendationRequest):
         result = recommendation_engine.generate(
             request.student_id,
             request.current_performance,
-            request.focus_areas
+            request.focus_areas,
+            top_k=request.top_k,
+            difficulty=request.difficulty,
+            modality=request.modality,
+            available_materials=request.available_materials
         )
-        return result
+        return EngineJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation generation failed: {str(e)}")
 
+@router.post("/reload-catalog")
+async def reload_catalog():
+    try:
+        size = recommendation_engine.reload_catalog()
+        return {"status": "catalog_reloaded", "activity_count": size}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {str(e)}")
+
 @router.post("/daily-plan")
 async def create_daily_plan(student_id: str, preferences: Dict):
     try:
@@ -1,15 +1,21 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import date
 from engines.risk_detection_engine import RiskDetectionEngine
+from core.serialization import EngineJSONResponse
+from db.database import database, DatabaseNotConfigured
+from db.result_writer import result_writer
 
 router = APIRouter()
 risk_engine = RiskDetectionEngine()
 
 class RiskDetectionRequest(BaseModel):
     student_id: str
-    behavioral_data: List[Dict]
-    progress_data: List[Dict]
+    behavioral_data: Optional[List[Dict]] = None
+    progress_data: Optional[List[Dict]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
 
 class RiskDetectionResponse(BaseModel):
     analysis_type: str
@@ -19,16 +25,29 @@ class RiskDetectionResponse(BaseModel):
     intervention_priority: str
     recommended_actions: List[str]
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/detect", response_model=RiskDetectionResponse)
 async def detect_risks(request: RiskDetectionRequest):
     try:
+        progress_data = await database.resolve_progress_history(
+            request.student_id, request.progress_data, request.start_date, request.end_date
+        )
+        behavioral_data = request.behavioral_data
+        if behavioral_data is None:
+            behavioral_data = await database.fetch_analysis_history(
+                request.student_id, "behavior", request.start_date, request.end_date
+            )
         result = risk_engine.analyze(
             request.student_id,
-            request.behavioral_data,
-            request.progress_data
+            behavioral_data,
+            progress_data
         )
-        return result
+        result_id = result_writer.submit(request.student_id, "risk_detection", result,
+                                         request.model_dump(mode="json", include={"start_date", "end_date"}))
+        return EngineJSONResponse({**result, "result_id": result_id})
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Risk detection failed: {str(e)}")
 
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import numpy as np
 from engines.speech_engine import SpeechAnalysisEngine
+from core.batching import batcher_for
+from core.serialization import EngineJSONResponse
+from db.result_writer import result_writer
 
 router = APIRouter()
 speech_engine = SpeechAnalysisEngine()
+speech_batches = batcher_for("speech", speech_engine.analyze_many)
 
 class SpeechAnalysisRequest(BaseModel):
     audio_data: str
     student_id: str
+    session_id: Optional[str] = None
 
 class SpeechAnalysisResponse(BaseModel):
     analysis_type: str
@@ -20,12 +25,15 @@ class SpeechAnalysisResponse(BaseModel):
     problematic_sounds: list
     recommendations: list
     confidence: float
+    result_id: Optional[str] = None
 
 @router.post("/analyze", response_model=SpeechAnalysisResponse)
 async def analyze_speech(request: SpeechAnalysisRequest):
     try:
-        result = speech_engine.analyze(request.audio_data, request.student_id)
-        return result
+        result = await speech_batches.submit({"audio_data": request.audio_data, "student_id": request.student_id})
+        result_id = result_writer.submit(request.student_id, "speech", result, {"audio_data": "reference"},
+                                         request.session_id)
+        return EngineJSONResponse({**result, "result_id": result_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech analysis failed: {str(e)}")
 
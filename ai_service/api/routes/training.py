@@ -2,22 +2,74 @@ from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 import pandas as pd
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
+import asyncio
+from api.routes.comprehensive_analysis import screening_models
+from db.database import DatabaseNotConfigured
+from engines.model_cache import trained_models
+from training.boosting import EARLY_STOPPING_PATIENCE, EARLY_STOPPING_TOL
+from training.checkpoints import TRAINING_CHECKPOINT_ENABLED, TRAINING_RESUME_ON_STARTUP, training_checkpoints
+from training.estimators import MODEL_BACKENDS
+from training.feature_cache import feature_cache
+from training.jobs import training_jobs
+from training.out_of_core import OUT_OF_CORE_MEMORY_MB, OUT_OF_CORE_SHUFFLE_CHUNKS
+from training.runner import run_training_job
+from training.search import SEARCH_N_JOBS
 
 router = APIRouter()
 
 class DatasetPreviewRequest(BaseModel):
     file_path: str
 
+class SearchRequest(BaseModel):
+    strategy: str = "grid"
+    space: Dict[str, Any]
+    n_candidates: Optional[int] = None
+    halving: bool = True
+    factor: int = 3
+    min_resources: Optional[int] = None
+    cv: int = 3
+    scoring: str = "f1_weighted"
+    n_jobs: int = SEARCH_N_JOBS
+    random_state: int = 42
+
+class EarlyStoppingRequest(BaseModel):
+    enabled: bool = True
+    validation_fraction: float = 0.1
+    patience: int = EARLY_STOPPING_PATIENCE
+    tol: float = EARLY_STOPPING_TOL
+
+class OutOfCoreRequest(BaseModel):
+    enabled: bool = False
+    memory_budget_mb: float = OUT_OF_CORE_MEMORY_MB
+    epochs: int = 5
+    chunk_rows: Optional[int] = None
+    shuffle_chunks: int = OUT_OF_CORE_SHUFFLE_CHUNKS
+
 class TrainingRequest(BaseModel):
     configuration_id: str
+    job_id: Optional[str] = None
     dataset_id: str
+    file_path: Optional[str] = None
     model_type: str
     target_column: str
     feature_columns: List[str]
     train_test_split: float
     hyperparameters: Dict[str, Any]
+    preprocessing_options: Dict[str, Any] = {}
+    search: Optional[SearchRequest] = None
+    early_stopping: EarlyStoppingRequest = EarlyStoppingRequest()
+    out_of_core: OutOfCoreRequest = OutOfCoreRequest()
+    compare_backends: List[str] = []
+
+class ModelReloadRequest(BaseModel):
+    version_id: Optional[str] = None
+    model_path: Optional[str] = None
+
+class ModelPredictRequest(BaseModel):
+    features: Optional[Dict[str, Any]] = None
+    records: Optional[List[Dict[str, Any]]] = None
 
 @router.post("/dataset-preview")
 async def get_dataset_preview(request: DatasetPreviewRequest):
@@ -65,61 +117,117 @@ async def upload_dataset(file: UploadFile = File(...)):
 @router.post("/start-training")
 async def start_training(request: TrainingRequest, background_tasks: BackgroundTasks):
     try:
-        background_tasks.add_task(run_training, request)
-        return {"status": "training_started", "configuration_id": request.configuration_id}
+        # Out-of-core jobs have their own model list, checked by the trainer.
+        if not request.out_of_core.enabled:
+            unknown = [name for name in [request.model_type, *request.compare_backends] if name not in MODEL_BACKENDS]
+            if unknown:
+                raise ValueError(f"Unsupported model types {unknown}. Use one of {sorted(MODEL_BACKENDS)}")
+        mode = "out_of_core" if request.out_of_core.enabled else "search" if request.search is not None else "single"
+        job_id = training_jobs.create(request.configuration_id, mode, request.job_id)
+        background_tasks.add_task(run_training, job_id, request)
+        return {"status": "training_started", "configuration_id": request.configuration_id, "job_id": job_id}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def run_training(request: TrainingRequest):
+def run_training(job_id: str, request: TrainingRequest):
+    return run_training_job(job_id, request)
+
+def resume_training_jobs(loop: asyncio.AbstractEventLoop) -> List[str]:
+    # Jobs whose process was killed (deploy, OOM) left their checkpoint
+    # behind. Each one not claimed by a live worker is started again under its
+    # old job_id and continues from what the checkpoint holds.
+    if not (TRAINING_CHECKPOINT_ENABLED and TRAINING_RESUME_ON_STARTUP):
+        return []
+    resumed = []
+    for saved in training_checkpoints.pending():
+        job_id = saved["job_id"]
+        if job_id in training_jobs.jobs or not training_checkpoints.claim(job_id):
+            continue
+        try:
+            request = TrainingRequest(**saved["request"])
+        except (KeyError, ValueError) as e:
+            print(f"Dropping checkpoint of training job {job_id}: {e}")
+            training_checkpoints.clear(job_id)
+            continue
+        training_jobs.create(request.configuration_id, saved["mode"], job_id)
+        loop.run_in_executor(None, run_training, job_id, request)
+        resumed.append(job_id)
+    if resumed:
+        print(f"Resuming training jobs from checkpoints: {resumed}")
+    return resumed
+
+@router.get("/backends")
+async def list_model_backends():
+    return {"backends": sorted(MODEL_BACKENDS)}
+
+@router.get("/jobs")
+async def list_training_jobs():
+    return {"jobs": training_jobs.list()}
+
+@router.get("/jobs/{job_id}")
+async def get_training_job(job_id: str):
     try:
-        file_path = f"./datas/{request.file_path}" if not request.file_path.startswith("uploads") else f"./datas/{request.file_path}"
-        if not os.path.exists(file_path):
-            raise Exception("Dataset not found")
-
-        df = pd.read_csv(file_path)
-        df.columns = df.columns.str.strip()
-
-        X = df[request.feature_columns]
-        y = df[request.target_column]
+        return training_jobs.get(job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-        from sklearn.model_selection import train_test_split
-        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+@router.get("/checkpoints")
+async def get_checkpoints():
+    return training_checkpoints.status()
 
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=1 - request.train_test_split, random_state=42
-        )
+@router.get("/feature-cache")
+async def get_feature_cache():
+    return feature_cache.status()
 
-        if request.model_type == 'random_forest':
-            model = RandomForestClassifier(**request.hyperparameters)
-        elif request.model_type == 'gradient_boosting':
-            model = GradientBoostingClassifier(**request.hyperparameters)
-        else:
-            raise ValueError("Unsupported model type")
+@router.get("/models/active")
+async def get_active_model():
+    return screening_models.status()
 
-        model.fit(X_train, y_train)
+@router.post("/models/reload")
+async def reload_model(request: ModelReloadRequest):
+    try:
+        return await screening_models.reload(request.version_id, request.model_path)
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed, previous model kept: {str(e)}")
 
-        y_pred = model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-        recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-        f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
+@router.get("/models/cache")
+async def get_model_cache():
+    return trained_models.status()
 
-        os.makedirs("./models", exist_ok=True)
-        model_path = f"./models/{request.configuration_id}.pkl"
-        import pickle
-        with open(model_path, 'wb') as f:
-            pickle.dump(model, f)
+@router.post("/models/{configuration_id}/predict")
+async def predict_with_model(configuration_id: str, request: ModelPredictRequest):
+    try:
+        records = request.records if request.records is not None else [request.features] if request.features is not None else []
+        if not records:
+            raise ValueError("Send 'features' for one row or a non-empty 'records' list")
+        # Loading a pickle and predicting are CPU-bound; keep them off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            None, trained_models.predict, configuration_id, records)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-        return {
-            "accuracy": accuracy,
-            "precision": precision,
-            "recall": recall,
-            "f1_score": f1,
-            "model_path": model_path
-        }
+@router.post("/models/{version_id}/activate")
+async def activate_model(version_id: str):
+    try:
+        return await screening_models.activate(version_id)
+    except DatabaseNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"Training error: {e}")
+        raise HTTPException(status_code=500, detail=f"Model activation failed: {str(e)}")
 
 @router.get("/health")
 async def health_check():
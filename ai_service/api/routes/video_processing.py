@@ -3,7 +3,10 @@ from pydantic import BaseModel
 import cv2
 import numpy as np
 import os
+import time
 from typing import List, Dict, Any
+from core.metrics import UPLOAD_BYTES, MEDIA_DECODE_SECONDS, ENGINE_CALL_SECONDS
+from core.serialization import EngineJSONResponse
 
 router = APIRouter()
 
@@ -21,6 +24,7 @@ async def extract_video_frames(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "video")
 
         cap = cv2.VideoCapture(file_path)
 
@@ -31,9 +35,13 @@ async def extract_video_frames(file: UploadFile = File(...)):
 
         frame_count = 0
         frames_data = []
+        decode_seconds = 0.0
+        loop_start = time.perf_counter()
 
         while frame_count < min(total_frames, 100):
+            read_start = time.perf_counter()
             ret, frame = cap.read()
+            decode_seconds += time.perf_counter() - read_start
             if not ret:
                 break
 
@@ -51,10 +59,12 @@ async def extract_video_frames(file: UploadFile = File(...)):
 
             frame_count += 1
 
+        ENGINE_CALL_SECONDS.observe(time.perf_counter() - loop_start, "video.edge_motion")
+        MEDIA_DECODE_SECONDS.observe(decode_seconds, "video", "extract_frames")
         cap.release()
         os.remove(file_path)
 
-        return {
+        return EngineJSONResponse({
             "total_frames": total_frames,
             "fps": fps,
             "width": width,
@@ -62,7 +72,7 @@ async def extract_video_frames(file: UploadFile = File(...)):
             "duration_seconds": float(total_frames / fps) if fps > 0 else 0,
             "extracted_frames": frames_data,
             "extraction_status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Video frame extraction error: {str(e)}")
 
@@ -75,11 +85,14 @@ async def detect_movement(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "video")
 
         cap = cv2.VideoCapture(file_path)
 
         fps = int(cap.get(cv2.CAP_PROP_FPS))
+        read_start = time.perf_counter()
         ret, prev_frame = cap.read()
+        decode_seconds = time.perf_counter() - read_start
 
         if not ret:
             raise HTTPException(status_code=400, detail="Unable to read video")
@@ -87,9 +100,12 @@ async def detect_movement(file: UploadFile = File(...)):
         prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
         movement_scores = []
         frame_count = 0
+        loop_start = time.perf_counter()
 
         while True:
+            read_start = time.perf_counter()
             ret, frame = cap.read()
+            decode_seconds += time.perf_counter() - read_start
             if not ret:
                 break
 
@@ -110,6 +126,8 @@ async def detect_movement(file: UploadFile = File(...)):
             if frame_count >= 100:
                 break
 
+        ENGINE_CALL_SECONDS.observe(time.perf_counter() - loop_start, "video.optical_flow")
+        MEDIA_DECODE_SECONDS.observe(decode_seconds, "video", "detect_movement")
         cap.release()
         os.remove(file_path)
 
@@ -118,13 +136,13 @@ async def detect_movement(file: UploadFile = File(...)):
 
         activity_level = min(1.0, max(0.0, avg_movement / 50.0))
 
-        return {
+        return EngineJSONResponse({
             "average_movement": avg_movement,
             "max_movement": max_movement,
             "activity_level": activity_level,
             "frames_analyzed": len(movement_scores),
             "detection_status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Movement detection error: {str(e)}")
 
@@ -137,11 +155,14 @@ async def detect_scenes(file: UploadFile = File(...)):
         with open(file_path, "wb") as f:
             content = await file.read()
             f.write(content)
+        UPLOAD_BYTES.observe(len(content), "video")
 
         cap = cv2.VideoCapture(file_path)
 
         fps = int(cap.get(cv2.CAP_PROP_FPS))
+        read_start = time.perf_counter()
         ret, prev_frame = cap.read()
+        decode_seconds = time.perf_counter() - read_start
 
         if not ret:
             raise HTTPException(status_code=400, detail="Unable to read video")
@@ -149,9 +170,12 @@ async def detect_scenes(file: UploadFile = File(...)):
         prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
         scene_changes = []
         frame_count = 0
+        loop_start = time.perf_counter()
 
         while True:
+            read_start = time.perf_counter()
             ret, frame = cap.read()
+            decode_seconds += time.perf_counter() - read_start
             if not ret:
                 break
 
@@ -173,14 +197,16 @@ async def detect_scenes(file: UploadFile = File(...)):
             if frame_count >= 300:
                 break
 
+        ENGINE_CALL_SECONDS.observe(time.perf_counter() - loop_start, "video.scene_diff")
+        MEDIA_DECODE_SECONDS.observe(decode_seconds, "video", "detect_scenes")
         cap.release()
         os.remove(file_path)
 
-        return {
+        return EngineJSONResponse({
             "scene_changes": scene_changes,
             "total_scenes_detected": len(scene_changes),
             "detection_status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scene detection error: {str(e)}")
 
@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+
+from benchmarks.fixtures import SCREENING_CSV
+from tests.attribution_checks import TOLERANCE, additivity_error, brute_force, split_features
+from training.attributions import TreeAttributions
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def _ms_per_call(call, repeats: int) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def run(n_estimators: int = 100, max_depth: int = 5, brute_force_rows: int = 5, repeats: int = 50) -> Dict[str, Any]:
+    df = pd.read_csv(SCREENING_CSV)
+    df.columns = df.columns.str.strip()
+    pipeline = FeaturePipeline(FEATURES).fit(df)
+    X, y = pipeline.transform(df), df["Class"].astype(str).str.strip()
+    # Same settings as the screening engine's booster.
+    model = GradientBoostingClassifier(n_estimators=n_estimators, learning_rate=0.1, max_depth=max_depth,
+                                       random_state=42).fit(X, y)
+    explainer = TreeAttributions(model)
+
+    # Brute force is exponential in the split features, so it checks a small model.
+    small = GradientBoostingClassifier(n_estimators=10, max_depth=3, random_state=0).fit(X, y)
+    features = split_features(small)
+    small_explainer = TreeAttributions(small)
+    brute_force_error = max(
+        float(np.abs(brute_force(small, x, features) - small_explainer.shap_values(x[None])[0, :, 0]).max())
+        for x in X[:brute_force_rows]
+    )
+
+    multiclass = np.digitize(X[:, FEATURES.index("Age")], [4, 12])
+    report = {
+        "rows": len(X),
+        "model": {"n_estimators": n_estimators, "max_depth": max_depth, **explainer.describe()},
+        "checks": {
+            "additivity_max_error": additivity_error(model, X),
+            "hist_gradient_boosting_additivity_max_error": additivity_error(
+                HistGradientBoostingClassifier(max_iter=50, max_depth=4, random_state=0).fit(X, y), X),
+            "multiclass_additivity_max_error": additivity_error(
+                GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0).fit(X, multiclass), X),
+            "brute_force_max_error": brute_force_error,
+            "brute_force_features": len(features)
+        },
+        "timing_ms": {
+            "predict_proba_1_row": round(_ms_per_call(lambda: model.predict_proba(X[:1]), repeats), 4),
+            "attributions_1_row": round(_ms_per_call(lambda: explainer.shap_values(X[:1]), repeats), 4),
+            "attributions_per_row_batch_1000": round(
+                _ms_per_call(lambda: explainer.shap_values(X[:1000]), max(1, repeats // 10)) / 1000, 4),
+            "build_explainer": round(_ms_per_call(lambda: TreeAttributions(model), 3), 2)
+        }
+    }
+    report["passed"] = all(value < TOLERANCE for key, value in report["checks"].items() if key.endswith("error"))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check TreeSHAP additivity and exactness, and time attributions")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--brute-force-rows", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    outcome = run(args.n_estimators, args.max_depth, args.brute_force_rows, args.repeats)
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["passed"] else 1)
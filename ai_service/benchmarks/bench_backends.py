@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+import tempfile
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.fixtures import write_scaled_csv
+from training.costs import compare_backends, cost_table
+from training.estimators import MODEL_BACKENDS
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def run(rows: int = 20000, backends: List[str] = None, label_noise: float = 0.05, repeats: int = 50,
+        batch_rows: int = 1000) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_backends_")
+    df = pd.read_csv(write_scaled_csv(os.path.join(directory, "screening.csv"), rows))
+    # Same label noise as bench_boosting, otherwise every backend scores ~1.0.
+    flip = np.random.default_rng(0).random(len(df)) < label_noise
+    df.loc[flip, "Class"] = np.where(df.loc[flip, "Class"] == "YES", "NO", "YES")
+    train_df, test_df, y_train, y_test = train_test_split(df, df["Class"], test_size=0.2, random_state=42)
+    pipeline = FeaturePipeline(FEATURES).fit(train_df)
+    report = compare_backends(backends or sorted(MODEL_BACKENDS), pipeline.transform(train_df), y_train,
+                              pipeline.transform(test_df), y_test, repeats=repeats, batch_rows=batch_rows)
+    return {"rows": rows, "label_noise": label_noise, "batch_rows": batch_rows, "backends": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit time, inference latency, size and accuracy per model backend")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--backends", nargs="*")
+    parser.add_argument("--label-noise", type=float, default=0.05)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    outcome = run(args.rows, args.backends, args.label_noise, args.repeats, args.batch_rows)
+    print(json.dumps(outcome, indent=2) if args.json else cost_table(outcome["backends"]))
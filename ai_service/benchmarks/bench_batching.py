@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from core.batching import MicroBatcher
+from engines.autism_screening_engine import AutismScreeningEngine
+
+
+def _students(n: int) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    return [{
+        **{f"A{i}": int(v) for i, v in enumerate(rng.integers(0, 2, size=10), start=1)},
+        "age_months": int(rng.integers(12, 48)),
+        "sex": str(rng.choice(["m", "f"])),
+        "jaundice": str(rng.choice(["yes", "no"])),
+        "family_asd": str(rng.choice(["yes", "no"]))
+    } for _ in range(n)]
+
+
+async def _unbatched(engine: AutismScreeningEngine, students, concurrency: int) -> float:
+    # What the route did before: every request scores itself, off the loop.
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(student):
+        async with semaphore:
+            return await loop.run_in_executor(None, engine.analyze_behavioral_features, student)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(student) for student in students))
+    return time.perf_counter() - start
+
+
+async def _batched(batcher: MicroBatcher, students, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(student):
+        async with semaphore:
+            return await batcher.submit({"student_data": student})
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(student) for student in students))
+    return time.perf_counter() - start, results
+
+
+async def _run(requests: int, concurrency_levels: List[int], window_ms: float, max_size: int) -> Dict[str, Any]:
+    engine = AutismScreeningEngine()
+    students = _students(requests)
+    expected = [engine.analyze_behavioral_features(student) for student in students]
+    report = {"requests": requests, "window_ms": window_ms, "max_size": max_size, "runs": [], "mismatches": 0}
+    for concurrency in concurrency_levels:
+        batcher = MicroBatcher(f"bench_{concurrency}", engine.analyze_many, window_ms=window_ms, max_size=max_size)
+        unbatched = await _unbatched(engine, students, concurrency)
+        batched, results = await _batched(batcher, students, concurrency)
+        report["mismatches"] += sum(
+            r["probability_asd"] != e["probability_asd"] or r["feature_importance"] != e["feature_importance"]
+            for r, e in zip(results, expected))
+        status = batcher.status()
+        report["runs"].append({
+            "concurrency": concurrency,
+            "unbatched_rps": round(requests / unbatched),
+            "batched_rps": round(requests / batched),
+            "speedup": round(unbatched / batched, 2),
+            "mean_batch_size": status["mean_batch_size"],
+            "max_batch_size_seen": status["max_batch_size_seen"],
+            "mean_wait_ms": status["mean_wait_ms"]
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of screening requests with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--window-ms", type=float, default=0)
+    parser.add_argument("--max-size", type=int, default=32)
+    args = parser.parse_args()
+    outcome = asyncio.run(_run(args.requests, args.concurrency, args.window_ms, args.max_size))
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["mismatches"] == 0 else 1)
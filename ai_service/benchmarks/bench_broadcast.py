@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import tempfile
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from core.broadcast import UnixSocketBroadcast
+
+
+async def _subscribe(directory: str, messages: int, ready, go, results, timeout: float):
+    seen, latencies, duplicates = set(), [], 0
+    done = asyncio.Event()
+
+    async def handler(message: Dict[str, Any]):
+        nonlocal duplicates
+        if message["seq"] in seen:
+            duplicates += 1
+        seen.add(message["seq"])
+        latencies.append(time.time() - message["sent_at"])
+        if len(seen) == messages:
+            done.set()
+
+    backend = UnixSocketBroadcast(directory)
+    await backend.start(handler)
+    ready.release()
+    await asyncio.get_running_loop().run_in_executor(None, go.wait)
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    await backend.stop()
+    results.put({"received": len(seen), "duplicates": duplicates, "latencies": latencies})
+
+
+def _subscriber_process(directory, messages, ready, go, results, timeout):
+    asyncio.run(_subscribe(directory, messages, ready, go, results, timeout))
+
+
+async def _publish(directory: str, messages: int, payload_bytes: int) -> float:
+    async def handler(message):
+        pass
+
+    backend = UnixSocketBroadcast(directory)
+    await backend.start(handler)
+    padding = "x" * payload_bytes
+    start = time.perf_counter()
+    for seq in range(messages):
+        await backend.publish({
+            "type": "metric",
+            "seq": seq,
+            "sent_at": time.time(),
+            "metric": {"epoch": seq, "accuracy": 0.91, "loss": 0.24, "padding": padding}
+        })
+    elapsed = time.perf_counter() - start
+    await backend.stop()
+    return elapsed
+
+
+def run(workers: int = 4, messages: int = 20000, payload_bytes: int = 200, timeout: float = 60.0) -> Dict[str, Any]:
+    context = multiprocessing.get_context("fork")
+    directory = tempfile.mkdtemp(prefix="bench_broadcast_")
+    ready, go, results = context.Semaphore(0), context.Event(), context.Queue()
+    processes = [
+        context.Process(target=_subscriber_process, args=(directory, messages, ready, go, results, timeout))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    go.set()
+
+    publish_seconds = asyncio.run(_publish(directory, messages, payload_bytes))
+    reports = [results.get(timeout=timeout + 10) for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = np.concatenate([report["latencies"] for report in reports]) * 1000
+    delivered = sum(report["received"] for report in reports)
+    return {
+        "workers": workers,
+        "messages": messages,
+        "payload_bytes": payload_bytes,
+        "publish_messages_per_second": round(messages / publish_seconds, 1),
+        "deliveries_per_second": round(delivered / publish_seconds, 1),
+        "expected_deliveries": messages * workers,
+        "delivered": delivered,
+        "duplicates": sum(report["duplicates"] for report in reports),
+        "exactly_once": delivered == messages * workers and all(r["duplicates"] == 0 for r in reports),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+        "latency_p99_ms": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cross-worker websocket broadcast over Unix sockets")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--payload-bytes", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers, args.messages, args.payload_bytes), indent=2))
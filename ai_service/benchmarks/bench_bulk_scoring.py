@@ -0,0 +1,115 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from benchmarks.fixtures import SCREENING_CSV, write_large_csv
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def _fit():
+    from training.estimators import build_model
+    from training.preprocessing import FeaturePipeline
+
+    df = pd.read_csv(SCREENING_CSV)
+    pipeline = FeaturePipeline(FEATURES).fit(df)
+    model = build_model("gradient_boosting", {"random_state": 0}).fit(pipeline.transform(df), df["Class"])
+    labels = [pipeline.label(c) for c in model.classes_]
+    return model, pipeline, labels, labels.index("YES")
+
+
+def _in_memory(path: str, output_path: str, results):
+    # Load the whole export, score it, write it.
+    from engines.bulk_scoring import score_frame
+    from training.out_of_core import peak_rss_mb
+
+    scorer = _fit()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    df = pd.read_csv(path)
+    score_frame(df, *scorer).to_csv(output_path, index=False)
+    results.put({"mode": "in_memory", "rows": len(df), "seconds": round(time.perf_counter() - start, 2),
+                 "working_set_mb": round(peak_rss_mb() - baseline, 1)})
+
+
+def _sharded(path: str, output_path: str, workers: int, shard_mb: float, chunk_rows: int, results):
+    import resource
+    from engines.bulk_scoring import BulkScorer
+    from training.out_of_core import peak_rss_mb
+
+    scorer = _fit()
+    baseline = peak_rss_mb()
+    updates: List[int] = []
+    outcome = BulkScorer(*scorer, workers=workers, shard_mb=shard_mb, chunk_rows=chunk_rows).run(
+        path, output_path, on_progress=lambda progress: updates.append(progress["shards_done"]))
+    results.put({
+        "mode": f"sharded_{workers}",
+        "rows": outcome["rows"],
+        "shards": outcome["shards"],
+        "progress_updates": len(updates),
+        "seconds": outcome["seconds"],
+        "rows_per_second": outcome["rows_per_second"],
+        "working_set_mb": round(peak_rss_mb() - baseline, 1),
+        # ru_maxrss of the largest worker, in KiB.
+        "worker_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    })
+
+
+def _same_output(expected_path: str, actual_path: str, chunk_rows: int = 200000) -> int:
+    # Streams both files; returns the number of mismatched rows.
+    mismatches = 0
+    expected = pd.read_csv(expected_path, chunksize=chunk_rows)
+    actual = pd.read_csv(actual_path, chunksize=chunk_rows)
+    for a, b in itertools.zip_longest(expected, actual):
+        if a is None or b is None or len(a) != len(b) or list(a.columns) != list(b.columns):
+            mismatches += max(len(a) if a is not None else 0, len(b) if b is not None else 0)
+            continue
+        mismatches += int((~((a == b) | (a.isna() & b.isna())).all(axis=1)).sum())
+    return mismatches
+
+
+def run(rows: int = 1000000, workers: List[int] = (1, 2), shard_mb: float = 4, chunk_rows: int = 50000) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_bulk_scoring_")
+    path = write_large_csv(os.path.join(directory, "export.csv"), rows)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    report = {"rows": rows, "csv_mb": round(os.path.getsize(path) / 2 ** 20, 1), "shard_mb": shard_mb,
+              "chunk_rows": chunk_rows, "mismatched_rows": {}}
+    expected = os.path.join(directory, "in_memory.csv")
+    # Separate interpreters so each peak RSS belongs to one mode only.
+    runs = [(_in_memory, (path, expected, results))] + [
+        (_sharded, (path, os.path.join(directory, f"sharded_{n}.csv"), n, shard_mb, chunk_rows, results))
+        for n in workers]
+    for target, args in runs:
+        process = context.Process(target=target, args=args)
+        process.start()
+        outcome = results.get()
+        process.join()
+        report[outcome.pop("mode")] = outcome
+    for n in workers:
+        report["mismatched_rows"][f"sharded_{n}"] = _same_output(expected, os.path.join(directory, f"sharded_{n}.csv"))
+    report["passed"] = all(count == 0 for count in report["mismatched_rows"].values())
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded bulk scoring of a screening export vs loading it whole")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--shard-mb", type=float, default=4)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    args = parser.parse_args()
+    outcome = run(args.rows, args.workers, args.shard_mb, args.chunk_rows)
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["passed"] else 1)
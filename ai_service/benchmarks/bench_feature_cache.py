@@ -0,0 +1,112 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import numpy as np
+
+from benchmarks.fixtures import write_large_csv
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def _request(features=FEATURES) -> SimpleNamespace:
+    return SimpleNamespace(file_path="export.csv", dataset_id="export.csv", feature_columns=list(features),
+                           target_column="Class", preprocessing_options={}, train_test_split=0.8)
+
+
+def _use_cache(data_dir: str, cache_dir: str, max_bytes: float = 2 ** 40):
+    from training import runner
+    from training.feature_cache import FeatureCache
+
+    runner.DATA_DIR = data_dir
+    runner.feature_cache = FeatureCache(cache_dir, max_bytes)
+    return runner
+
+
+def _memory_kb() -> Dict[str, int]:
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith("0"))
+    return {key: int(fields[key].split()[0]) for key in ("Rss", "Pss", "Anonymous")}
+
+
+def _reader(data_dir: str, cache_dir: str, barrier, results):
+    # A second training job: opens the cached entry, reads every page, then
+    # reports its memory while the other reader holds the same entry.
+    runner = _use_cache(data_dir, cache_dir)
+    before = _memory_kb()
+    arrays, _, cache = runner.encode_dataset(_request())
+    checksum = float(sum(np.asarray(arrays[name], dtype=np.float64).sum() for name in ("X_train", "X_test")))
+    barrier.wait()
+    after = _memory_kb()
+    barrier.wait()
+    results.put({"hit": cache["hit"], "checksum": checksum,
+                 **{f"{key.lower()}_mb": round((after[key] - before[key]) / 1024, 1) for key in after}})
+
+
+def run(rows: int = 500000) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_feature_cache_")
+    data_dir, cache_dir = os.path.join(directory, "data"), os.path.join(directory, "cache")
+    os.makedirs(data_dir)
+    write_large_csv(os.path.join(data_dir, "export.csv"), rows)
+    runner = _use_cache(data_dir, cache_dir)
+    report: Dict[str, Any] = {"rows": rows}
+
+    start = time.perf_counter()
+    uncached, _ = runner._encode(_request())
+    report["encode_seconds"] = round(time.perf_counter() - start, 3)
+    cold, _, miss = runner.encode_dataset(_request())
+    warm, _, hit = runner.encode_dataset(_request())
+    report["cold_seconds"], report["warm_seconds"] = miss["seconds"], hit["seconds"]
+    report["speedup"] = round(miss["seconds"] / max(hit["seconds"], 1e-6), 1)
+    report["matrix_mb"] = round(sum(a.nbytes for a in warm.values()) / 2 ** 20, 1)
+    report["identical"] = miss["hit"] is False and hit["hit"] is True and all(
+        np.array_equal(uncached[name], cold[name]) and np.array_equal(uncached[name], warm[name]) for name in uncached)
+
+    # Two concurrent jobs on the same entry: the matrix is resident once, in
+    # the page cache, rather than once per process.
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(2), context.Queue()
+    readers = [context.Process(target=_reader, args=(data_dir, cache_dir, barrier, results)) for _ in range(2)]
+    for process in readers:
+        process.start()
+    report["readers"] = [results.get() for _ in readers]
+    for process in readers:
+        process.join()
+    report["readers_hit"] = all(reader["hit"] for reader in report["readers"])
+    report["readers_private_mb"] = max(reader["anonymous_mb"] for reader in report["readers"])
+
+    # Eviction: a budget of two entries, three feature sets, the first one
+    # re-used before the third is stored, so the second is the one dropped.
+    entry_bytes = runner.feature_cache.status()["bytes"]
+    shutil.rmtree(cache_dir)
+    runner = _use_cache(data_dir, cache_dir, max_bytes=entry_bytes * 2.5)
+    keys = [runner.encode_dataset(_request(FEATURES[:n]))[2]["key"] for n in (14, 12)]
+    time.sleep(0.01)
+    runner.encode_dataset(_request(FEATURES[:14]))
+    keys.append(runner.encode_dataset(_request(FEATURES[:10]))[2]["key"])
+    status = runner.feature_cache.status()
+    kept = {entry["key"] for entry in status["entries"]}
+    report["eviction"] = {"budget_mb": round(status["max_bytes"] / 2 ** 20, 1),
+                          "bytes_mb": round(status["bytes"] / 2 ** 20, 1),
+                          "evictions": status["evictions"], "kept": [key in kept for key in keys]}
+    report["passed"] = (report["identical"] and report["readers_hit"]
+                        and report["readers_private_mb"] < report["matrix_mb"] / 2
+                        and status["bytes"] <= status["max_bytes"] and report["eviction"]["kept"] == [True, False, True])
+    shutil.rmtree(directory)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold vs cached feature encoding, shared mmaps and LRU eviction")
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+    outcome = run(args.rows)
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["passed"] else 1)
@@ -0,0 +1,52 @@
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, List
+
+from engines.iep_engine import AutoIEPEngine
+
+CONDITIONS = ["autism", "adhd", "speech_delay", "learning_disability", "behavioral_issues", "other"]
+
+
+def make_students(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    students = []
+    for i in range(count):
+        students.append({
+            "id": f"student-{i}",
+            "full_name": f"Student{i} Example",
+            "conditions": [{"condition_type": c} for c in rng.sample(CONDITIONS, rng.randint(0, 2))],
+            "baselines": {"speech_language": f"{rng.randint(20, 70)}%"} if rng.random() < 0.5 else {}
+        })
+    return students
+
+
+def run(count: int = 10000) -> Dict[str, float]:
+    engine = AutoIEPEngine()
+    students = make_students(count)
+
+    start = time.perf_counter()
+    for student in students:
+        engine.generate(student)
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    written = 0
+    for draft in engine.generate_many(students):
+        written += len(json.dumps(draft)) + 1
+    bulk_elapsed = time.perf_counter() - start
+
+    return {
+        "students": count,
+        "generate_plans_per_second": round(count / single_elapsed, 1),
+        "bulk_stream_plans_per_second": round(count / bulk_elapsed, 1),
+        "bulk_stream_megabytes": round(written / 1e6, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IEP draft generation")
+    parser.add_argument("--students", type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.students), indent=2))
@@ -0,0 +1,77 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import SCREENING_CSV
+from training.estimators import build_model
+from training.lookup import LOOKUP_TOLERANCE, ProbabilityGrid
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+CATEGORICAL = ["Sex", "Jauundice", "Family_ASD"]
+
+
+def _us_per_call(call, repeats: int) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def _domains(pipeline: FeaturePipeline, max_age: int) -> Dict[int, tuple]:
+    return {j: (0, pipeline.unknown_code(col)) if col in pipeline.categories else (0, max_age if col == "Age" else 1)
+            for j, col in enumerate(FEATURES)}
+
+
+def run(model_types=("gradient_boosting", "hist_gradient_boosting", "random_forest"), max_age: int = 240,
+        sample_rows: int = 200000, repeats: int = 2000) -> Dict[str, Any]:
+    df = pd.read_csv(SCREENING_CSV)
+    df.columns = df.columns.str.strip()
+    pipeline = FeaturePipeline(FEATURES, CATEGORICAL).fit(df)
+    X, y = pipeline.transform(df), df["Class"].astype(str).str.strip()
+    domains = _domains(pipeline, max_age)
+    low = np.array([domains[j][0] for j in range(len(FEATURES))])
+    high = np.array([domains[j][1] for j in range(len(FEATURES))])
+    # Uniform over the whole input space, not just records that occur in the data.
+    sample = np.random.default_rng(1).integers(low, high + 1, size=(sample_rows, len(FEATURES))).astype(np.float64)
+    # Off-grid rows (older than max_age, fractional age) must fall back to the model.
+    off_grid = X[:200].copy()
+    off_grid[:100, FEATURES.index("Age")] = max_age + 12
+    off_grid[100:, FEATURES.index("Age")] += 0.5
+
+    report = {"rows": len(X), "input_space": int(np.prod(high - low + 1, dtype=np.float64)), "models": {}}
+    for model_type in model_types:
+        model = build_model(model_type, {"random_state": 0}).fit(X, y)
+        grid = ProbabilityGrid(model, domains)
+        row = X[:1]
+        report["models"][model_type] = {
+            **{key: grid.describe()[key] for key in ("cells", "table_kb", "build_seconds", "verified_max_error")},
+            "sample_max_error": float(np.abs(grid.predict_proba(sample) - model.predict_proba(sample)).max()),
+            "dataset_max_error": float(np.abs(grid.predict_proba(X) - model.predict_proba(X)).max()),
+            "off_grid_max_error": float(np.abs(grid.predict_proba(off_grid) - model.predict_proba(off_grid)).max()),
+            "model_1_row_us": round(_us_per_call(lambda: model.predict_proba(row), max(1, repeats // 10)), 1),
+            "lookup_1_row_us": round(_us_per_call(lambda: grid.predict_proba(row), repeats), 1),
+            "model_batch_row_us": round(_us_per_call(lambda: model.predict_proba(X), 3) / len(X), 3),
+            "lookup_batch_row_us": round(_us_per_call(lambda: grid.predict_proba(X), 20) / len(X), 3)
+        }
+    report["passed"] = all(value < LOOKUP_TOLERANCE for result in report["models"].values()
+                           for key, value in result.items() if key.endswith("error"))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build screening lookup tables and check them against the live models")
+    parser.add_argument("--models", nargs="+", default=["gradient_boosting", "hist_gradient_boosting", "random_forest"])
+    parser.add_argument("--max-age", type=int, default=240)
+    parser.add_argument("--sample-rows", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    outcome = run(args.models, args.max_age, args.sample_rows, args.repeats)
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["passed"] else 1)
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import SCREENING_CSV
+from engines.model_cache import ModelCache, TrainedModel
+from training.estimators import build_model
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def _write_models(directory: str, models: int, model_type: str) -> int:
+    # One bundle per "school", each fitted on a different slice of the data.
+    df = pd.read_csv(SCREENING_CSV)
+    size = 0
+    for i, part in enumerate(np.array_split(df.sample(frac=1, random_state=0), models)):
+        pipeline = FeaturePipeline(FEATURES).fit(part)
+        model = build_model(model_type, {"random_state": i}).fit(pipeline.transform(part), part["Class"])
+        path = os.path.join(directory, f"school_{i}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump({"model": model, "pipeline": pipeline, "features": FEATURES, "target_column": "Class"}, f)
+        size = os.path.getsize(path)
+    return size
+
+
+def run(models: int = 8, cached_models: int = 4, requests: int = 400, model_type: str = "random_forest",
+        skew: float = 1.2) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_model_cache_")
+    model_bytes = _write_models(directory, models, model_type)
+    record = {**{f"A{i}": 1 for i in range(1, 11)}, "Age": 30, "Sex": "m", "Jauundice": "no", "Family_ASD": "yes"}
+    # Zipf-like traffic: a few schools send most of the requests.
+    weights = 1 / np.arange(1, models + 1) ** skew
+    ids = np.random.default_rng(0).choice(models, size=requests, p=weights / weights.sum())
+
+    start = time.perf_counter()
+    for i in ids:
+        TrainedModel(f"school_{i}", os.path.join(directory, f"school_{i}.pkl")).predict([record])
+    reload_seconds = time.perf_counter() - start
+
+    cache = ModelCache(max_bytes=model_bytes * cached_models * 1.05, models_dir=directory)
+    start = time.perf_counter()
+    for i in ids:
+        cache.predict(f"school_{i}", [record])
+    cached_seconds = time.perf_counter() - start
+    status = cache.status()
+    return {
+        "models": models,
+        "model_type": model_type,
+        "model_kb": round(model_bytes / 1024, 1),
+        "cache_budget_models": cached_models,
+        "requests": requests,
+        "reload_every_call_ms": round(reload_seconds / requests * 1000, 3),
+        "lru_cache_ms": round(cached_seconds / requests * 1000, 3),
+        "speedup": round(reload_seconds / cached_seconds, 1),
+        "cache": {key: status[key] for key in ("hit_rate", "hits", "misses", "evictions", "bytes", "max_bytes")}
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request latency of trained-model predictions with and without the LRU cache")
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--cached-models", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--model-type", default="random_forest")
+    parser.add_argument("--skew", type=float, default=1.2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.models, args.cached_models, args.requests, args.model_type, args.skew), indent=2))
@@ -0,0 +1,90 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+from benchmarks.fixtures import write_large_csv
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def _in_memory(path: str, epochs: int, results):
+    # What run_training did before: load everything, encode everything, fit.
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.preprocessing import StandardScaler
+    from training.out_of_core import peak_rss_mb
+    from training.preprocessing import FeaturePipeline
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    df = pd.read_csv(path)
+    X = StandardScaler().fit_transform(FeaturePipeline(FEATURES).fit_transform(df))
+    y = df["Class"].to_numpy()
+    model = SGDClassifier(loss="log_loss", max_iter=epochs, tol=None, random_state=42).fit(X, y)
+    elapsed = time.perf_counter() - start
+    results.put({
+        "mode": "in_memory",
+        "rows": len(df),
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(len(df) * epochs / elapsed, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "train_accuracy": round(float(np.mean(model.predict(X) == y)), 4)
+    })
+
+
+def _out_of_core(path: str, epochs: int, memory_budget_mb: float, results):
+    from training.out_of_core import OutOfCoreTrainer, peak_rss_mb
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    trainer = OutOfCoreTrainer(path, FEATURES, "Class", "sgd_logistic", epochs=epochs,
+                               memory_budget_mb=memory_budget_mb)
+    trainer.fit()
+    elapsed = time.perf_counter() - start
+    summary = trainer.summary()
+    results.put({
+        "mode": "out_of_core",
+        "rows": summary["rows"],
+        "seconds": round(elapsed, 2),
+        "rows_per_second": summary["rows_per_second"],
+        "epoch_rows_per_second": [p["rows_per_second"] for p in summary["passes"] if p["pass"].startswith("epoch")],
+        "chunk_rows": summary["chunk_rows"],
+        "peak_chunk_mb": summary["peak_chunk_mb"],
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "holdout_accuracy": round(trainer.metrics["accuracy"], 4)
+    })
+
+
+def run(rows: int = 2000000, epochs: int = 3, memory_budget_mb: float = 64) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_out_of_core_")
+    path = write_large_csv(os.path.join(directory, "screening.csv"), rows)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # Separate interpreters so each peak RSS belongs to one mode only.
+    report = {"rows": rows, "csv_mb": round(os.path.getsize(path) / 2 ** 20, 1), "memory_budget_mb": memory_budget_mb}
+    for target, args in ((_out_of_core, (path, epochs, memory_budget_mb, results)), (_in_memory, (path, epochs, results))):
+        process = context.Process(target=target, args=args)
+        process.start()
+        outcome = results.get()
+        process.join()
+        report[outcome.pop("mode")] = outcome
+    os.remove(path)
+    for mode in ("in_memory", "out_of_core"):
+        report[mode]["working_set_mb"] = round(report[mode]["peak_rss_mb"] - report[mode]["baseline_rss_mb"], 1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak memory and throughput of out-of-core vs in-memory training")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--memory-budget-mb", type=float, default=64)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.epochs, args.memory_budget_mb), indent=2))
@@ -0,0 +1,202 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import write_scaled_csv
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+METRICS = ("accuracy", "precision", "recall", "f1_score")
+
+
+def scenarios() -> Dict[str, Dict[str, Any]]:
+    base = {"dataset_id": "export.csv", "target_column": "Class", "feature_columns": FEATURES,
+            "train_test_split": 0.8}
+    return {
+        "random_forest": {**base, "model_type": "random_forest",
+                          "hyperparameters": {"n_estimators": 150, "random_state": 0}},
+        "gradient_boosting": {**base, "model_type": "gradient_boosting",
+                              "hyperparameters": {"n_estimators": 200, "max_depth": 4},
+                              "early_stopping": {"patience": 30}},
+        "search": {**base, "model_type": "random_forest", "hyperparameters": {"n_estimators": 40, "random_state": 0},
+                   "search": {"strategy": "grid", "n_jobs": 1,
+                              "space": {"max_depth": [4, 8, None], "min_samples_leaf": [1, 5, 20]}}},
+        "out_of_core": {**base, "model_type": "sgd_logistic", "hyperparameters": {},
+                        "out_of_core": {"enabled": True, "epochs": 8, "chunk_rows": 5000}}
+    }
+
+
+def _environment(settings: Dict[str, str]):
+    # Spawned children read their configuration at import, so set it first.
+    os.environ.update(settings)
+
+
+def _reference(settings: Dict[str, str], payload: Dict[str, Any], results):
+    # The same request trained start to finish with checkpointing off.
+    _environment({**settings, "TRAINING_CHECKPOINT_ENABLED": "0"})
+    from api.routes.training import TrainingRequest
+    from training.jobs import TrainingJobs
+    from training.runner import run_training_job
+
+    jobs = TrainingJobs()
+    job_id = jobs.create(payload["configuration_id"], "reference")
+    run_training_job(job_id, TrainingRequest(**payload), jobs)
+    results.put(jobs.get(job_id))
+
+
+def _serve_until_killed(settings: Dict[str, str], payload: Dict[str, Any]):
+    # A worker that takes the job over HTTP; the parent SIGKILLs it mid-run.
+    _environment(settings)
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        client.post("/api/training/start-training", json=payload)
+
+
+def _restart(settings: Dict[str, str], job_id: str, timeout: float, results):
+    # A fresh worker: its startup resumes whatever the killed one left.
+    _environment(settings)
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + timeout
+        job = {"status": "missing"}
+        while time.monotonic() < deadline:
+            response = client.get(f"/api/training/jobs/{job_id}")
+            job = response.json() if response.status_code == 200 else {"status": "missing"}
+            if job["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.2)
+        results.put(job)
+
+
+def _progress(state: Dict[str, Any]) -> Dict[str, Any]:
+    if "booster" in state:
+        return {"stages": len(state["booster"]["history"])}
+    if "ensemble" in state:
+        return {"trees": len(state["ensemble"].estimators_)}
+    if "trials" in state or "search" in state:
+        return {"trials": len(state.get("trials") or []), "search_done": "search" in state}
+    if "out_of_core" in state:
+        return {"epochs": state["out_of_core"]["epoch"]}
+    return {}
+
+
+def _wait_for_checkpoint(path: str, process, timeout: float) -> Optional[Dict[str, Any]]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.is_alive():
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        time.sleep(0.02)
+    return None
+
+
+def _same_model(reference_path: str, resumed_path: str, df: pd.DataFrame) -> bool:
+    bundles = []
+    for path in (reference_path, resumed_path):
+        with open(path, "rb") as f:
+            bundles.append(pickle.load(f))
+    probabilities = [bundle["model"].predict_proba(bundle["pipeline"].transform(df)) for bundle in bundles]
+    return bool(np.array_equal(*probabilities))
+
+
+def run(rows: int = 60000, names: Optional[List[str]] = None, timeout: float = 600) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_resume_")
+    data_dir = os.path.join(directory, "data")
+    os.makedirs(data_dir)
+    csv_path = write_scaled_csv(os.path.join(data_dir, "export.csv"), rows)
+    settings = {
+        "TRAINING_DATA_DIR": data_dir,
+        "MODELS_DIR": os.path.join(directory, "models"),
+        "TRAINING_CHECKPOINT_DIR": os.path.join(directory, "checkpoints"),
+        "TRAINING_JOBS_DIR": os.path.join(directory, "jobs"),
+        "FEATURE_CACHE_DIR": os.path.join(directory, "feature_cache"),
+        "ADAPTIVE_BANDIT_PATH": os.path.join(directory, "models", "adaptive_bandit.npz"),
+        "TRAINING_CHECKPOINT_SECONDS": "0",
+        "TRAINING_CHECKPOINT_STAGES": "10"
+    }
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    report: Dict[str, Any] = {"rows": rows, "scenarios": {}}
+
+    for name, request in scenarios().items():
+        if names and name not in names:
+            continue
+        job_id = f"resume-{name}"
+        process = context.Process(target=_reference,
+                                  args=(settings, {**request, "configuration_id": f"reference_{name}"}, results))
+        process.start()
+        reference = results.get(timeout=timeout)
+        process.join()
+
+        payload = {**request, "configuration_id": f"resumed_{name}", "job_id": job_id}
+        process = context.Process(target=_serve_until_killed, args=(settings, payload))
+        started = time.perf_counter()
+        process.start()
+        state = _wait_for_checkpoint(os.path.join(settings["TRAINING_CHECKPOINT_DIR"], job_id, "state.pkl"),
+                                     process, timeout)
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+        killed_after = round(time.perf_counter() - started, 2)
+
+        process = context.Process(target=_restart, args=(settings, job_id, timeout, results))
+        process.start()
+        resumed = results.get(timeout=timeout + 60)
+        process.join()
+
+        outcome: Dict[str, Any] = {
+            "killed_after_seconds": killed_after,
+            "progress_at_kill": _progress(state) if state else None,
+            "resumed_status": resumed["status"],
+            "error": resumed.get("error")
+        }
+        if resumed["status"] == "completed":
+            result, expected = resumed["result"], reference["result"]
+            outcome.update({
+                "resumed_from": result["checkpoint"]["resumed_from"],
+                "metrics": {key: result[key] for key in METRICS},
+                "same_metrics": all(result[key] == expected[key] for key in METRICS),
+                "same_model": _same_model(expected["model_path"], result["model_path"], df),
+                "same_history": len(resumed["metrics"]) == len(reference["metrics"])
+                and len(resumed["trials"]) == len(reference["trials"])
+            })
+            if "search" in expected:
+                outcome["same_search"] = result["search"]["best_params"] == expected["search"]["best_params"]
+            if "early_stopping" in expected:
+                outcome["same_early_stopping"] = result["early_stopping"] == expected["early_stopping"]
+        outcome["passed"] = bool(
+            state is not None and resumed["status"] == "completed" and outcome.get("resumed_from")
+            and all(value for key, value in outcome.items() if key.startswith("same_")))
+        outcome["checkpoint_cleared"] = not os.path.exists(os.path.join(settings["TRAINING_CHECKPOINT_DIR"], job_id))
+        outcome["passed"] = outcome["passed"] and outcome["checkpoint_cleared"]
+        report["scenarios"][name] = outcome
+
+    report["passed"] = bool(report["scenarios"]) and all(s["passed"] for s in report["scenarios"].values())
+    shutil.rmtree(directory)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kill training jobs mid-run and check the resumed results")
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(scenarios()))
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+    outcome = run(args.rows, args.scenarios, args.timeout)
+    print(json.dumps(outcome, indent=2))
+    sys.exit(0 if outcome["passed"] else 1)
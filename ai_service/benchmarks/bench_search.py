@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import tempfile
+from typing import Any, Dict
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.fixtures import write_scaled_csv
+from training.runner import classification_metrics
+from training.estimators import build_model
+from training.search import SuccessiveHalvingSearch, build_candidates
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age"]
+
+SPACES = {
+    "random_forest": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [4, 8, 16, None],
+        "min_samples_leaf": [1, 5, 20]
+    },
+    "gradient_boosting": {
+        "n_estimators": [50, 100, 200],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_depth": [2, 3, 5]
+    }
+}
+
+
+def run(rows: int = 20000, model_type: str = "random_forest", factor: int = 3, cv: int = 3,
+        n_jobs: int = -1) -> Dict[str, Any]:
+    directory = tempfile.mkdtemp(prefix="bench_search_")
+    df = pd.read_csv(write_scaled_csv(os.path.join(directory, "screening.csv"), rows))
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURES], df["Class"], test_size=0.2, random_state=42)
+    candidates = [{**params, "random_state": 42} for params in build_candidates("grid", SPACES[model_type])]
+
+    report = {"rows": rows, "model_type": model_type, "candidates": len(candidates), "cpus": os.cpu_count()}
+    for name, halving in (("exhaustive", False), ("successive_halving", True)):
+        search = SuccessiveHalvingSearch(model_type, candidates, factor=factor, cv=cv, n_jobs=n_jobs, halving=halving)
+        outcome = search.fit(X_train, y_train)
+        model = build_model(model_type, outcome["best_params"])
+        model.fit(X_train, y_train)
+        report[name] = {
+            "elapsed_seconds": outcome["elapsed"],
+            "trials": outcome["trials"],
+            "rungs": [{key: rung[key] for key in ("resources", "evaluated", "elapsed")} for rung in outcome["rungs"]],
+            "best_params": outcome["best_params"],
+            "cv_score": round(outcome["best_score"], 4),
+            "test_f1": round(classification_metrics(y_test, model.predict(X_test))["f1_score"], 4)
+        }
+    report["speedup"] = round(report["exhaustive"]["elapsed_seconds"] / report["successive_halving"]["elapsed_seconds"], 2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare successive-halving search with exhaustive grid search")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--model-type", default="random_forest", choices=sorted(SPACES))
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.model_type, args.factor, args.cv, args.n_jobs), indent=2))
@@ -0,0 +1,107 @@
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.routes.iep import IEPGenerationResponse
+from core.serialization import EngineJSONResponse
+from engines.iep_engine import AutoIEPEngine
+
+
+def video_frames_payload(frames: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    return {
+        "total_frames": frames,
+        "fps": 30,
+        "width": 640,
+        "height": 480,
+        "duration_seconds": frames / 30.0,
+        "extracted_frames": [
+            {"frame_number": i, "timestamp": i / 30.0, "motion_level": rng.random()}
+            for i in range(frames)
+        ],
+        "extraction_status": "success"
+    }
+
+
+def comprehensive_payload() -> Dict[str, Any]:
+    rng = np.random.default_rng(1)
+    speech = {
+        "analysis_type": "speech",
+        "pronunciation_score": round(rng.uniform(0.6, 0.95), 2),
+        "clarity_score": round(rng.uniform(0.6, 0.95), 2),
+        "fluency_score": round(rng.uniform(0.6, 0.95), 2),
+        "detected_words": ["hello", "world", "therapy", "learning"],
+        "confidence": np.float64(0.82)
+    }
+    behavior = {
+        "analysis_type": "behavior",
+        "activity_level": rng.choice(["low", "moderate", "high"]),
+        "attention_span_seconds": rng.uniform(30, 120),
+        "movement_scores": rng.random(300)
+    }
+    return {"student_id": "bench", "individual_analyses": {"speech": speech, "behavior": behavior}}
+
+
+def iep_payload() -> Dict[str, Any]:
+    return AutoIEPEngine().generate({"full_name": "Bench Student", "conditions": ["autism", "adhd"]})
+
+
+def fastapi_default(payload: Any) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fastapi_response_model(payload: Any) -> bytes:
+    validated = IEPGenerationResponse.model_validate(payload)
+    return JSONResponse(jsonable_encoder(validated.model_dump(mode="json"))).body
+
+
+def engine_response(payload: Any) -> bytes:
+    return EngineJSONResponse(payload).body
+
+
+def timed(fn: Callable[[Any], bytes], payload: Any, repeat: int) -> float:
+    fn(payload)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(repeat: int = 50) -> List[Dict[str, Any]]:
+    results = []
+    cases = [
+        ("video_frames_100", video_frames_payload(100), fastapi_default),
+        ("video_frames_5000", video_frames_payload(5000), fastapi_default),
+        ("iep_response_model", iep_payload(), fastapi_response_model),
+    ]
+    for name, payload, baseline in cases:
+        results.append({
+            "payload": name,
+            "bytes": len(engine_response(payload)),
+            "fastapi_ms": round(timed(baseline, payload, repeat), 4),
+            "engine_json_ms": round(timed(engine_response, payload, repeat), 4)
+        })
+
+    payload = comprehensive_payload()
+    results.append({
+        "payload": "comprehensive_with_numpy",
+        "bytes": len(engine_response(payload)),
+        "fastapi_ms": None,
+        "engine_json_ms": round(timed(engine_response, payload, repeat), 4)
+    })
+    for row in results:
+        if row["fastapi_ms"]:
+            row["speedup"] = round(row["fastapi_ms"] / row["engine_json_ms"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
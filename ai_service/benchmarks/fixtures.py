@@ -0,0 +1,85 @@
+import os
+import wave
+from typing import Dict
+
+import cv2
+import numpy as np
+import pandas as pd
+
+SCREENING_CSV = "./datas/Autism_screening/Autism_Screening_Data_Combined.csv"
+SAMPLE_RATE = 16000
+
+
+def write_wav(path: str, seconds: float, kind: str = "sine", sample_rate: int = SAMPLE_RATE, seed: int = 0) -> str:
+    samples = int(seconds * sample_rate)
+    t = np.arange(samples) / sample_rate
+    if kind == "sine":
+        # Syllable-like bursts: a 220 Hz tone gated at 4 Hz so pause detection has work to do.
+        signal = np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 4 * t) > 0)
+    elif kind == "noise":
+        signal = np.random.default_rng(seed).uniform(-1, 1, samples)
+    else:
+        raise ValueError(f"Unknown wav kind: {kind}")
+
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((signal * 0.5 * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def write_video(path: str, frames: int, width: int = 320, height: int = 240, fps: int = 30) -> str:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"No mp4v encoder available to write {path}")
+    size = height // 4
+    for i in range(frames):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        x = (i * 4) % (width - size)
+        y = int((height - size) / 2 * (1 + np.sin(i / 15)))
+        frame[y:y + size, x:x + size] = (255, 255, 255)
+        # A hard cut every 90 frames gives scene detection something to find.
+        if (i // 90) % 2:
+            frame[:, :, 1] = 120
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def write_scaled_csv(path: str, rows: int, source: str = SCREENING_CSV, seed: int = 0) -> str:
+    df = pd.read_csv(source)
+    df.sample(n=rows, replace=rows > len(df), random_state=seed).to_csv(path, index=False)
+    return path
+
+
+def write_large_csv(path: str, rows: int, source: str = SCREENING_CSV, chunk_rows: int = 500000, seed: int = 0) -> str:
+    # Appends resampled chunks so the fixture can be far larger than memory.
+    df = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            df.iloc[rng.integers(0, len(df), n)].to_csv(f, index=False, header=written == 0)
+            written += n
+    return path
+
+
+def build_fixtures(directory: str, scale: float = 1.0) -> Dict[str, str]:
+    os.makedirs(directory, exist_ok=True)
+    specs = {
+        "sine_1s.wav": lambda p: write_wav(p, 1, "sine"),
+        "sine_10s.wav": lambda p: write_wav(p, 10 * scale, "sine"),
+        "noise_10s.wav": lambda p: write_wav(p, 10 * scale, "noise"),
+        "square_60.mp4": lambda p: write_video(p, 60),
+        "square_300.mp4": lambda p: write_video(p, int(300 * scale)),
+        "screening_50k.csv": lambda p: write_scaled_csv(p, int(50000 * scale)),
+    }
+    paths = {}
+    for name, build in specs.items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            build(path)
+        paths[name] = path
+    return paths
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.fixtures import write_video, write_wav
+
+DEFAULT_MIX = "speech=4,behavior=3,emotion=3,progress=2,recommendations=2,iep=1,audio=1,video=1"
+
+
+def build_scenarios(fixtures_dir: str) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    os.makedirs(fixtures_dir, exist_ok=True)
+    wav_path = os.path.join(fixtures_dir, "loadtest_sine_3s.wav")
+    video_path = os.path.join(fixtures_dir, "loadtest_square_60.mp4")
+    if not os.path.exists(wav_path):
+        write_wav(wav_path, 3, "sine")
+    if not os.path.exists(video_path):
+        write_video(video_path, 60)
+    with open(wav_path, "rb") as f:
+        wav = f.read()
+    with open(video_path, "rb") as f:
+        video = f.read()
+
+    history = [{"tracking_date": f"2024-01-{1 + i % 28:02d}", "focus_area": "linguistic",
+                "metric_name": "clarity", "metric_value": 50 + i % 40} for i in range(50)]
+
+    return {
+        "speech": lambda: {"method": "POST", "url": "/api/speech/analyze",
+                           "json": {"audio_data": "sample", "student_id": "load"}},
+        "behavior": lambda: {"method": "POST", "url": "/api/behavior/analyze",
+                             "json": {"video_data": "sample", "student_id": "load"}},
+        "emotion": lambda: {"method": "POST", "url": "/api/emotion/detect",
+                            "json": {"image_data": "sample", "student_id": "load"}},
+        "progress": lambda: {"method": "POST", "url": "/api/progress/predict",
+                             "json": {"student_id": "load", "progress_data": history}},
+        "recommendations": lambda: {"method": "POST", "url": "/api/recommendations/generate",
+                                    "json": {"student_id": "load", "current_performance": {"speech": 0.6},
+                                             "focus_areas": ["speech", "social"]}},
+        "iep": lambda: {"method": "POST", "url": "/api/iep/generate",
+                        "json": {"student_data": {"full_name": "Load Test", "conditions": ["autism"]}}},
+        "audio": lambda: {"method": "POST", "url": "/api/audio/fluency-analysis",
+                          "files": {"file": ("load.wav", wav, "audio/wav")}},
+        "video": lambda: {"method": "POST", "url": "/api/video/detect-movement",
+                          "files": {"file": ("load.mp4", video, "video/mp4")}},
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "max_ms": round(max(latencies) * 1000, 3)}
+
+
+class LoopLagMonitor:
+    # Measures how late a short sleep wakes up. In ASGI mode the app shares this
+    # loop, so a blocking handler shows up directly as lag.
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class ASGIWebSocket:
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "http_version": "1.1",
+            "path": self.path, "raw_path": self.path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"loadtest")], "client": ("loadtest", 0), "server": ("loadtest", 80),
+            "subprotocols": []
+        }
+        await self._to_app.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app.put))
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"WebSocket connection to {self.path} was rejected: {message}")
+
+    async def send(self, text: str):
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def recv(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError("WebSocket closed by the app")
+        return message.get("text") or message.get("bytes", b"").decode()
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            await asyncio.wait([self._task], timeout=1)
+
+
+class RemoteWebSocket:
+    def __init__(self, url: str):
+        self.url = url
+        self._conn = None
+
+    async def connect(self):
+        import websockets
+        self._conn = await websockets.connect(self.url)
+
+    async def send(self, text: str):
+        await self._conn.send(text)
+
+    async def recv(self) -> str:
+        return await self._conn.recv()
+
+    async def close(self):
+        await self._conn.close()
+
+
+async def _subscriber(socket, deliveries: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            message = json.loads(await socket.recv())
+        except (ConnectionError, asyncio.CancelledError):
+            return
+        except Exception:
+            if stop.is_set():
+                return
+            raise
+        if "sent_at" in message:
+            deliveries.append(time.time() - message["sent_at"])
+
+
+async def _publisher(socket, interval: float, stop: asyncio.Event) -> int:
+    sent = 0
+    while not stop.is_set():
+        await socket.send(json.dumps({
+            "type": "metric",
+            "metric": {"epoch": sent, "accuracy": 0.9, "loss": 0.1},
+            "sent_at": time.time()
+        }))
+        sent += 1
+        await asyncio.sleep(interval)
+    return sent
+
+
+async def run_load(url: Optional[str], mix: Dict[str, float], concurrency: int, duration: float,
+                   max_requests: int, ws_subscribers: int, ws_interval: float, fixtures_dir: str,
+                   seed: int = 0) -> Dict[str, Any]:
+    scenarios = build_scenarios(fixtures_dir)
+    unknown = set(mix) - set(scenarios)
+    if unknown:
+        raise ValueError(f"Unknown scenarios {sorted(unknown)}; choose from {sorted(scenarios)}")
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+        ws_url = url.replace("http", "ws", 1).rstrip("/") + "/ws/training"
+        make_socket = lambda: RemoteWebSocket(ws_url)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+        make_socket = lambda: ASGIWebSocket(app, "/ws/training")
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    stop = asyncio.Event()
+    issued = 0
+
+    async def worker(index: int):
+        nonlocal issued
+        rng = random.Random(seed + index)
+        while not stop.is_set():
+            if max_requests and issued >= max_requests:
+                stop.set()
+                return
+            issued += 1
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await client.request(**scenarios[name]())
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[name].append(time.perf_counter() - start)
+            errors[name] += failed
+            # Over ASGITransport a cheap route may complete without ever suspending;
+            # yield so the timer, the lag monitor and other workers get to run.
+            await asyncio.sleep(0)
+
+    sockets, deliveries, ws_tasks = [], [], []
+    for _ in range(ws_subscribers):
+        socket = make_socket()
+        await socket.connect()
+        sockets.append(socket)
+        ws_tasks.append(asyncio.create_task(_subscriber(socket, deliveries, stop)))
+    publisher = asyncio.create_task(_publisher(sockets[0], ws_interval, stop)) if sockets else None
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+    try:
+        await asyncio.wait(workers, timeout=duration if duration > 0 else None)
+    finally:
+        stop.set()
+        await asyncio.gather(*workers, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        await monitor.stop()
+        published = await publisher if publisher else 0
+        for socket in sockets:
+            await socket.close()
+        for task in ws_tasks:
+            task.cancel()
+        await asyncio.gather(*ws_tasks, return_exceptions=True)
+        await client.aclose()
+
+    total = sum(len(values) for values in latencies.values())
+    endpoints = {}
+    for name in names:
+        endpoints[name] = {
+            "requests": len(latencies[name]),
+            "errors": errors[name],
+            "throughput_rps": round(len(latencies[name]) / elapsed, 2),
+            **summarize(latencies[name])
+        }
+
+    return {
+        "target": url or "asgi",
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "overall": summarize([v for values in latencies.values() for v in values]),
+        "endpoints": endpoints,
+        "event_loop_lag": {
+            "scope": "client" if url else "app",
+            "samples": len(monitor.lags),
+            **summarize(monitor.lags)
+        },
+        "websocket": {
+            "subscribers": ws_subscribers,
+            "published": published,
+            "delivered": len(deliveries),
+            **summarize(deliveries)
+        }
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"target={report['target']} concurrency={report['concurrency']} duration={report['duration_seconds']}s "
+          f"requests={report['requests']} errors={report['errors']} throughput={report['throughput_rps']} req/s")
+    print(f"{'endpoint':18s} {'reqs':>7s} {'err':>5s} {'rps':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    rows = list(report["endpoints"].items()) + [("overall", {**report["overall"], "requests": report["requests"],
+                                                             "errors": report["errors"],
+                                                             "throughput_rps": report["throughput_rps"]})]
+    for name, row in rows:
+        cells = [f"{row[key]:9.2f}" if row[key] is not None else f"{'-':>9s}"
+                 for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:18s} {row['requests']:7d} {row['errors']:5d} " + " ".join(cells))
+    lag = report["event_loop_lag"]
+    print(f"event loop lag ({lag['scope']}): p50={lag['p50_ms']}ms p99={lag['p99_ms']}ms max={lag['max_ms']}ms")
+    ws = report["websocket"]
+    if ws["subscribers"]:
+        print(f"websocket: {ws['subscribers']} subscribers, {ws['published']} published, {ws['delivered']} delivered, "
+              f"p50={ws['p50_ms']}ms p99={ws['p99_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive mixed concurrent traffic against the AI service")
+    parser.add_argument("--url", default=None, help="Base URL of a running server; omit to drive the app in process")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma separated scenario=weight pairs")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run; 0 runs until --requests")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    parser.add_argument("--ws-subscribers", type=int, default=0, help="Websocket clients on /ws/training")
+    parser.add_argument("--ws-interval", type=float, default=0.1, help="Seconds between published training metrics")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "ai_service_loadtest_fixtures"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.duration <= 0 and args.requests <= 0:
+        parser.error("Set --duration or --requests")
+
+    report = asyncio.run(run_load(args.url, parse_mix(args.mix), args.concurrency, args.duration, args.requests,
+                                  args.ws_subscribers, args.ws_interval, args.fixtures_dir, args.seed))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
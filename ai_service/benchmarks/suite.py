@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.fixtures import build_fixtures
+
+Case = Tuple[str, str, int, Callable[[], Any]]
+
+
+def engine_cases(repeat: int, fixtures: Dict[str, str]) -> Tuple[List[Case], List[str]]:
+    from benchmarks.bench_batching import _students as screening_students
+    from benchmarks.bench_iep import make_students
+    from benchmarks.bench_serialization import video_frames_payload
+    from core.serialization import EngineJSONResponse
+    from engines.adaptive_learning_engine import AdaptiveLearningEngine
+    from engines.autism_screening_engine import AutismScreeningEngine
+    from engines.behavior_engine import BehaviorRecognitionEngine
+    from engines.emotion_engine import EmotionDetectionEngine
+    from engines.iep_engine import AutoIEPEngine
+    from engines.pattern_recognition_engine import PatternRecognitionEngine
+    from engines.progress_engine import ProgressPredictionEngine
+    from engines.recommendation_engine import RecommendationEngine
+    from engines.risk_detection_engine import RiskDetectionEngine
+    from engines.speech_engine import SpeechAnalysisEngine
+
+    history = [
+        {"tracking_date": f"2024-01-{1 + i % 28:02d}", "focus_area": "linguistic", "metric_name": "clarity",
+         "metric_value": 50 + i % 40}
+        for i in range(200)
+    ]
+    performance = {"speech": 0.62, "attention": 0.48, "social": 0.71}
+    screening = {f"A{i}": i % 2 for i in range(1, 11)}
+    students = make_students(1000)
+    student_ids = [f"student-{i}" for i in range(1000)]
+    frames = video_frames_payload(5000)
+    # Batched calls get one full micro-batch (BATCH_MAX_SIZE) of requests.
+    batch = 32
+    screening_batch = [{"student_data": student} for student in screening_students(batch)]
+    results = [{"student_id": student_ids[i % 100], "activity": "Letter Recognition Game", "difficulty": "moderate",
+                "score": (i % 10) / 10} for i in range(1000)]
+    scored_path = os.path.join(tempfile.gettempdir(), f"suite_scored_{os.getpid()}.csv")
+
+    speech = SpeechAnalysisEngine()
+    behavior = BehaviorRecognitionEngine()
+    emotion = EmotionDetectionEngine()
+    progress = ProgressPredictionEngine()
+    risk = RiskDetectionEngine()
+    patterns = PatternRecognitionEngine()
+    recommendations = RecommendationEngine()
+    adaptive = AdaptiveLearningEngine()
+    iep = AutoIEPEngine()
+    screening_engine = AutismScreeningEngine()
+
+    slow = max(1, repeat // 10)
+    media = [{"audio_data": "sample", "student_id": "bench"}] * batch
+    return [
+        ("engine", "SpeechAnalysisEngine.analyze", repeat, lambda: speech.analyze("sample", "bench")),
+        ("engine", f"SpeechAnalysisEngine.analyze_many[{batch}]", repeat, lambda: speech.analyze_many(media)),
+        ("engine", "SpeechAnalysisEngine.transcribe", repeat, lambda: speech.transcribe("sample")),
+        ("engine", "BehaviorRecognitionEngine.analyze", repeat, lambda: behavior.analyze("sample", "bench")),
+        ("engine", f"BehaviorRecognitionEngine.analyze_many[{batch}]", repeat,
+         lambda: behavior.analyze_many([{"video_data": "sample", "student_id": "bench"}] * batch)),
+        ("engine", "BehaviorRecognitionEngine.track_attention", repeat, lambda: behavior.track_attention("sample")),
+        ("engine", "EmotionDetectionEngine.analyze", repeat, lambda: emotion.analyze("sample", "bench")),
+        ("engine", f"EmotionDetectionEngine.analyze_many[{batch}]", repeat,
+         lambda: emotion.analyze_many([{"image_data": "sample", "student_id": "bench"}] * batch)),
+        ("engine", "EmotionDetectionEngine.track_timeline", repeat, lambda: emotion.track_timeline("sample", "bench")),
+        ("engine", "ProgressPredictionEngine.predict", repeat, lambda: progress.predict("bench", history)),
+        ("engine", f"ProgressPredictionEngine.analyze_many[{batch}]", repeat,
+         lambda: progress.analyze_many([{"student_id": "bench", "progress_data": history}] * batch)),
+        ("engine", "ProgressPredictionEngine.forecast", repeat, lambda: progress.forecast("bench", history)),
+        ("engine", "RiskDetectionEngine.analyze", repeat, lambda: risk.analyze("bench", history, history)),
+        ("engine", f"RiskDetectionEngine.analyze_many[{batch}]", repeat, lambda: risk.analyze_many(
+            [{"student_id": "bench", "behavioral_data": history, "progress_data": history}] * batch)),
+        ("engine", "RiskDetectionEngine.continuous_monitor", repeat, lambda: risk.continuous_monitor("bench")),
+        ("engine", "PatternRecognitionEngine.analyze", repeat, lambda: patterns.analyze("bench", history, "progress")),
+        ("engine", f"PatternRecognitionEngine.analyze_many[{batch}]", repeat, lambda: patterns.analyze_many(
+            [{"student_id": "bench", "historical_data": history, "data_type": "progress"}] * batch)),
+        ("engine", "PatternRecognitionEngine.discover_insights", repeat,
+         lambda: patterns.discover_insights("bench", "30d")),
+        ("engine", "RecommendationEngine.generate", repeat,
+         lambda: recommendations.generate("bench", performance, ["speech", "social"])),
+        ("engine", "RecommendationEngine.create_daily_plan", repeat,
+         lambda: recommendations.create_daily_plan("bench", {"session_minutes": 30})),
+        ("engine", "RecommendationEngine.reload_catalog", slow, recommendations.reload_catalog),
+        ("engine", "AdaptiveLearningEngine.adjust_content", repeat,
+         lambda: adaptive.adjust_content("bench", {"activity": "Letter Recognition Game"}, history[:10])),
+        ("engine", "AdaptiveLearningEngine.select_batch[1000]", repeat, lambda: adaptive.select_batch(student_ids)),
+        ("engine", "AdaptiveLearningEngine.record_results[1000]", repeat, lambda: adaptive.record_results(results)),
+        ("engine", "AdaptiveLearningEngine.personalize", repeat, lambda: adaptive.personalize("bench", {})),
+        ("engine", "AutoIEPEngine.generate", repeat, lambda: iep.generate(students[0])),
+        ("engine", "AutoIEPEngine.generate_many[1000]", slow, lambda: list(iep.generate_many(students))),
+        ("engine", f"AutoIEPEngine.analyze_many[{batch}]", repeat,
+         lambda: iep.analyze_many([{"student_data": student} for student in students[:batch]])),
+        ("engine", "AutoIEPEngine.update_goals", repeat, lambda: iep.update_goals("bench", history)),
+        ("engine", "AutismScreeningEngine.predict", repeat, lambda: screening_engine.predict(screening)),
+        ("engine", "AutismScreeningEngine.predict_batch[1000]", slow,
+         lambda: screening_engine.predict_batch([screening] * 1000)),
+        ("engine", "AutismScreeningEngine.analyze_behavioral_features", repeat,
+         lambda: screening_engine.analyze_behavioral_features(screening_batch[0]["student_data"])),
+        ("engine", f"AutismScreeningEngine.analyze_many[{batch}]", repeat,
+         lambda: screening_engine.analyze_many(screening_batch)),
+        ("engine", "AutismScreeningEngine.score_file[screening_50k]", slow,
+         lambda: screening_engine.score_file(fixtures["screening_50k.csv"], scored_path, workers=1)),
+        ("serialization", "EngineJSONResponse[video_frames_5000]", repeat, lambda: EngineJSONResponse(frames)),
+    ], [scored_path]
+
+
+def route_cases(repeat: int, fixtures: Dict[str, str]) -> Tuple[List[Case], List[str]]:
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+
+    def upload(path: str, route: str) -> Callable[[], Any]:
+        with open(path, "rb") as f:
+            content = f.read()
+        name = os.path.basename(path)
+
+        def call():
+            response = client.post(route, files={"file": (name, content)})
+            response.raise_for_status()
+            return response
+        return call
+
+    def post_json(route: str, payload: Dict[str, Any]) -> Callable[[], Any]:
+        def call():
+            response = client.post(route, json=payload)
+            response.raise_for_status()
+            return response
+        return call
+
+    dataset = fixtures["screening_50k.csv"]
+    dataset_name = f"bench_{os.path.basename(dataset)}"
+    with open(dataset, "rb") as f:
+        dataset_content = f.read()
+    os.makedirs("./datas/uploads", exist_ok=True)
+    with open(f"./datas/uploads/{dataset_name}", "wb") as f:
+        f.write(dataset_content)
+
+    def upload_dataset():
+        response = client.post("/api/training/upload-dataset", files={"file": (dataset_name, dataset_content)})
+        response.raise_for_status()
+        return response
+
+    training = {
+        "configuration_id": "bench_training",
+        "dataset_id": f"uploads/{dataset_name}",
+        "model_type": "random_forest",
+        "target_column": "Class",
+        "feature_columns": [f"A{i}" for i in range(1, 11)] + ["Age"],
+        "train_test_split": 0.8,
+        "hyperparameters": {"n_estimators": 50, "random_state": 42, "n_jobs": 1}
+    }
+    model_path = f"./models/{training['configuration_id']}.pkl"
+
+    def start_training():
+        # Training runs as a background task, which TestClient completes before
+        # returning, so the job has already finished here.
+        response = client.post("/api/training/start-training", json=training)
+        response.raise_for_status()
+        job = client.get(f"/api/training/jobs/{response.json()['job_id']}").json()
+        if job["status"] != "completed":
+            raise RuntimeError(f"Training job {job['status']}: {job['error']}")
+        return response
+
+    slow = max(1, repeat // 10)
+
+    return [
+        ("route", "POST /api/audio/extract-features[sine_1s]", slow, upload(fixtures["sine_1s.wav"], "/api/audio/extract-features")),
+        ("route", "POST /api/audio/extract-features[sine_10s]", slow, upload(fixtures["sine_10s.wav"], "/api/audio/extract-features")),
+        ("route", "POST /api/audio/extract-features[noise_10s]", slow, upload(fixtures["noise_10s.wav"], "/api/audio/extract-features")),
+        ("route", "POST /api/audio/fluency-analysis[sine_10s]", slow, upload(fixtures["sine_10s.wav"], "/api/audio/fluency-analysis")),
+        ("route", "POST /api/video/extract-frames[square_300]", slow, upload(fixtures["square_300.mp4"], "/api/video/extract-frames")),
+        ("route", "POST /api/video/detect-movement[square_60]", slow, upload(fixtures["square_60.mp4"], "/api/video/detect-movement")),
+        ("route", "POST /api/video/detect-movement[square_300]", slow, upload(fixtures["square_300.mp4"], "/api/video/detect-movement")),
+        ("route", "POST /api/video/scene-detection[square_300]", slow, upload(fixtures["square_300.mp4"], "/api/video/scene-detection")),
+        ("route", "POST /api/training/upload-dataset[50k]", slow, upload_dataset),
+        ("route", "POST /api/training/dataset-preview[50k]", slow,
+         post_json("/api/training/dataset-preview", {"file_path": f"uploads/{dataset_name}"})),
+        ("route", "POST /api/training/start-training[50k]", slow, start_training),
+        ("route", "POST /api/speech/analyze", repeat,
+         post_json("/api/speech/analyze", {"audio_data": "sample", "student_id": "bench"})),
+    ], [f"./datas/uploads/{dataset_name}", model_path]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4)
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(repeat: int, scale: float, fixtures_dir: str, groups: List[str], match: str) -> Dict[str, Any]:
+    np.random.seed(0)
+    fixtures = build_fixtures(fixtures_dir, scale)
+    cases: List[Case] = []
+    cleanup: List[str] = []
+    if "engine" in groups:
+        engines, cleanup = engine_cases(repeat, fixtures)
+        cases += engines
+    if "route" in groups:
+        routes, route_files = route_cases(repeat, fixtures)
+        cases += routes
+        cleanup += route_files
+
+    results = {}
+    try:
+        for group, name, case_repeat, fn in cases:
+            if match and match not in name:
+                continue
+            results[name] = {"group": group, **measure(fn, case_repeat)}
+            print(f"{name:60s} {results[name]['median_ms']:10.3f} ms", file=sys.stderr)
+    finally:
+        for path in cleanup:
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "scale": scale
+        },
+        "results": results
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            metric: str = "median_ms") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    rows, regressions = [], []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append({"case": name, "baseline": None, "current": result[metric], "change": None, "status": "new"})
+            continue
+        change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+        status = "regression" if change > threshold else "improved" if change < -threshold else "ok"
+        row = {"case": name, "baseline": base[metric], "current": result[metric], "change": round(change, 4),
+               "status": status}
+        rows.append(row)
+        if status == "regression":
+            regressions.append(row)
+    for name in baseline["results"].keys() - current["results"].keys():
+        rows.append({"case": name, "baseline": baseline["results"][name][metric], "current": None,
+                     "change": None, "status": "missing"})
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every engine and media/training route in process")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write JSON results")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--scale", type=float, default=1.0, help="Scale fixture lengths and CSV rows")
+    run_parser.add_argument("--fixtures-dir", default=None)
+    run_parser.add_argument("--groups", default="engine,route")
+    run_parser.add_argument("--match", default="", help="Only run cases whose name contains this text")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown, 0.10 = 10%%")
+    compare_parser.add_argument("--metric", default="median_ms", choices=["min_ms", "median_ms", "mean_ms", "p95_ms"])
+
+    args = parser.parse_args()
+    if args.command == "run":
+        fixtures_dir = args.fixtures_dir or os.path.join(tempfile.gettempdir(), f"ai_service_bench_fixtures_{args.scale}")
+        report = run(args.repeat, args.scale, fixtures_dir, args.groups.split(","), args.match)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold, args.metric)
+    for row in rows:
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+        print(f"{row['status']:10s} {change:>8s}  {row['case']}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+from collections import Counter as SizeCounter, deque
+from typing import Any, Callable, Dict, List, Optional
+
+from core.metrics import registry, Counter, Histogram
+
+# 0 batches whatever is queued when the dispatcher next runs: requests that
+# arrived together or while the previous batch was computing. A wider window
+# trades single-request latency for larger batches under sparse traffic.
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+BATCH_SIZE = registry.register(Histogram(
+    "ai_batch_size", "Requests answered by one batched engine call", ("batcher",), buckets=BATCH_SIZE_BUCKETS))
+BATCH_WAIT_SECONDS = registry.register(Histogram(
+    "ai_batch_wait_seconds", "Time a request waited for its micro-batch to be dispatched", ("batcher",)))
+BATCH_FAILURES = registry.register(Counter(
+    "ai_batch_failures", "Batched engine calls that raised", ("batcher",)))
+
+
+def batch_settings(name: str) -> Dict[str, float]:
+    # BATCH_<NAME>_WINDOW_MS / BATCH_<NAME>_MAX_SIZE override the global defaults.
+    prefix = f"BATCH_{name.upper()}_"
+    return {
+        "window_ms": float(os.getenv(prefix + "WINDOW_MS", BATCH_WINDOW_MS)),
+        "max_size": int(os.getenv(prefix + "MAX_SIZE", BATCH_MAX_SIZE))
+    }
+
+
+class MicroBatcher:
+    # Collects concurrent single-item requests for one engine and answers them
+    # with one analyze_many call: a batch is dispatched when it reaches
+    # max_size or when its oldest request has waited window_ms. One batch runs
+    # at a time, in the default executor, so requests arriving while it runs
+    # form the next batch instead of queueing behind each other one by one.
+    # analyze_many takes the analyze() keyword arguments of each request and
+    # returns their results in order. Engines do their per-student work for
+    # the whole batch in one vectorized pass where they have any; pattern
+    # recognition has none yet and answers item by item.
+    def __init__(self, name: str, analyze_many: Callable[[List[Any]], List[Any]],
+                 window_ms: Optional[float] = None, max_size: Optional[int] = None):
+        settings = batch_settings(name)
+        self.name = name
+        self.analyze_many = analyze_many
+        self.window = (settings["window_ms"] if window_ms is None else window_ms) / 1000
+        self.max_size = max(1, settings["max_size"] if max_size is None else max_size)
+        self.pending = deque()
+        self.sizes = SizeCounter()
+        self.stats = {"requests": 0, "batches": 0, "failed_batches": 0, "wait_seconds": 0.0, "run_seconds": 0.0}
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._size_metric = BATCH_SIZE.labels(name)
+        self._wait_metric = BATCH_WAIT_SECONDS.labels(name)
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future, time.monotonic()))
+        self.stats["requests"] += 1
+        if self._worker is None or self._worker.done():
+            self._full = asyncio.Event()
+            self._worker = loop.create_task(self._drain())
+        elif len(self.pending) >= self.max_size:
+            self._full.set()
+        return await future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self.pending:
+            # The window is measured from the oldest request, so anything that
+            # queued up during the previous batch goes out immediately.
+            remaining = self.pending[0][2] + self.window - time.monotonic()
+            if len(self.pending) < self.max_size and remaining > 0:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [self.pending.popleft() for _ in range(min(self.max_size, len(self.pending)))]
+            # Callers that gave up (client disconnect, timeout) are not computed.
+            batch = [entry for entry in batch if not entry[1].done()]
+            if batch:
+                await self._run(loop, batch)
+
+    async def _run(self, loop, batch):
+        dispatched = time.monotonic()
+        for _, _, queued in batch:
+            self._wait_metric.observe(dispatched - queued)
+            self.stats["wait_seconds"] += dispatched - queued
+        self.sizes[len(batch)] += 1
+        self.stats["batches"] += 1
+        self._size_metric.observe(len(batch))
+        try:
+            results = await loop.run_in_executor(None, self.analyze_many, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} requests")
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            BATCH_FAILURES.labels(self.name).inc()
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.stats["run_seconds"] += time.monotonic() - dispatched
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def status(self) -> Dict[str, Any]:
+        batches, requests = self.stats["batches"], sum(size * count for size, count in self.sizes.items())
+        return {
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+            "pending": len(self.pending),
+            "mean_batch_size": round(requests / batches, 2) if batches else None,
+            "max_batch_size_seen": max(self.sizes) if self.sizes else 0,
+            "batch_sizes": {str(size): self.sizes[size] for size in sorted(self.sizes)},
+            "mean_wait_ms": round(self.stats["wait_seconds"] / requests * 1000, 3) if requests else None,
+            **{key: round(value, 4) if isinstance(value, float) else value for key, value in self.stats.items()}
+        }
+
+
+batchers: Dict[str, MicroBatcher] = {}
+
+
+def batcher_for(name: str, analyze_many: Callable[[List[Any]], List[Any]], **settings) -> MicroBatcher:
+    # One dispatcher per engine name, shared by every route that scores with it.
+    if name not in batchers:
+        batchers[name] = MicroBatcher(name, analyze_many, **settings)
+    return batchers[name]
@@ -0,0 +1,186 @@
+import asyncio
+import errno
+import glob
+import hashlib
+import os
+import socket
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from core.serialization import dumps, loads
+
+# One directory per deployment (user and install location), so two services on
+# the same host never exchange messages through a shared /tmp path.
+_DEPLOYMENT = hashlib.sha1(os.path.realpath(os.path.dirname(os.path.dirname(__file__))).encode()).hexdigest()[:12]
+DEFAULT_UNIX_DIR = os.path.join(tempfile.gettempdir(), f"ai_service_broadcast_{os.getuid()}_{_DEPLOYMENT}")
+BROADCAST_URL = os.getenv("BROADCAST_URL") or (
+    f"unix://{DEFAULT_UNIX_DIR}" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else "memory://"
+)
+BROADCAST_RCVBUF = int(os.getenv("BROADCAST_RCVBUF", str(4 * 2 ** 20)))
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class BroadcastBackend:
+    # Every published message reaches the handler of each started backend on the
+    # channel exactly once, the publisher's own included. A broker-backed
+    # implementation (Redis pub/sub, NATS, ...) only has to provide these three
+    # coroutines and a scheme in create_broadcast.
+    async def start(self, handler: Handler):
+        raise NotImplementedError
+
+    async def publish(self, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+    def status(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class MemoryBroadcast(BroadcastBackend):
+    # handler given up front is used until start() replaces it, so an app run
+    # without its startup event (a TestClient outside a with block) still
+    # delivers to its own clients.
+    def __init__(self, handler: Optional[Handler] = None):
+        self.handler = handler
+
+    async def start(self, handler: Handler):
+        self.handler = handler
+
+    async def publish(self, message: Dict[str, Any]):
+        if self.handler is not None:
+            await self.handler(message)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, queue: asyncio.Queue, stats: Dict[str, int]):
+        self.queue = queue
+        self.stats = stats
+
+    def datagram_received(self, data: bytes, addr):
+        self.stats["received"] += 1
+        self.queue.put_nowait(data)
+
+
+class UnixSocketBroadcast(BroadcastBackend):
+    # Single-host fan-out without a broker: every worker binds a datagram socket
+    # named after its pid in a shared directory, and a publisher sends one
+    # datagram to each peer. Datagrams keep message boundaries, and a full peer
+    # buffer applies backpressure instead of silently dropping. Before start()
+    # messages only reach the local handler.
+    def __init__(self, directory: str = DEFAULT_UNIX_DIR, peer_refresh: float = 1.0, send_retries: int = 200,
+                 handler: Optional[Handler] = None):
+        self.directory = directory
+        self.peer_refresh = peer_refresh
+        self.send_retries = send_retries
+        self.path: Optional[str] = None
+        self.handler = handler
+        self.stats = {"published": 0, "sent": 0, "received": 0, "stale_peers": 0, "send_errors": 0}
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._transport = None
+        self._send_sock: Optional[socket.socket] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler):
+        # Runs in the worker after fork, so the socket is named after the worker's pid.
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.handler = handler
+        self._queue = asyncio.Queue()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, BROADCAST_RCVBUF)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self._queue, self.stats), sock=sock)
+
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.setblocking(False)
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def _consume(self):
+        while True:
+            data = await self._queue.get()
+            try:
+                await self.handler(loads(data))
+            except Exception as e:
+                print(f"Broadcast handler failed: {e}")
+
+    def peers(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at > self.peer_refresh:
+            self._peers = [p for p in glob.glob(os.path.join(self.directory, "*.sock")) if p != self.path]
+            self._peers_at = now
+        return self._peers
+
+    async def _send(self, data: bytes, peer: str) -> bool:
+        for _ in range(self.send_retries):
+            try:
+                self._send_sock.sendto(data, peer)
+                return True
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket file left behind by a worker that died without cleanup.
+                self.stats["stale_peers"] += 1
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+                self._peers = [p for p in self._peers if p != peer]
+                return False
+            except OSError as e:
+                # EMSGSIZE: larger than a datagram can carry (net.core.wmem_max).
+                self.stats["send_errors"] += 1
+                reason = "is too large" if e.errno == errno.EMSGSIZE else f"failed: {e}"
+                print(f"Broadcast message of {len(data)} bytes {reason}; not sent to {peer}")
+                return False
+        self.stats["send_errors"] += 1
+        print(f"Broadcast peer {peer} stayed full; message dropped for it")
+        return False
+
+    async def publish(self, message: Dict[str, Any]):
+        self.stats["published"] += 1
+        if self._send_sock is not None:
+            data = dumps(message)
+            for peer in list(self.peers()):
+                if await self._send(data, peer):
+                    self.stats["sent"] += 1
+        if self.handler is not None:
+            await self.handler(message)
+
+    async def stop(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        if self._transport is not None:
+            self._transport.close()
+        if self._send_sock is not None:
+            self._send_sock.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def status(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "path": self.path, "peers": len(self.peers()), **self.stats}
+
+
+def create_broadcast(url: str = BROADCAST_URL, handler: Optional[Handler] = None) -> BroadcastBackend:
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBroadcast(handler)
+    if parsed.scheme == "unix":
+        return UnixSocketBroadcast(parsed.path or DEFAULT_UNIX_DIR, handler=handler)
+    raise ValueError(f"Unsupported BROADCAST_URL scheme '{parsed.scheme}'. Use memory:// or unix:///path")
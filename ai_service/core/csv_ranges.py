@@ -0,0 +1,42 @@
+import io
+import os
+from typing import List, Tuple
+
+
+def shard_ranges(path: str, shard_bytes: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    # Byte ranges of roughly shard_bytes that start and end on line boundaries,
+    # found by seeking rather than reading the file. Quoted fields must not
+    # contain newlines, which holds for the screening export layout.
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(size, start + max(1, shard_bytes)))
+            f.readline()
+            end = min(size, f.tell())
+            ranges.append((start, end))
+            start = end
+    columns = [name.strip() for name in header.decode("utf-8-sig").rstrip("\r\n").split(",")]
+    return columns, ranges
+
+
+class ByteRange(io.RawIOBase):
+    # One shard of the file, readable like a whole file by the CSV parser.
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
@@ -0,0 +1,339 @@
+import copy
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def dump(self) -> List:
+        return [[list(key), child.state()] for key, child in list(self._children.items())]
+
+    def merged(self, snapshots: Dict[int, Dict[str, List]]) -> "_Metric":
+        # The metric summed over every worker's snapshot. Gauges are not
+        # summed but get a worker label, and only live workers' are kept.
+        merged = copy.copy(self)
+        merged._children = {}
+        merged._lock = threading.Lock()
+        if self.kind == "gauge":
+            merged.labelnames = self.labelnames + ("worker",)
+        for pid, snapshot in snapshots.items():
+            if self.kind == "gauge" and not _alive(pid):
+                continue
+            for key, state in snapshot.get(self.name, []):
+                key = tuple(key) + ((str(pid),) if self.kind == "gauge" else ())
+                merged.labels(*key).merge(state)
+        return merged
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def state(self) -> float:
+        return self.value
+
+    def merge(self, state: float):
+        self.value += state
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0, *labelvalues: str):
+        self.labels(*labelvalues).inc(amount)
+
+    def samples(self):
+        return [("_total", _label_text(self.labelnames, key), child.value) for key, child in self._children.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float, *labelvalues: str):
+        self.labels(*labelvalues).set(value)
+
+    def samples(self):
+        return [("", _label_text(self.labelnames, key), child.value) for key, child in self._children.items()]
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def state(self) -> List:
+        with self._lock:
+            return [list(self.counts), self.sum]
+
+    def merge(self, state: List):
+        counts, total = state
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float, *labelvalues: str):
+        self.labels(*labelvalues).observe(value)
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        return _Timer(self.labels(*labelvalues))
+
+    def samples(self):
+        result = []
+        for key, child in self._children.items():
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                result.append(("_bucket", _label_text(self.labelnames, key, f'le="{_format_value(bound)}"'), cumulative))
+            result.append(("_sum", _label_text(self.labelnames, key), total))
+            result.append(("_count", _label_text(self.labelnames, key), cumulative))
+        return result
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramValue):
+        self.child = child
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class Registry:
+    # Under the pre-fork server each worker only sees its own requests, so a
+    # scrape would land on one worker at random. share() makes every worker
+    # write its samples to <directory>/<pid>.json (see PreforkServer), and
+    # render() then answers for all of them: counters and histograms summed,
+    # including those of workers that have since exited so totals never go
+    # back, gauges per live worker under a "worker" label.
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.directory: Optional[str] = None
+
+    def share(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def write_snapshot(self):
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        staging = f"{path}.tmp"
+        with open(staging, "w") as f:
+            json.dump({name: metric.dump() for name, metric in self.metrics.items()}, f)
+        os.replace(staging, path)
+
+    def _snapshots(self) -> Dict[int, Dict[str, List]]:
+        snapshots = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots[int(name[:-len(".json")])] = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+        return snapshots
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        metrics = list(self.metrics.values())
+        if self.directory is not None:
+            self.write_snapshot()
+            snapshots = self._snapshots()
+            metrics = [metric.merged(snapshots) for metric in metrics]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "ai_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_REQUESTS = registry.register(Counter(
+    "ai_http_requests", "HTTP requests by route template and status code", ("method", "route", "status")))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "ai_http_requests_in_flight", "HTTP requests currently being handled"))
+ENGINE_CALL_SECONDS = registry.register(Histogram(
+    "ai_engine_call_duration_seconds", "Engine method latency", ("method",)))
+MEDIA_DECODE_SECONDS = registry.register(Histogram(
+    "ai_media_decode_duration_seconds", "Time spent decoding uploaded audio and video", ("media", "operation")))
+UPLOAD_BYTES = registry.register(Histogram(
+    "ai_upload_bytes", "Size of uploaded media files", ("media",), buckets=BYTES_BUCKETS))
+MODEL_LOAD_SECONDS = registry.register(Gauge(
+    "ai_model_load_seconds", "Wall time of the last model load or fallback training", ("model", "source")))
+
+
+def timed_engine_call(func: Callable) -> Callable:
+    child = ENGINE_CALL_SECONDS.labels(func.__qualname__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _route_label(scope) -> Optional[str]:
+    route = scope.get("route")
+    return getattr(route, "path", None)
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: BaseHTTPMiddleware would add a task and a stream
+    # copy to every request. Routes are labelled by template to bound cardinality.
+    def __init__(self, app, excluded_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = frozenset(excluded_paths)
+        self.in_flight = HTTP_IN_FLIGHT.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec()
+            route = _route_label(scope) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route).observe(elapsed)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
@@ -0,0 +1,245 @@
+import gc
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from multiprocessing import RawArray
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+from core.metrics import registry
+
+HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "1.0"))
+HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "30"))
+GRACEFUL_TIMEOUT = float(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+# How often each worker writes its metrics for whichever worker is scraped;
+# /metrics is at most this stale for the other workers.
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "1.0"))
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    # Linux only: smaps_rollup gives PSS, which splits each shared page between
+    # the processes mapping it, so summing PSS gives the real footprint.
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(":"):
+            fields[parts[0][:-1]] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+class _WorkerServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, heartbeats, slot: int):
+        super().__init__(config)
+        self.heartbeats = heartbeats
+        self.slot = slot
+
+    async def on_tick(self, counter: int) -> bool:
+        # Ticks come from the worker's event loop, so a handler that blocks the
+        # loop also stops the heartbeat and the supervisor will replace the worker.
+        if counter % max(1, int(HEARTBEAT_INTERVAL * 10)) == 0:
+            self.heartbeats[self.slot] = time.time()
+        if counter % max(1, int(METRICS_WRITE_INTERVAL * 10)) == 0:
+            registry.write_snapshot()
+        return await super().on_tick(counter)
+
+
+class PreforkServer:
+    def __init__(self, app, host: str = "0.0.0.0", port: int = 8000, workers: int = 2,
+                 log_level: str = "info"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.log_level = log_level
+        self.heartbeats = RawArray("d", workers)
+        self.started_at = RawArray("d", workers)
+        self.slots: Dict[int, int] = {}
+        self.restarts = [0] * workers
+        self.sock: Optional[socket.socket] = None
+        self.metrics_dir: Optional[str] = None
+        self.parent_memory: Optional[Dict[str, int]] = None
+        self._stopping = False
+        self._rolling_restart = False
+        self._report_requested = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot: int) -> int:
+        self.heartbeats[slot] = time.time()
+        self.started_at[slot] = time.time()
+        pid = os.fork()
+        if pid:
+            self.slots[pid] = slot
+            return pid
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        registry.share(self.metrics_dir)
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan="on")
+        try:
+            _WorkerServer(config, self.heartbeats, slot).run(sockets=[self.sock])
+        finally:
+            os._exit(0)
+
+    def _terminate(self, pid: int, sig: int = signal.SIGTERM):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _wait_for(self, pids: List[int], timeout: float):
+        deadline = time.time() + timeout
+        remaining = set(pids)
+        while remaining and time.time() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.slots.pop(pid, None)
+            time.sleep(0.05)
+        for pid in remaining:
+            print(f"Worker {pid} did not exit within {timeout}s; killing it")
+            self._terminate(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.slots.pop(pid, None)
+
+    def _reap(self):
+        while self.slots:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.slots.pop(pid, None)
+            if slot is None or self._stopping:
+                continue
+            uptime = time.time() - self.started_at[slot]
+            self.restarts[slot] += 1
+            print(f"Worker {pid} (slot {slot}) exited with status {status} after {uptime:.1f}s; restarting")
+            if uptime < 1.0:
+                # Crash loop: back off instead of forking as fast as possible.
+                time.sleep(min(10.0, 0.5 * self.restarts[slot]))
+            self._spawn(slot)
+
+    def _check_heartbeats(self):
+        now = time.time()
+        for pid, slot in list(self.slots.items()):
+            if now - self.heartbeats[slot] > HEARTBEAT_TIMEOUT:
+                print(f"Worker {pid} (slot {slot}) missed heartbeats for {now - self.heartbeats[slot]:.0f}s; killing it")
+                self.heartbeats[slot] = now
+                self._terminate(pid, signal.SIGKILL)
+
+    def _restart_all(self):
+        # Rolling: bring up the replacement before retiring each old worker so
+        # the shared socket always has someone accepting.
+        for pid, slot in list(self.slots.items()):
+            old_slot = self.slots.pop(pid)
+            self._spawn(old_slot)
+            self._terminate(pid)
+            self._wait_for([pid], GRACEFUL_TIMEOUT)
+        print(f"Rolling restart complete: {len(self.slots)} workers")
+
+    def memory_report(self) -> Dict[str, Any]:
+        workers = {pid: process_memory(pid) for pid in self.slots}
+        parent = process_memory(os.getpid())
+        if parent is None or any(memory is None for memory in workers.values()):
+            return {"available": False, "reason": "per-process PSS needs /proc/<pid>/smaps_rollup (Linux)"}
+
+        actual = parent["pss"] + sum(memory["pss"] for memory in workers.values())
+        # An independent worker would hold privately everything it now shares
+        # with the parent, i.e. its full RSS, and there would be no parent.
+        independent = sum(memory["rss"] for memory in workers.values())
+        return {
+            "available": True,
+            "workers": len(workers),
+            "parent_rss_after_load_mb": round(self.parent_memory["rss"] / 2 ** 20, 1) if self.parent_memory else None,
+            "actual_total_pss_mb": round(actual / 2 ** 20, 1),
+            "independent_workers_estimate_mb": round(independent / 2 ** 20, 1),
+            "saved_mb": round((independent - actual) / 2 ** 20, 1),
+            "per_worker": {
+                str(pid): {key: round(value / 2 ** 20, 1) for key, value in memory.items()}
+                for pid, memory in workers.items()
+            },
+            "restarts": sum(self.restarts)
+        }
+
+    def _print_memory_report(self):
+        report = self.memory_report()
+        if not report["available"]:
+            print(f"Memory report unavailable: {report['reason']}")
+            return
+        print(f"Memory: {report['workers']} workers use {report['actual_total_pss_mb']} MB PSS in total "
+              f"(parent included) vs ~{report['independent_workers_estimate_mb']} MB as independent workers; "
+              f"saved {report['saved_mb']} MB")
+
+    def _on_signal(self, sig, frame):
+        if sig in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        elif sig == signal.SIGHUP:
+            self._rolling_restart = True
+        elif sig == signal.SIGUSR1:
+            self._report_requested = True
+
+    def run(self, report_after: float = 10.0):
+        self.sock = self._bind()
+        self.metrics_dir = tempfile.mkdtemp(prefix="ai_service_metrics_")
+        self.parent_memory = process_memory(os.getpid())
+        # Objects created while importing the app and loading models move to a
+        # permanent generation, so the cyclic GC never writes to their headers
+        # and their pages stay shared after fork.
+        gc.collect()
+        gc.freeze()
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, self._on_signal)
+
+        print(f"Pre-fork server on {self.host}:{self.port} with {self.workers} workers (parent {os.getpid()})")
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        report_at = time.time() + report_after if report_after > 0 else None
+        try:
+            while not self._stopping:
+                time.sleep(0.2)
+                self._reap()
+                self._check_heartbeats()
+                if self._rolling_restart:
+                    self._rolling_restart = False
+                    self._restart_all()
+                if self._report_requested or (report_at and time.time() >= report_at):
+                    self._report_requested = False
+                    report_at = None
+                    self._print_memory_report()
+        finally:
+            self._stopping = True
+            pids = list(self.slots)
+            for pid in pids:
+                self._terminate(pid)
+            self._wait_for(pids, GRACEFUL_TIMEOUT)
+            self.sock.close()
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+            print("Pre-fork server stopped")
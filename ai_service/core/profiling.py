@@ -0,0 +1,161 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("sample", "cprofile")
+
+Stack = Tuple[Tuple[str, str, int], ...]
+
+
+class StackSampler:
+    # Samples one thread's Python stack from a helper thread, so the profiled
+    # request runs at full speed apart from the GIL hand-offs of each sample.
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, count in self.samples.most_common():
+            names = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict:
+        frames: List[Dict] = []
+        frame_index: Dict[Tuple[str, str, int], int] = {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            indexes = []
+            for entry in stack:
+                if entry not in frame_index:
+                    frame_index[entry] = len(frames)
+                    frames.append({"name": entry[0], "file": entry[1], "line": entry[2]})
+                indexes.append(frame_index[entry])
+            samples.append(indexes)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "ai_service",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+
+def _requested_mode(scope) -> Optional[str]:
+    value = None
+    for key, header in scope.get("headers", ()):
+        if key == PROFILE_HEADER:
+            value = header.decode("latin-1")
+            break
+    if value is None and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        value = values[0] if values else None
+    if not value:
+        return None
+
+    mode, _, token = value.partition(":")
+    if PROFILE_TOKEN and token != PROFILE_TOKEN:
+        return None
+    if mode in ("1", "true", ""):
+        return "sample"
+    return mode if mode in PROFILE_MODES else None
+
+
+class ProfilingMiddleware:
+    # Only installed when PROFILING_ENABLED is set. Requests opt in with
+    # "X-Profile: sample|cprofile" (or ?profile=...), suffixed with ":<token>"
+    # when PROFILE_TOKEN is configured. cProfile sees every coroutine that runs
+    # on the loop while the request is active; one profile runs at a time.
+    def __init__(self, app, output_dir: str = PROFILE_OUTPUT_DIR):
+        self.app = app
+        self.output_dir = output_dir
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['path'].strip('/').replace('/', '_')}-{uuid.uuid4().hex[:8]}"
+            base = os.path.join(self.output_dir, name)
+            output = base + (".prof" if mode == "cprofile" else ".collapsed")
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) +
+                               [(b"x-profile-file", os.path.basename(output).encode())]}
+                await send(message)
+
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    profiler.disable()
+                    profiler.dump_stats(output)
+            else:
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    sampler.stop()
+                    with open(output, "w") as f:
+                        f.write(sampler.collapsed())
+                    with open(base + ".speedscope.json", "w") as f:
+                        json.dump(sampler.speedscope(f"{scope['method']} {scope['path']}"), f)
+            print(f"Request profile written to {output}")
+        finally:
+            self._busy.release()
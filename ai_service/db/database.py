@@ -0,0 +1,230 @@
+import json
+import os
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, update, bindparam, or_
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from db.schema import students, student_conditions, progress_tracking, ai_analysis_results, model_versions
+
+DATABASE_URL = os.getenv("AI_DATABASE_URL") or os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+HISTORY_LIMIT = int(os.getenv("DB_HISTORY_LIMIT", "500"))
+
+MIN_DATE = date(1900, 1, 1)
+MAX_DATE = date(9999, 12, 31)
+
+# Built once at import; SQLAlchemy caches their compiled form and asyncpg keeps
+# the server-side prepared statement per pooled connection.
+PROGRESS_HISTORY_QUERY = (
+    select(
+        progress_tracking.c.id,
+        progress_tracking.c.student_id,
+        progress_tracking.c.tracking_date,
+        progress_tracking.c.focus_area,
+        progress_tracking.c.metric_name,
+        progress_tracking.c.metric_value,
+        progress_tracking.c.notes
+    )
+    .where(progress_tracking.c.student_id == bindparam("student_id"))
+    .where(progress_tracking.c.tracking_date.between(bindparam("start_date"), bindparam("end_date")))
+    .order_by(progress_tracking.c.tracking_date.desc())
+    .limit(bindparam("limit"))
+)
+
+ANALYSIS_HISTORY_QUERY = (
+    select(
+        ai_analysis_results.c.id,
+        ai_analysis_results.c.analysis_type,
+        ai_analysis_results.c.analysis_date,
+        ai_analysis_results.c.results,
+        ai_analysis_results.c.confidence_score
+    )
+    .where(ai_analysis_results.c.student_id == bindparam("student_id"))
+    .where(ai_analysis_results.c.analysis_type == bindparam("analysis_type"))
+    .where(ai_analysis_results.c.analysis_date.between(bindparam("start_time"), bindparam("end_time")))
+    .order_by(ai_analysis_results.c.analysis_date.desc())
+    .limit(bindparam("limit"))
+)
+
+STUDENTS_QUERY = (
+    select(students.c.id, students.c.full_name, students.c.date_of_birth, students.c.gender)
+    .where(students.c.id.in_(bindparam("student_ids", expanding=True)))
+)
+
+STUDENT_CONDITIONS_QUERY = (
+    select(
+        student_conditions.c.student_id,
+        student_conditions.c.condition_type,
+        student_conditions.c.severity,
+        student_conditions.c.diagnosed_date
+    )
+    .where(student_conditions.c.student_id.in_(bindparam("student_ids", expanding=True)))
+)
+
+MODEL_VERSION_COLUMNS = (
+    model_versions.c.id,
+    model_versions.c.training_job_id,
+    model_versions.c.model_type,
+    model_versions.c.version_number,
+    model_versions.c.model_path,
+    model_versions.c.is_active,
+    model_versions.c.created_at
+)
+
+ACTIVE_MODEL_VERSION_QUERY = (
+    select(*MODEL_VERSION_COLUMNS)
+    .where(model_versions.c.is_active.is_(True))
+    .order_by(model_versions.c.created_at.desc())
+    .limit(1)
+)
+
+MODEL_VERSION_QUERY = select(*MODEL_VERSION_COLUMNS).where(model_versions.c.id == bindparam("version_id"))
+
+ACTIVATE_MODEL_VERSION = (
+    update(model_versions)
+    .where(or_(model_versions.c.is_active.is_(True), model_versions.c.id == bindparam("version_id")))
+    .values(is_active=model_versions.c.id == bindparam("version_id"))
+)
+
+
+class DatabaseNotConfigured(RuntimeError):
+    pass
+
+
+def async_url(url: str) -> str:
+    for prefix, driver in (("postgresql://", "postgresql+asyncpg://"), ("postgres://", "postgresql+asyncpg://"),
+                           ("sqlite://", "sqlite+aiosqlite://")):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    converted = _jsonable(value)
+    return str(value) if converted is value else converted
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+def _rows(result) -> List[Dict[str, Any]]:
+    return [{key: _jsonable(value) for key, value in row._mapping.items()} for row in result]
+
+
+class Database:
+    def __init__(self, url: Optional[str] = None, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW):
+        self.url = async_url(url) if url else None
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.engine: Optional[AsyncEngine] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.url is not None
+
+    def _get_engine(self) -> AsyncEngine:
+        if self.engine is None:
+            if not self.enabled:
+                raise DatabaseNotConfigured("Database access is not configured. Set DATABASE_URL or send the data inline.")
+            options = {"pool_pre_ping": True, "json_serializer": _json_dumps}
+            if not self.url.startswith("sqlite"):
+                options.update(pool_size=self.pool_size, max_overflow=self.max_overflow, pool_recycle=1800)
+            self.engine = create_async_engine(self.url, **options)
+        return self.engine
+
+    async def disconnect(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    def connect(self):
+        return self._get_engine().connect()
+
+    def begin(self):
+        return self._get_engine().begin()
+
+    async def fetch(self, query, **params) -> List[Dict[str, Any]]:
+        async with self.connect() as conn:
+            return _rows(await conn.execute(query, params))
+
+    async def fetch_progress_history(self, student_id: str, start_date: Optional[date] = None,
+                                     end_date: Optional[date] = None, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        return await self.fetch(
+            PROGRESS_HISTORY_QUERY,
+            student_id=student_id,
+            start_date=start_date or MIN_DATE,
+            end_date=end_date or MAX_DATE,
+            limit=limit
+        )
+
+    async def resolve_progress_history(self, student_id: str, provided: Optional[List[Dict[str, Any]]],
+                                       start_date: Optional[date] = None,
+                                       end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        if provided is not None:
+            return provided
+        return await self.fetch_progress_history(student_id, start_date, end_date)
+
+    async def fetch_analysis_history(self, student_id: str, analysis_type: str,
+                                     start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                     limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        return await self.fetch(
+            ANALYSIS_HISTORY_QUERY,
+            student_id=student_id,
+            analysis_type=analysis_type,
+            start_time=datetime.combine(start_date or MIN_DATE, datetime.min.time(), timezone.utc),
+            end_time=datetime.combine(end_date or MAX_DATE, datetime.max.time(), timezone.utc),
+            limit=limit
+        )
+
+    async def fetch_students(self, student_ids: List[str]) -> List[Dict[str, Any]]:
+        async with self.connect() as conn:
+            found = _rows(await conn.execute(STUDENTS_QUERY, {"student_ids": student_ids}))
+            if not found:
+                return []
+            conditions = _rows(await conn.execute(STUDENT_CONDITIONS_QUERY, {"student_ids": student_ids}))
+
+        by_student = {student["id"]: {**student, "conditions": []} for student in found}
+        for condition in conditions:
+            by_student[condition.pop("student_id")]["conditions"].append(condition)
+        return list(by_student.values())
+
+    async def fetch_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        found = await self.fetch_students([student_id])
+        return found[0] if found else None
+
+    async def fetch_active_model_version(self) -> Optional[Dict[str, Any]]:
+        found = await self.fetch(ACTIVE_MODEL_VERSION_QUERY)
+        return found[0] if found else None
+
+    async def fetch_model_version(self, version_id: str) -> Optional[Dict[str, Any]]:
+        found = await self.fetch(MODEL_VERSION_QUERY, version_id=version_id)
+        return found[0] if found else None
+
+    async def activate_model_version(self, version_id: str) -> Dict[str, Any]:
+        async with self.begin() as conn:
+            found = _rows(await conn.execute(MODEL_VERSION_QUERY, {"version_id": version_id}))
+            if not found:
+                raise LookupError(f"Model version {version_id} not found")
+            await conn.execute(ACTIVATE_MODEL_VERSION, {"version_id": version_id})
+        return {**found[0], "is_active": True}
+
+
+database = Database(DATABASE_URL)
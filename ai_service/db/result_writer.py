@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, InterfaceError
+
+from db.database import database, Database
+from db.schema import ai_analysis_results, ANALYSIS_TYPES, new_id
+
+PERSIST_ANALYSIS_RESULTS = os.getenv("PERSIST_ANALYSIS_RESULTS", "false").lower() in ("1", "true", "yes")
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "200"))
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "2.0"))
+RESULT_MAX_BUFFER = int(os.getenv("RESULT_MAX_BUFFER", "50000"))
+# First wait after a failed flush; it doubles on every further failure up to
+# RESULT_FLUSH_INTERVAL.
+RESULT_RETRY_DELAY = float(os.getenv("RESULT_RETRY_DELAY", "0.25"))
+
+
+def _is_uuid(value: Optional[str]) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+class AnalysisResultWriter:
+    def __init__(self, db: Database, enabled: bool = PERSIST_ANALYSIS_RESULTS, batch_size: int = RESULT_BATCH_SIZE,
+                 flush_interval: float = RESULT_FLUSH_INTERVAL, max_buffer: int = RESULT_MAX_BUFFER,
+                 retry_delay: float = RESULT_RETRY_DELAY):
+        self.db = db
+        self.enabled = enabled and db.enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.buffer = deque(maxlen=max_buffer)
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "rejected": 0, "batches": 0, "failed_batches": 0}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+        self._last_flush = time.monotonic()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    def submit(self, student_id: str, analysis_type: str, results: Dict[str, Any],
+               input_data: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> Optional[str]:
+        # Returns the id the row will have once written, or None if it is not kept.
+        if not self.enabled:
+            return None
+        if analysis_type not in ANALYSIS_TYPES or not _is_uuid(student_id):
+            self.stats["rejected"] += 1
+            return None
+
+        if len(self.buffer) == self.buffer.maxlen:
+            self.stats["dropped"] += 1
+        row_id = new_id()
+        self.buffer.append({
+            "id": row_id,
+            "student_id": str(student_id),
+            "session_id": session_id if _is_uuid(session_id) else None,
+            "analysis_type": analysis_type,
+            "input_data": input_data,
+            "results": results,
+            "confidence_score": results.get("confidence") if isinstance(results, dict) else None
+        })
+        self.stats["submitted"] += 1
+
+        # While backing off from a failed flush, a full batch waits for the
+        # retry instead of sending every request's worth of traffic at the DB.
+        if len(self.buffer) >= self.batch_size and self._wakeup is not None and time.monotonic() >= self._retry_at:
+            self._wakeup.set()
+        return row_id
+
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # The loop is asked to finish rather than cancelled, so an insert in
+        # flight completes (or puts its batch back) before the final drain.
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while self.buffer:
+            if not await self.flush():
+                print(f"Shutting down with {len(self.buffer)} analysis results not persisted")
+                break
+
+    async def _run(self):
+        while not self._stopping:
+            timeout = self.flush_interval
+            if self._retry_at:
+                timeout = max(0.0, min(timeout, self._retry_at - time.monotonic()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            if time.monotonic() < self._retry_at:
+                continue
+            while self.buffer:
+                if not await self.flush():
+                    break
+                if len(self.buffer) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        if not self.buffer:
+            return True
+        async with self._flush_lock or asyncio.Lock():
+            batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+            try:
+                async with self.db.begin() as conn:
+                    await conn.execute(insert(ai_analysis_results), batch)
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                self._backoff = self._retry_at = 0.0
+                return True
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except (OperationalError, InterfaceError, OSError) as e:
+                self.stats["failed_batches"] += 1
+                self._backoff = min(self.flush_interval, max(self.retry_delay, self._backoff * 2))
+                self._retry_at = time.monotonic() + self._backoff
+                print(f"Database unavailable, keeping {len(batch)} analysis results buffered, "
+                      f"retrying in {self._backoff:.2f}s: {e}")
+                self._requeue(batch)
+                return False
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                print(f"Batch insert of {len(batch)} analysis results failed: {e}. Retrying row by row.")
+                return await self._write_rows(batch)
+            finally:
+                self._last_flush = time.monotonic()
+
+    def _requeue(self, batch):
+        # Back at the front, in order. If the buffer filled up meanwhile, the
+        # oldest rows of the batch are the ones that no longer fit, and they
+        # are counted as dropped like any other overflow.
+        overflow = max(0, len(batch) - (self.buffer.maxlen - len(self.buffer)))
+        if overflow:
+            self.stats["dropped"] += overflow
+            print(f"Result buffer full, dropping {overflow} analysis results")
+        self.buffer.extendleft(reversed(batch[overflow:]))
+
+    async def _write_rows(self, batch) -> bool:
+        written = 0
+        for row in batch:
+            try:
+                async with self.db.begin() as conn:
+                    await conn.execute(insert(ai_analysis_results), row)
+                written += 1
+            except Exception as e:
+                self.stats["rejected"] += 1
+                print(f"Dropping analysis result for student {row['student_id']}: {e}")
+        self.stats["written"] += written
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self.buffer),
+            "seconds_since_flush": round(time.monotonic() - self._last_flush, 2),
+            "retry_in_seconds": round(max(0.0, self._retry_at - time.monotonic()), 2),
+            **self.stats
+        }
+
+
+result_writer = AnalysisResultWriter(database)
@@ -0,0 +1,87 @@
+import uuid
+from sqlalchemy import MetaData, Table, Column, Text, Date, DateTime, Numeric, Integer, Boolean, JSON, Enum, Uuid, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Mirrors the tables in database/init.sql and database/migrate_1.sql that ai_service reads or writes.
+metadata = MetaData()
+
+
+def new_id() -> str:
+    return str(uuid.uuid4())
+
+
+JsonType = JSON().with_variant(JSONB(), "postgresql")
+
+THERAPY_AREAS = ("academic", "emotional", "linguistic", "sensory", "behavioral", "life_skills")
+ANALYSIS_TYPES = (
+    "speech", "behavior", "emotion", "progress_prediction", "risk_detection",
+    "pattern_recognition", "adaptive_learning", "auto_iep"
+)
+
+therapy_area = Enum(*THERAPY_AREAS, name="therapy_area", create_constraint=False)
+analysis_type = Enum(*ANALYSIS_TYPES, name="analysis_type", create_constraint=False)
+
+students = Table(
+    "students", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, default=new_id),
+    Column("full_name", Text, nullable=False),
+    Column("date_of_birth", Date, nullable=False),
+    Column("gender", Text),
+    Column("medical_notes", Text),
+)
+
+student_conditions = Table(
+    "student_conditions", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, default=new_id),
+    Column("student_id", Uuid(as_uuid=False), nullable=False),
+    Column("condition_type", Text, nullable=False),
+    Column("severity", Text),
+    Column("diagnosed_date", Date),
+    Column("notes", Text),
+)
+
+progress_tracking = Table(
+    "progress_tracking", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, default=new_id),
+    Column("student_id", Uuid(as_uuid=False), nullable=False),
+    Column("tracking_date", Date, server_default=func.current_date()),
+    Column("focus_area", therapy_area, nullable=False),
+    Column("metric_name", Text, nullable=False),
+    Column("metric_value", Numeric(asdecimal=False)),
+    Column("notes", Text),
+    Column("recorded_by", Uuid(as_uuid=False)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+ai_analysis_results = Table(
+    "ai_analysis_results", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, default=new_id),
+    Column("student_id", Uuid(as_uuid=False), nullable=False),
+    Column("session_id", Uuid(as_uuid=False)),
+    Column("analysis_type", analysis_type, nullable=False),
+    Column("analysis_date", DateTime(timezone=True), server_default=func.now()),
+    Column("input_data", JsonType),
+    Column("results", JsonType, nullable=False),
+    Column("confidence_score", Numeric(asdecimal=False)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+model_versions = Table(
+    "model_versions", metadata,
+    Column("id", Uuid(as_uuid=False), primary_key=True, default=new_id),
+    Column("training_job_id", Uuid(as_uuid=False)),
+    Column("model_type", Text, nullable=False),
+    Column("version_number", Integer, nullable=False),
+    Column("model_path", Text, nullable=False),
+    Column("is_active", Boolean, default=False),
+    Column("accuracy", Numeric(asdecimal=False)),
+    Column("precision", Numeric(asdecimal=False)),
+    Column("recall", Numeric(asdecimal=False)),
+    Column("f1_score", Numeric(asdecimal=False)),
+    Column("auc_score", Numeric(asdecimal=False)),
+    Column("confusion_matrix", JsonType),
+    Column("feature_importance", JsonType),
+    Column("training_time_seconds", Integer),
+    Column("cross_val_scores", JsonType),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
@@ -0,0 +1,219 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+DIFFICULTY_LEVELS = {"easy": 0, "moderate": 1, "challenging": 2}
+
+DEFAULT_ACTIVITIES = [
+    {
+        "title": "Sound Sorting Game",
+        "focus_area": "linguistic",
+        "duration_minutes": 15,
+        "difficulty": "moderate",
+        "modality": "auditory",
+        "materials": ["Sound cards", "Sorting mat"],
+        "expected_benefit": "Improve phonemic awareness"
+    },
+    {
+        "title": "Emotion Recognition Cards",
+        "focus_area": "emotional",
+        "duration_minutes": 10,
+        "difficulty": "easy",
+        "modality": "visual",
+        "materials": ["Emotion cards", "Mirror"],
+        "expected_benefit": "Enhance emotional understanding"
+    },
+    {
+        "title": "Fine Motor Practice",
+        "focus_area": "life_skills",
+        "duration_minutes": 20,
+        "difficulty": "moderate",
+        "modality": "kinesthetic",
+        "materials": ["Beads", "String", "Tweezers"],
+        "expected_benefit": "Develop hand-eye coordination"
+    }
+]
+
+
+def _normalize_score(value: float) -> float:
+    value = float(value)
+    if value > 10:
+        value /= 100.0
+    elif value > 1:
+        value /= 10.0
+    return min(1.0, max(0.0, value))
+
+
+def _encode(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    vocab, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return vocab.tolist(), codes.astype(np.int32)
+
+
+def _build_index(vocab: List[str], codes: np.ndarray, owners: np.ndarray) -> Dict[str, np.ndarray]:
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(vocab) + 1))
+    sorted_owners = owners[order]
+    return {
+        value: sorted_owners[bounds[i]:bounds[i + 1]]
+        for i, value in enumerate(vocab)
+    }
+
+
+class ActivityCatalog:
+    def __init__(self, activities: List[Dict[str, Any]]):
+        self.activities = activities
+        self.size = len(activities)
+        row_ids = np.arange(self.size, dtype=np.int32)
+
+        self.focus_vocab, self.focus_codes = _encode([a.get("focus_area", "general") for a in activities])
+        self.modality_vocab, self.modality_codes = _encode([a.get("modality", "mixed") for a in activities])
+        self.difficulty_vocab, self.difficulty_codes = _encode([a.get("difficulty", "moderate") for a in activities])
+
+        self.difficulty_levels = np.array(
+            [DIFFICULTY_LEVELS.get(str(a.get("difficulty", "moderate")), 1) for a in activities],
+            dtype=np.float32
+        )
+        self.durations = np.array([a.get("duration_minutes", 15) for a in activities], dtype=np.float32)
+        self.weights = np.array([a.get("weight", 1.0) for a in activities], dtype=np.float32)
+        self.uniform_weights = bool(np.all(self.weights == 1.0))
+        self.combo_codes = self.focus_codes * len(DIFFICULTY_LEVELS) + self.difficulty_levels.astype(np.int32)
+        combo_count = len(self.focus_vocab) * len(DIFFICULTY_LEVELS)
+        self.combo_counts = np.bincount(self.combo_codes, minlength=combo_count)
+
+        materials = [[str(m).strip().lower() for m in a.get("materials", [])] for a in activities]
+        self.material_counts = np.array([len(m) for m in materials], dtype=np.int32)
+        material_owners = np.repeat(row_ids, self.material_counts)
+        self.material_vocab, material_codes = _encode([m for mats in materials for m in mats] or [""])
+        if not len(material_owners):
+            material_codes = material_codes[:0]
+
+        self.focus_index = _build_index(self.focus_vocab, self.focus_codes, row_ids)
+        self.modality_index = _build_index(self.modality_vocab, self.modality_codes, row_ids)
+        self.difficulty_index = _build_index(self.difficulty_vocab, self.difficulty_codes, row_ids)
+        self.materials_index = _build_index(self.material_vocab, material_codes, material_owners)
+        self.combo_index = list(_build_index(list(range(combo_count)), self.combo_codes, row_ids).values())
+        self._focus_lookup = {value: i for i, value in enumerate(self.focus_vocab)}
+
+    @classmethod
+    def load(cls, path: str) -> "ActivityCatalog":
+        if path.endswith(".csv"):
+            df = pd.read_csv(path)
+            df.columns = df.columns.str.strip()
+            if "materials" in df.columns:
+                df["materials"] = df["materials"].fillna("").astype(str).map(
+                    lambda value: [m.strip() for m in value.split(";") if m.strip()]
+                )
+            activities = df.to_dict("records")
+        else:
+            with open(path, "r") as f:
+                data = json.load(f)
+            activities = data["activities"] if isinstance(data, dict) else data
+        return cls(activities)
+
+    @classmethod
+    def load_or_default(cls, path: str) -> "ActivityCatalog":
+        if os.path.exists(path):
+            try:
+                catalog = cls.load(path)
+                print(f"Activity catalog loaded: {catalog.size} activities")
+                return catalog
+            except Exception as e:
+                print(f"Error loading activity catalog: {e}. Using default activities.")
+        return cls(DEFAULT_ACTIVITIES)
+
+    def candidate_mask(self, difficulty: Optional[str] = None, modality: Optional[str] = None,
+                       available_materials: Optional[List[str]] = None) -> Optional[np.ndarray]:
+        mask = None
+        for index, value in ((self.difficulty_index, difficulty), (self.modality_index, modality)):
+            if value is None:
+                continue
+            selected = np.zeros(self.size, dtype=bool)
+            selected[index.get(value, np.empty(0, dtype=np.int32))] = True
+            mask = selected if mask is None else mask & selected
+
+        if available_materials is not None:
+            postings = [
+                self.materials_index[m]
+                for m in {str(m).strip().lower() for m in available_materials}
+                if m in self.materials_index
+            ]
+            counts = np.bincount(np.concatenate(postings), minlength=self.size) if postings \
+                else np.zeros(self.size, dtype=np.int64)
+            selected = counts == self.material_counts
+            mask = selected if mask is None else mask & selected
+
+        return mask
+
+    def performance_vector(self, current_performance: Dict[str, Any]) -> Tuple[np.ndarray, float]:
+        need = np.full(len(self.focus_vocab), 0.5, dtype=np.float32)
+        scores = []
+        for area, value in current_performance.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            score = _normalize_score(value)
+            scores.append(score)
+            code = self._focus_lookup.get(area)
+            if code is not None:
+                need[code] = 1.0 - score
+        level = float(np.mean(scores)) if scores else 0.5
+        return need, level
+
+    def score_table(self, current_performance: Dict[str, Any], focus_areas: List[str]) -> np.ndarray:
+        need, level = self.performance_vector(current_performance)
+        boost = np.zeros(len(self.focus_vocab), dtype=np.float32)
+        for area in focus_areas:
+            code = self._focus_lookup.get(area)
+            if code is not None:
+                boost[code] = 1.0
+
+        fit = 1.0 - np.abs(np.arange(len(DIFFICULTY_LEVELS), dtype=np.float32) - level * 2.0) / 2.0
+        return (need[:, None] + 0.75 * boost[:, None] + 0.5 * fit[None, :]).ravel()
+
+    def _prune(self, table: np.ndarray, mask: Optional[np.ndarray], top_k: int) -> np.ndarray:
+        if not self.uniform_weights:
+            return np.arange(self.size) if mask is None else np.flatnonzero(mask)
+
+        # Every activity in a focus/difficulty group shares one score, so only the
+        # best-scoring groups that together hold top_k candidates need ranking.
+        order = np.argsort(-table, kind="stable")
+        counts = self.combo_counts if mask is None else np.bincount(self.combo_codes[mask], minlength=len(table))
+        needed = int(np.searchsorted(np.cumsum(counts[order]), top_k)) + 1
+        ids = np.concatenate([self.combo_index[c] for c in order[:needed]])
+        return ids if mask is None else ids[mask[ids]]
+
+    def score(self, current_performance: Dict[str, Any], focus_areas: List[str],
+              ids: Optional[np.ndarray] = None) -> np.ndarray:
+        table = self.score_table(current_performance, focus_areas)
+        scores = table[self.combo_codes if ids is None else self.combo_codes[ids]]
+        if not self.uniform_weights:
+            scores *= self.weights if ids is None else self.weights[ids]
+        return scores
+
+    def recommend(self, current_performance: Dict[str, Any], focus_areas: List[str], top_k: int = 3,
+                  difficulty: Optional[str] = None, modality: Optional[str] = None,
+                  available_materials: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if top_k <= 0 or not self.size:
+            return []
+
+        mask = self.candidate_mask(difficulty, modality, available_materials)
+        table = self.score_table(current_performance, focus_areas)
+        ids = self._prune(table, mask, top_k)
+        if not len(ids):
+            return []
+
+        scores = table[self.combo_codes[ids]]
+        if not self.uniform_weights:
+            scores *= self.weights[ids]
+
+        if top_k < len(ids):
+            top = np.argpartition(scores, len(ids) - top_k)[-top_k:]
+        else:
+            top = np.arange(len(ids))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            {**self.activities[int(ids[i])], "match_score": round(float(scores[i]), 3)}
+            for i in top
+        ]
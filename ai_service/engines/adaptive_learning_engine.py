@@ -1,52 +1,180 @@
+import fcntl
 import numpy as np
-from typing import Dict, Any, List
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from engines.contextual_bandit import BanditDelta, ThompsonBandit
+from core.metrics import timed_engine_call, MODEL_LOAD_SECONDS
+
+ACTIVITIES = [
+    {"activity": "Letter Recognition Game", "duration_minutes": 15, "modality": "visual"},
+    {"activity": "Sound Matching Exercise", "duration_minutes": 10, "modality": "auditory"},
+    {"activity": "Story Sequencing", "duration_minutes": 20, "modality": "visual_auditory"},
+    {"activity": "Pattern Recognition", "duration_minutes": 15, "modality": "visual"},
+    {"activity": "Memory Matching", "duration_minutes": 10, "modality": "visual"},
+    {"activity": "Movement Counting", "duration_minutes": 10, "modality": "kinesthetic"},
+    {"activity": "Rhythm Clapping", "duration_minutes": 10, "modality": "auditory"}
+]
+
+DIFFICULTIES = ["easy", "moderate", "challenging"]
+
+LEARNING_STYLES = {
+    "visual": "visual",
+    "auditory": "auditory",
+    "kinesthetic": "kinesthetic",
+    "visual_auditory": "mixed"
+}
 
 class AdaptiveLearningEngine:
     def __init__(self):
         self.model_loaded = False
+        self.bandit_path = os.getenv('ADAPTIVE_BANDIT_PATH',
+                                     os.path.join(os.getenv('MODELS_DIR', './models'), 'adaptive_bandit.npz'))
+        self.activity_lookup = {a["activity"]: i for i, a in enumerate(ACTIVITIES)}
+        self.difficulty_lookup = {d: i for i, d in enumerate(DIFFICULTIES)}
+        self.arm_modalities = np.repeat([a["modality"] for a in ACTIVITIES], len(DIFFICULTIES))
+        # Counts recorded since the last save, added to the saved bandit.
+        self._unsaved = BanditDelta(len(ACTIVITIES) * len(DIFFICULTIES))
+        self._lock = threading.Lock()
+        start = time.perf_counter()
+        self.bandit = self._load_bandit()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start, "adaptive_bandit", "npz" if self.model_loaded else "fresh")
 
-    def adjust_content(self, student_id: str, current_activity: Dict, performance_data: List[Dict]) -> Dict[str, Any]:
-        adjustments = ["increase_difficulty", "decrease_difficulty", "maintain_level"]
-        difficulty_adjustment = np.random.choice(adjustments, p=[0.4, 0.2, 0.4])
+    def _read_saved(self) -> Optional[ThompsonBandit]:
+        if os.path.exists(self.bandit_path):
+            try:
+                bandit = ThompsonBandit.load(self.bandit_path)
+                if bandit.n_arms == len(ACTIVITIES) * len(DIFFICULTIES):
+                    return bandit
+                print("Adaptive learning bandit arms changed. Starting fresh.")
+            except Exception as e:
+                print(f"Error loading adaptive learning bandit: {e}. Starting fresh.")
+        return None
 
-        recommended_content = [
-            {
-                "activity": "Letter Recognition Game",
-                "difficulty": "moderate",
-                "duration_minutes": 15,
-                "modality": "visual"
-            },
-            {
-                "activity": "Sound Matching Exercise",
-                "difficulty": "moderate",
-                "duration_minutes": 10,
-                "modality": "auditory"
-            },
+    def _load_bandit(self) -> ThompsonBandit:
+        bandit = self._read_saved()
+        if bandit is not None:
+            self.model_loaded = True
+            print(f"Adaptive learning bandit loaded: {bandit.n_students} students")
+            return bandit
+        return ThompsonBandit(len(ACTIVITIES) * len(DIFFICULTIES))
+
+    def save(self):
+        # Prefork workers each learn from the results posted to them. Under an
+        # exclusive file lock, this worker's counts since its last save are
+        # added to the bandit on disk and the merged bandit is adopted, so no
+        # worker overwrites what another one saved. Blocks on other workers'
+        # saves: call it from the threadpool.
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, BanditDelta(self._unsaved.n_arms)
+        try:
+            os.makedirs(os.path.dirname(self.bandit_path) or ".", exist_ok=True)
+            with open(f"{self.bandit_path}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                merged = self._read_saved()
+                if merged is None:
+                    merged = ThompsonBandit(unsaved.n_arms)
+                merged.merge(unsaved)
+                merged.save(self.bandit_path)
+        except Exception:
+            with self._lock:
+                unsaved.merge(self._unsaved)
+                self._unsaved = unsaved
+            raise
+        with self._lock:
+            # Results recorded while saving went to the old bandit; carry them over.
+            merged.merge(self._unsaved)
+            self.bandit = merged
+
+    def arm_id(self, activity: str, difficulty: str) -> int:
+        return self.activity_lookup[activity] * len(DIFFICULTIES) + self.difficulty_lookup[difficulty]
+
+    def describe_arm(self, arm: int) -> Dict[str, Any]:
+        activity, difficulty = divmod(int(arm), len(DIFFICULTIES))
+        return {**ACTIVITIES[activity], "difficulty": DIFFICULTIES[difficulty]}
+
+    @timed_engine_call
+    def record_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        student_ids, arms, rewards, skipped = [], [], [], 0
+        for result in results:
+            try:
+                arms.append(self.arm_id(result["activity"], result.get("difficulty", "moderate")))
+            except KeyError:
+                skipped += 1
+                continue
+            student_ids.append(str(result["student_id"]))
+            rewards.append(float(result.get("score", 0.0)))
+
+        updated = 0
+        if arms:
+            with self._lock:
+                updated = self.bandit.update(student_ids, arms, rewards)
+                self._unsaved.update(student_ids, arms, rewards)
+        return {
+            "updated": updated,
+            "skipped": skipped,
+            "students_tracked": self.bandit.n_students
+        }
+
+    @timed_engine_call
+    def select_batch(self, student_ids: List[str], top_n: int = 1) -> List[Dict[str, Any]]:
+        if not student_ids:
+            return []
+        arms = self.bandit.select(student_ids, top_n=top_n)
+        means = self.bandit.posterior_mean(student_ids)
+        return [
             {
-                "activity": "Story Sequencing",
-                "difficulty": "challenging",
-                "duration_minutes": 20,
-                "modality": "visual_auditory"
+                "student_id": sid,
+                "activities": [
+                    {**self.describe_arm(arm), "expected_success_rate": round(float(means[i, arm]), 3)}
+                    for arm in arms[i]
+                ]
             }
+            for i, sid in enumerate(student_ids)
         ]
 
-        learning_styles = ["visual", "auditory", "kinesthetic", "mixed"]
-        learning_style = np.random.choice(learning_styles)
+    @timed_engine_call
+    def adjust_content(self, student_id: str, current_activity: Dict, performance_data: List[Dict]) -> Dict[str, Any]:
+        means = self.bandit.posterior_mean([student_id])[0]
+        draws = self.bandit.sample([student_id])[0]
+        observations = int(self.bandit.observations([student_id])[0])
+
+        chosen = self.describe_arm(np.argmax(draws))
+        current_level = self.difficulty_lookup.get(current_activity.get("difficulty"), 1)
+        chosen_level = self.difficulty_lookup[chosen["difficulty"]]
+        if chosen_level > current_level:
+            difficulty_adjustment = "increase_difficulty"
+        elif chosen_level < current_level:
+            difficulty_adjustment = "decrease_difficulty"
+        else:
+            difficulty_adjustment = "maintain_level"
+
+        recommended_content = [self.describe_arm(arm) for arm in np.argsort(-draws)[:3]]
 
-        paces = ["slow", "moderate", "fast"]
-        optimal_pace = np.random.choice(paces, p=[0.3, 0.5, 0.2])
+        modality_means = {
+            modality: float(means[self.arm_modalities == modality].mean())
+            for modality in LEARNING_STYLES
+            if np.any(self.arm_modalities == modality)
+        }
+        learning_style = LEARNING_STYLES[max(modality_means, key=modality_means.get)] if observations else "mixed"
+
+        overall_success = float(means.mean())
+        if overall_success >= 0.75:
+            optimal_pace = "fast"
+        elif overall_success < 0.45:
+            optimal_pace = "slow"
+        else:
+            optimal_pace = "moderate"
 
         next_activities = [
             {
-                "title": "Pattern Recognition",
-                "estimated_success_rate": 0.78,
-                "engagement_prediction": 0.85
-            },
-            {
-                "title": "Memory Matching",
-                "estimated_success_rate": 0.82,
-                "engagement_prediction": 0.88
+                "title": ACTIVITIES[int(arm) // len(DIFFICULTIES)]["activity"],
+                "difficulty": DIFFICULTIES[int(arm) % len(DIFFICULTIES)],
+                "estimated_success_rate": round(float(means[arm]), 2),
+                "engagement_prediction": round(float(draws[arm]), 2)
             }
+            for arm in np.argsort(-means)[:2]
         ]
 
         return {
@@ -56,9 +184,10 @@ class AdaptiveLearningEngine:
             "learning_style": learning_style,
             "optimal_pace": optimal_pace,
             "next_activities": next_activities,
-            "confidence": 0.81
+            "confidence": round(1.0 - 0.5 / np.sqrt(1.0 + observations), 2)
         }
 
+    @timed_engine_call
     def personalize(self, student_id: str, learning_profile: Dict) -> Dict[str, Any]:
         return {
             "curriculum": [
@@ -1,40 +1,200 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import os
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+import time
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import pickle
 import warnings
+from core.metrics import timed_engine_call, MODEL_LOAD_SECONDS
+from engines.bulk_scoring import BulkScorer
+from training.attributions import TreeAttributions
+from training.boosting import EarlyStoppingBooster
+from training.costs import measure_costs
+from training.estimators import build_model
+from training.lookup import ProbabilityGrid
+from training.preprocessing import FeaturePipeline
 warnings.filterwarnings('ignore')
 
+POSITIVE_LABELS = {"1", "yes", "true", "asd"}
+# Below this confidence a prediction is reported as moderate risk.
+MODERATE_CONFIDENCE = 0.7
+
+SCREENING_CSV = './datas/Autism_screening/Autism_Screening_Data_Combined.csv'
+SCREENING_FEATURES = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9', 'A10',
+                      'Age_Mons', 'Sex', 'Jaundice', 'Family_mem_with_ASD']
+CATEGORICAL_FEATURES = ['Sex', 'Jaundice', 'Family_mem_with_ASD']
+TARGET_COLUMNS = ['Class/ASD Traits', 'Class/ASD', 'Class']
+# The bundled dataset names these columns and values differently from what
+# analyze_behavioral_features sends.
+COLUMN_ALIASES = {'Age': 'Age_Mons', 'Jauundice': 'Jaundice', 'Family_ASD': 'Family_mem_with_ASD'}
+VALUE_ALIASES = {'Sex': {'male': 'm', 'female': 'f'}}
+# Any name in training.estimators.MODEL_BACKENDS; gradient_boosting keeps
+# the early-stopped booster.
+SCREENING_MODEL_BACKEND = os.getenv('SCREENING_MODEL_BACKEND', 'gradient_boosting')
+# Same setting as engines.model_manager, which imports this module.
+MODELS_DIR = os.getenv('MODELS_DIR', './models')
+# Serve predict_proba from a table over every possible screening; records
+# outside it (older children, fractional ages) still go to the model. Off by
+# default: building it adds about 1.3 s and 4 MB to every model load and
+# reload, which only pays off under sustained single-row traffic.
+SCREENING_LOOKUP_TABLE = os.getenv('SCREENING_LOOKUP_TABLE', '0') == '1'
+SCREENING_LOOKUP_MAX_AGE_MONTHS = int(os.getenv('SCREENING_LOOKUP_MAX_AGE_MONTHS', '240'))
+ANSWER_FEATURES = [f'A{i}' for i in range(1, 11)]
+
+
+def screening_domains(pipeline: FeaturePipeline) -> Dict[int, Tuple[int, int]]:
+    # The finite input space of a screening, per encoded column: binary answers,
+    # age in whole months and category codes including the unknown one.
+    domains = {}
+    for j, col in enumerate(pipeline.feature_columns):
+        if col in pipeline.categories:
+            domains[j] = (0, pipeline.unknown_code(col))
+        elif col in ANSWER_FEATURES:
+            domains[j] = (0, 1)
+        elif col == 'Age_Mons':
+            domains[j] = (0, SCREENING_LOOKUP_MAX_AGE_MONTHS)
+        else:
+            raise ValueError(f"No finite domain for feature {col}")
+    return domains
+
+
+def screening_pipeline(feature_columns: List[str]) -> FeaturePipeline:
+    return FeaturePipeline(feature_columns, [c for c in CATEGORICAL_FEATURES if c in feature_columns],
+                           COLUMN_ALIASES, VALUE_ALIASES)
+
+
+class ScreeningModel:
+    # Everything a prediction needs, swapped as one reference so a request never
+    # mixes the estimator of one version with the preprocessing of another.
+    def __init__(self, model, pipeline: FeaturePipeline, source: str,
+                 path: str = None, version: Dict[str, Any] = None):
+        self.model = model
+        self.pipeline = pipeline
+        self.feature_columns = pipeline.feature_columns
+        self.source = source
+        self.path = path
+        self.version = version or {}
+        self.loaded_at = time.time()
+        self.mtime_ns = os.stat(path).st_mtime_ns if path and os.path.exists(path) else None
+        self.labels = [pipeline.label(c) for c in model.classes_]
+        self.positive_index = next(
+            (i for i, label in enumerate(self.labels) if str(label).strip().lower() in POSITIVE_LABELS),
+            len(self.labels) - 1
+        )
+        self.attributions = None
+        self.lookup = None
+
+    def prepare(self) -> "ScreeningModel":
+        # Everything derived from the fitted model, built once per loaded model
+        # (off the event loop on hot reload) rather than per request.
+        # Per-prediction attributions for boosted trees; other backends only
+        # have global importances.
+        try:
+            self.attributions = TreeAttributions(self.model)
+        except ValueError as e:
+            print(f"Attributions unavailable: {e}")
+        if SCREENING_LOOKUP_TABLE:
+            try:
+                self.lookup = ProbabilityGrid(self.model, screening_domains(self.pipeline))
+                print(f"Screening lookup table: {self.lookup.describe()}")
+            except ValueError as e:
+                print(f"Lookup table unavailable: {e}")
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return (self.lookup or self.model).predict_proba(X)
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        # Log-odds contributions toward the positive label, one row per record.
+        values = self.attributions.shap_values(X)
+        if values.shape[2] == 1:
+            return values[:, :, 0] if self.positive_index == 1 else -values[:, :, 0]
+        return values[:, :, self.positive_index]
+
+    def baseline_log_odds(self) -> float:
+        expected = self.attributions.expected_value
+        if len(expected) == 1:
+            return float(expected[0] if self.positive_index == 1 else -expected[0])
+        return float(expected[self.positive_index])
+
+    def validate(self):
+        probabilities = self.model.predict_proba(self.pipeline.transform_record({}))
+        if probabilities.shape != (1, len(self.model.classes_)):
+            raise ValueError(f"Unexpected predict_proba output shape {probabilities.shape}")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "path": self.path,
+            "version_id": self.version.get("id"),
+            "version_number": self.version.get("version_number"),
+            "model_class": type(self.model).__name__,
+            "features": len(self.feature_columns),
+            "categorical_features": sorted(self.pipeline.categories),
+            "attributions": self.attributions is not None,
+            "lookup_table": self.lookup.describe() if self.lookup is not None else None,
+            "loaded_at": self.loaded_at
+        }
+
+    @classmethod
+    def load(cls, path: str, encoders_path: str = None, version: Dict[str, Any] = None,
+             prepare: bool = True) -> "ScreeningModel":
+        with open(path, 'rb') as f:
+            obj = pickle.load(f)
+        pipeline = None
+        if isinstance(obj, dict) and 'model' in obj:
+            model, pipeline = obj['model'], obj.get('pipeline')
+            encoders, features = obj.get('encoders', {}), obj.get('features')
+        else:
+            model, encoders, features = obj, {}, None
+        if pipeline is None:
+            if encoders_path and os.path.exists(encoders_path):
+                with open(encoders_path, 'rb') as f:
+                    data = pickle.load(f)
+                encoders, features = data['encoders'], data['features']
+            if features is None:
+                features = list(getattr(model, 'feature_names_in_', []))
+            if not features:
+                raise ValueError(f"Cannot determine the feature columns of {path}")
+            pipeline = FeaturePipeline.from_label_encoders(features, encoders)
+
+        bundle = cls(model, pipeline, "hot_reload" if version is not None else "pickle", path, version)
+        bundle.validate()
+        return bundle.prepare() if prepare else bundle
+
+
 class AutismScreeningEngine:
     def __init__(self):
         self.model = None
-        self.label_encoders = {}
+        self.pipeline = None
         self.feature_columns = []
         self.model_trained = False
-        self.model_path = './models/autism_screening_model.pkl'
-        self.encoders_path = './models/autism_encoders.pkl'
+        self.model_path = os.path.join(MODELS_DIR, 'autism_screening_model.pkl')
+        # Only read, for models saved before the pipeline was pickled with them.
+        self.encoders_path = os.path.join(MODELS_DIR, 'autism_encoders.pkl')
+        self.model_source = None
 
         self._ensure_model_directory()
+        start = time.perf_counter()
         self._load_or_train_model()
+        self.active = ScreeningModel(self.model, self.pipeline, self.model_source or "none",
+                                     os.path.realpath(self.model_path) if self.model_source in ("pickle", "trained") else None
+                                     ).prepare()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start, "autism_screening", self.model_source or "none")
 
     def _ensure_model_directory(self):
-        os.makedirs('./models', exist_ok=True)
+        os.makedirs(MODELS_DIR, exist_ok=True)
 
     def _load_or_train_model(self):
-        if os.path.exists(self.model_path) and os.path.exists(self.encoders_path):
+        if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                with open(self.encoders_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.label_encoders = data['encoders']
-                    self.feature_columns = data['features']
+                bundle = ScreeningModel.load(self.model_path, self.encoders_path, prepare=False)
+                self.model, self.pipeline, self.feature_columns = bundle.model, bundle.pipeline, bundle.feature_columns
                 self.model_trained = True
+                self.model_source = "pickle"
                 print("Autism screening model loaded successfully")
             except Exception as e:
                 print(f"Error loading model: {e}. Will train new model.")
@@ -44,34 +204,25 @@ class AutismScreeningEngine:
 
     def _train_model(self):
         try:
-            csv_path = './datas/Autism_screening/Autism_Screening_Data_Combined.csv'
-            if not os.path.exists(csv_path):
-                print(f"Warning: CSV file not found at {csv_path}")
+            if not os.path.exists(SCREENING_CSV):
+                print(f"Warning: CSV file not found at {SCREENING_CSV}")
                 self._create_default_model()
                 return
 
-            df = pd.read_csv(csv_path)
+            df = pd.read_csv(SCREENING_CSV)
 
             df.columns = df.columns.str.strip()
+            df = df.rename(columns=COLUMN_ALIASES)
 
-            target_columns = ['Class/ASD Traits ', 'Class/ASD']
-            target_col = None
-            for col in target_columns:
-                if col in df.columns:
-                    target_col = col
-                    break
-
+            target_col = next((col for col in TARGET_COLUMNS if col in df.columns), None)
             if target_col is None:
                 print("Target column not found. Creating default model.")
                 self._create_default_model()
                 return
 
-            df = df.dropna()
-
-            self.feature_columns = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9', 'A10',
-                                   'Age_Mons', 'Sex', 'Jaundice', 'Family_mem_with_ASD']
+            df = df.dropna(subset=[target_col])
 
-            available_features = [col for col in self.feature_columns if col in df.columns]
+            available_features = [col for col in SCREENING_FEATURES if col in df.columns]
 
             if len(available_features) < 10:
                 print("Not enough features found. Creating default model.")
@@ -79,36 +230,26 @@ class AutismScreeningEngine:
                 return
 
             self.feature_columns = available_features
+            y = df[target_col].astype(str).str.strip()
 
-            X = df[self.feature_columns].copy()
-            y = df[target_col].copy()
-
-            y = y.astype(str).str.strip()
-            y = y.replace({'YES': 'Yes', 'NO': 'No', 'yes': 'Yes', 'no': 'No'})
-
-            for col in X.columns:
-                if X[col].dtype == 'object':
-                    le = LabelEncoder()
-                    X[col] = X[col].astype(str).str.strip()
-                    X[col] = le.fit_transform(X[col])
-                    self.label_encoders[col] = le
-
-            y_encoder = LabelEncoder()
-            y_encoded = y_encoder.fit_transform(y)
-            self.label_encoders['target'] = y_encoder
-
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+            train_df, test_df, y_train, y_test = train_test_split(
+                df, y, test_size=0.2, random_state=42, stratify=y
             )
 
-            self.model = GradientBoostingClassifier(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=5,
-                random_state=42
-            )
+            self.pipeline = screening_pipeline(self.feature_columns).fit(train_df)
 
-            self.model.fit(X_train, y_train)
+            X_train, X_test = self.pipeline.transform(train_df), self.pipeline.transform(test_df)
+            fit_start = time.perf_counter()
+            if SCREENING_MODEL_BACKEND == 'gradient_boosting':
+                # 100 trees is now the ceiling; fitting stops once validation loss plateaus.
+                booster = EarlyStoppingBooster({'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5})
+                self.model = booster.fit(X_train, y_train)
+                print(f"Boosting stopped at {self.model.n_estimators_} of 100 trees")
+            else:
+                self.model = build_model(SCREENING_MODEL_BACKEND, {}).fit(X_train, y_train)
+            costs = measure_costs(SCREENING_MODEL_BACKEND, self.model, time.perf_counter() - fit_start, X_test, y_test,
+                                  repeats=20)
+            print(f"Model costs: {costs}")
 
             y_pred = self.model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
@@ -123,15 +264,14 @@ class AutismScreeningEngine:
             print(f"F1-Score: {f1:.3f}")
 
             with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
-
-            with open(self.encoders_path, 'wb') as f:
                 pickle.dump({
-                    'encoders': self.label_encoders,
+                    'model': self.model,
+                    'pipeline': self.pipeline,
                     'features': self.feature_columns
                 }, f)
 
             self.model_trained = True
+            self.model_source = "trained"
 
         except Exception as e:
             print(f"Error training model: {e}")
@@ -140,66 +280,94 @@ class AutismScreeningEngine:
     def _create_default_model(self):
         self.model = GradientBoostingClassifier(n_estimators=50, random_state=42)
         self.feature_columns = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9', 'A10']
-        X_dummy = np.random.randint(0, 2, size=(100, len(self.feature_columns)))
+        X_dummy = pd.DataFrame(np.random.randint(0, 2, size=(100, len(self.feature_columns))), columns=self.feature_columns)
         y_dummy = np.random.randint(0, 2, size=100)
-        self.model.fit(X_dummy, y_dummy)
+        self.pipeline = screening_pipeline(self.feature_columns).fit(X_dummy)
+        self.model.fit(self.pipeline.transform(X_dummy), y_dummy)
         self.model_trained = True
+        self.model_source = "default"
         print("Default model created")
 
-    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+    def swap_model(self, bundle: ScreeningModel) -> ScreeningModel:
+        previous, self.active = self.active, bundle
+        self.model, self.pipeline, self.feature_columns = bundle.model, bundle.pipeline, bundle.feature_columns
+        self.model_source = bundle.source
+        return previous
+
+    @timed_engine_call
+    def predict(self, features: Dict[str, Any], explain: bool = True) -> Dict[str, Any]:
+        return self._predict(self.active, features, explain)
+
+    @timed_engine_call
+    def predict_batch(self, records: List[Dict[str, Any]], explain: bool = True) -> List[Dict[str, Any]]:
+        return self._predict_batch(self.active, records, explain)
+
+    def _predict(self, active: ScreeningModel, features: Dict[str, Any], explain: bool = True) -> Dict[str, Any]:
+        return self._predict_batch(active, [features], explain)[0]
+
+    def _predict_batch(self, active: ScreeningModel, records: List[Dict[str, Any]],
+                       explain: bool = True) -> List[Dict[str, Any]]:
         if not self.model_trained:
-            return {
+            return [{
                 "error": "Model not trained",
                 "asd_risk": "unknown",
                 "confidence": 0.0
-            }
+            } for _ in records]
 
         try:
-            feature_vector = []
-            for col in self.feature_columns:
-                value = features.get(col, 0)
-
-                if col in self.label_encoders and col != 'target':
-                    try:
-                        value = self.label_encoders[col].transform([str(value)])[0]
-                    except:
-                        value = 0
-
-                feature_vector.append(value)
-
-            X = np.array([feature_vector])
+            X = active.pipeline.transform_records(records)
+            probabilities = active.predict_proba(X)
+            contributions = active.contributions(X) if explain and active.attributions is not None else None
+        except Exception as e:
+            print(f"Prediction error: {e}")
+            return [{
+                "error": str(e),
+                "asd_risk": "unknown",
+                "confidence": 0.0
+            } for _ in records]
 
-            prediction = self.model.predict(X)[0]
-            probabilities = self.model.predict_proba(X)[0]
+        results = []
+        for r, row in enumerate(probabilities):
+            prediction_label = active.labels[int(np.argmax(row))]
+            traits_detected = str(prediction_label).strip().lower() in POSITIVE_LABELS
 
-            if 'target' in self.label_encoders:
-                prediction_label = self.label_encoders['target'].inverse_transform([prediction])[0]
-            else:
-                prediction_label = "Yes" if prediction == 1 else "No"
+            confidence = float(max(row))
 
-            confidence = float(max(probabilities))
-
-            risk_level = "high" if prediction_label == "Yes" else "low"
-            if confidence < 0.7:
+            risk_level = "high" if traits_detected else "low"
+            if confidence < MODERATE_CONFIDENCE:
                 risk_level = "moderate"
 
-            return {
+            result = {
                 "analysis_type": "autism_screening",
                 "asd_risk": risk_level,
-                "asd_traits_detected": prediction_label == "Yes",
+                "asd_traits_detected": traits_detected,
                 "confidence": round(confidence, 3),
-                "probability_asd": round(float(probabilities[1] if len(probabilities) > 1 else probabilities[0]), 3),
-                "features_analyzed": len(feature_vector),
+                "probability_asd": round(float(row[active.positive_index]), 3),
+                "features_analyzed": len(active.feature_columns),
                 "recommendation": self._get_recommendation(risk_level, confidence)
             }
-
-        except Exception as e:
-            print(f"Prediction error: {e}")
-            return {
-                "error": str(e),
-                "asd_risk": "unknown",
-                "confidence": 0.0
-            }
+            if contributions is not None:
+                # Sums with baseline_log_odds to this record's log-odds of ASD traits.
+                record = {active.pipeline.aliases.get(key, key): value for key, value in records[r].items()}
+                result["baseline_log_odds"] = round(active.baseline_log_odds(), 4)
+                result["feature_contributions"] = sorted((
+                    {"feature": col, "contribution": round(float(value), 4), "value": record.get(col)}
+                    for col, value in zip(active.feature_columns, contributions[r])
+                ), key=lambda c: abs(c["contribution"]), reverse=True)
+            results.append(result)
+        return results
+
+    def score_file(self, path: str, output_path: str, output_format: str = "csv",
+                   keep_columns: Optional[List[str]] = None, workers: Optional[int] = None,
+                   on_progress=None) -> Dict[str, Any]:
+        # Bulk scoring with the model active when the job starts, even if a
+        # reload swaps it midway.
+        active = self.active
+        settings = {"workers": workers} if workers else {}
+        scorer = BulkScorer(active.model, active.pipeline, active.labels, active.positive_index,
+                            moderate_confidence=MODERATE_CONFIDENCE, **settings)
+        return {**scorer.run(path, output_path, output_format, keep_columns, on_progress),
+                "model": active.describe()}
 
     def _get_recommendation(self, risk_level: str, confidence: float) -> str:
         if risk_level == "high":
@@ -209,7 +377,17 @@ class AutismScreeningEngine:
         else:
             return "Low risk indicated. Continue regular developmental monitoring."
 
+    @timed_engine_call
     def analyze_behavioral_features(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._analyze(self.active, [student_data])[0]
+
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # requests are analyze_behavioral_features() keyword arguments; the
+        # batch shares one predict_proba and one attribution pass.
+        return self._analyze(self.active, [request["student_data"] for request in requests])
+
+    def _screening_features(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
         features = {}
 
         for i in range(1, 11):
@@ -220,25 +398,40 @@ class AutismScreeningEngine:
         features['Sex'] = student_data.get('sex', 'Male')
         features['Jaundice'] = student_data.get('jaundice', 'no')
         features['Family_mem_with_ASD'] = student_data.get('family_asd', 'no')
+        return features
 
-        prediction = self.predict(features)
+    def _analyze(self, active: ScreeningModel, students: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        records = [self._screening_features(student_data) for student_data in students]
+        predictions = self._predict_batch(active, records)
+        return [self._screening_result(active, features, prediction)
+                for features, prediction in zip(records, predictions)]
 
+    def _screening_result(self, active: ScreeningModel, features: Dict[str, Any],
+                          prediction: Dict[str, Any]) -> Dict[str, Any]:
         feature_importance = []
-        if self.model_trained and hasattr(self.model, 'feature_importances_'):
-            importances = self.model.feature_importances_
-            for i, col in enumerate(self.feature_columns[:10]):
-                if i < len(importances):
-                    feature_importance.append({
-                        "feature": col,
-                        "importance": round(float(importances[i]), 3),
-                        "value": features.get(col, 0)
-                    })
-
-        feature_importance.sort(key=lambda x: x['importance'], reverse=True)
+        if "feature_contributions" in prediction:
+            # What moved this child's result, not what the model uses overall.
+            attribution_method = "tree_shap"
+            feature_importance = [
+                {**c, "importance": round(abs(c["contribution"]), 3)} for c in prediction["feature_contributions"]
+            ]
+        else:
+            attribution_method = "global_importance"
+            if self.model_trained and hasattr(active.model, 'feature_importances_'):
+                importances = active.model.feature_importances_
+                for i, col in enumerate(active.feature_columns):
+                    if i < len(importances):
+                        feature_importance.append({
+                            "feature": col,
+                            "importance": round(float(importances[i]), 3),
+                            "value": features.get(col, 0)
+                        })
+            feature_importance.sort(key=lambda x: x['importance'], reverse=True)
 
         return {
             **prediction,
             "feature_importance": feature_importance[:5],
+            "attribution_method": attribution_method,
             "behavioral_score": sum([features.get(f'A{i}', 0) for i in range(1, 11)]),
             "age_appropriate_analysis": self._age_analysis(features.get('Age_Mons', 24))
         }
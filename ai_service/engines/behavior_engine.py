@@ -1,22 +1,33 @@
 import numpy as np
 from typing import Dict, Any, List
+from core.metrics import timed_engine_call
 
 class BehaviorRecognitionEngine:
     def __init__(self):
         self.model_loaded = False
 
+    @timed_engine_call
     def analyze(self, video_data: str, student_id: str) -> Dict[str, Any]:
+        return self._results(1)[0]
+
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._results(len(requests))
+
+    def _results(self, n: int) -> List[Dict[str, Any]]:
+        spans = np.random.uniform(30, 120, size=n)
+        levels = np.random.choice(["low", "moderate", "high"], size=n)
+        social = np.random.uniform(0.5, 0.95, size=n)
+        return [self._result(*values) for values in zip(spans, levels, social)]
+
+    def _result(self, attention_span_seconds: float, activity_level: str,
+                social_interaction_score: float) -> Dict[str, Any]:
         detected_behaviors = [
             {"behavior": "focused_attention", "duration": 45.5, "confidence": 0.89},
             {"behavior": "hand_stimming", "duration": 12.3, "confidence": 0.76},
             {"behavior": "social_engagement", "duration": 23.1, "confidence": 0.82}
         ]
 
-        attention_span_seconds = np.random.uniform(30, 120)
-        activity_levels = ["low", "moderate", "high"]
-        activity_level = np.random.choice(activity_levels)
-        social_interaction_score = np.random.uniform(0.5, 0.95)
-
         patterns = [
             "Shows increased focus during visual activities",
             "Requires movement breaks every 20 minutes",
@@ -40,6 +51,7 @@ class BehaviorRecognitionEngine:
             "confidence": 0.83
         }
 
+    @timed_engine_call
     def track_attention(self, video_data: str) -> Dict[str, Any]:
         spans = [45.2, 38.7, 52.1, 41.3, 47.9]
         average = np.mean(spans)
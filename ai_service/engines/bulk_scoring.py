@@ -0,0 +1,224 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from core.csv_ranges import ByteRange, shard_ranges
+from training.jobs import TrainingJobs
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BULK_SCORING_WORKERS = int(os.getenv("BULK_SCORING_WORKERS", str(os.cpu_count() or 1)))
+BULK_SCORING_SHARD_MB = float(os.getenv("BULK_SCORING_SHARD_MB", "16"))
+BULK_SCORING_CHUNK_ROWS = int(os.getenv("BULK_SCORING_CHUNK_ROWS", "50000"))
+BULK_SCORING_DIR = os.getenv("BULK_SCORING_DIR", "./datas/scoring")
+BULK_SCORING_JOBS_DIR = os.getenv("BULK_SCORING_JOBS_DIR", "./datas/jobs/scoring")
+# Uploads, outputs and part directories in BULK_SCORING_DIR older than this
+# are deleted when the next job starts; 0 keeps them forever.
+BULK_SCORING_RETENTION_HOURS = float(os.getenv("BULK_SCORING_RETENTION_HOURS", "24"))
+OUTPUT_FORMATS = ("csv", "parquet")
+SCORE_COLUMNS = ["prediction", "probability_asd", "confidence", "asd_risk"]
+
+
+def check_output_format(output_format: str):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format {output_format}. Use one of {list(OUTPUT_FORMATS)}")
+    if output_format == "parquet" and pq is None:
+        raise ValueError("Parquet output needs pyarrow installed")
+
+
+def score_frame(df: pd.DataFrame, model, pipeline, labels: List[Any], positive_index: int,
+                moderate_confidence: float = 0.7) -> pd.DataFrame:
+    # The same fields (and thresholds) as AutismScreeningEngine._predict_batch,
+    # computed column-wise.
+    probabilities = model.predict_proba(pipeline.transform(df))
+    best = probabilities.argmax(axis=1)
+    confidence = probabilities.max(axis=1)
+    positive = probabilities[:, positive_index]
+    predictions = np.asarray([str(label) for label in labels], dtype=object)[best]
+    risk = np.where(best == positive_index, "high", "low").astype(object)
+    risk[confidence < moderate_confidence] = "moderate"
+    return df.assign(prediction=predictions, probability_asd=positive.round(4),
+                     confidence=confidence.round(4), asd_risk=risk)
+
+
+def _score_shard(index: int, scorer: Tuple[Any, Any, List[Any], int], path: str, columns: List[str], start: int,
+                 end: int, part_path: str, output_format: str, keep_columns: Optional[List[str]], chunk_rows: int,
+                 moderate_confidence: float) -> Tuple[int, Dict[str, Any]]:
+    # Runs in a worker: parse the shard in chunks, score each chunk and append
+    # it to this shard's part file.
+    model, pipeline, labels, positive_index = scorer
+    began = time.perf_counter()
+    rows, writer = 0, None
+    # Parsed as category, the pipeline normalizes each distinct value once per
+    # chunk instead of every cell.
+    categorical = {col: "category" for col in columns if pipeline.aliases.get(col, col) in pipeline.categories}
+    with ByteRange(path, start, end) as source, open(part_path, "wb") as out:
+        try:
+            reader = pd.read_csv(io.BufferedReader(source, 1 << 20), header=None, names=columns, dtype=categorical,
+                                 chunksize=chunk_rows, skipinitialspace=True)
+        except pd.errors.EmptyDataError:
+            # Only blank lines in this range.
+            reader = []
+        for chunk in reader:
+            scored = score_frame(chunk, model, pipeline, labels, positive_index, moderate_confidence)
+            scored = scored[(keep_columns if keep_columns is not None else columns) + SCORE_COLUMNS]
+            if output_format == "csv":
+                scored.to_csv(out, header=False, index=False)
+            else:
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                writer = writer or pq.ParquetWriter(out, table.schema)
+                # A chunk whose column is all empty infers another type.
+                writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+        if writer is not None:
+            writer.close()
+    return index, {"rows": rows, "bytes": end - start, "seconds": time.perf_counter() - began}
+
+
+class _OrderedOutput:
+    # Appends finished shards to the final file in input order as soon as every
+    # earlier shard is done, so the output grows while the job runs and at
+    # most the out-of-order part files sit on disk.
+    def __init__(self, path: str, output_format: str, header: List[str]):
+        self.path = path
+        self.output_format = output_format
+        self.next_shard = 0
+        self.ready: Dict[int, str] = {}
+        self._file = open(path, "wb")
+        self._writer = None
+        if output_format == "csv":
+            self._file.write((",".join(header) + "\n").encode("utf-8"))
+
+    def add(self, shard: int, part_path: str):
+        self.ready[shard] = part_path
+        while self.next_shard in self.ready:
+            part_path = self.ready.pop(self.next_shard)
+            if self.output_format == "csv":
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, self._file, 1 << 20)
+            elif os.path.getsize(part_path):
+                source = pq.ParquetFile(part_path)
+                self._writer = self._writer or pq.ParquetWriter(self._file, source.schema_arrow)
+                for group in range(source.num_row_groups):
+                    self._writer.write_table(source.read_row_group(group).cast(self._writer.schema))
+            self._file.flush()
+            os.remove(part_path)
+            self.next_shard += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._file.close()
+
+
+class BulkScorer:
+    # Scores a screening CSV too large to load: the file is cut into byte-range
+    # shards, worker processes each parse and score their shards in bounded
+    # chunks (vectorized encoding and one predict_proba per chunk), and the
+    # results are streamed into one CSV or Parquet file in input order.
+    # Memory per worker is one chunk, whatever the size of the file.
+    def __init__(self, model, pipeline, labels: List[Any], positive_index: int,
+                 workers: int = BULK_SCORING_WORKERS, shard_mb: float = BULK_SCORING_SHARD_MB,
+                 chunk_rows: int = BULK_SCORING_CHUNK_ROWS, moderate_confidence: float = 0.7):
+        self.scorer = (model, pipeline, labels, positive_index)
+        self.workers = max(1, workers)
+        self.shard_bytes = int(shard_mb * 2 ** 20)
+        self.chunk_rows = chunk_rows
+        self.moderate_confidence = moderate_confidence
+
+    def run(self, path: str, output_path: str, output_format: str = "csv",
+            keep_columns: Optional[List[str]] = None, on_progress=None) -> Dict[str, Any]:
+        check_output_format(output_format)
+        columns, ranges = shard_ranges(path, self.shard_bytes)
+        missing = [col for col in keep_columns or [] if col not in columns]
+        if missing:
+            raise ValueError(f"Columns not found in file: {missing}")
+        header = (keep_columns if keep_columns is not None else columns) + SCORE_COLUMNS
+        total_bytes = sum(end - start for start, end in ranges)
+        parts = tempfile.mkdtemp(prefix="bulk_scoring_", dir=os.path.dirname(os.path.abspath(output_path)))
+        output = _OrderedOutput(output_path, output_format, header)
+        progress = {"shards": len(ranges), "shards_done": 0, "rows": 0, "bytes_done": 0, "total_bytes": total_bytes}
+        start = time.perf_counter()
+
+        def finished(shard: int, outcome: Dict[str, Any]):
+            output.add(shard, os.path.join(parts, f"{shard}.part"))
+            progress["shards_done"] += 1
+            progress["rows"] += outcome["rows"]
+            progress["bytes_done"] += outcome["bytes"]
+            if on_progress:
+                on_progress(dict(progress))
+
+        tasks = [(i, self.scorer, path, columns, s, e, os.path.join(parts, f"{i}.part"), output_format, keep_columns,
+                  self.chunk_rows, self.moderate_confidence) for i, (s, e) in enumerate(ranges)]
+        workers = min(self.workers, len(tasks))
+        try:
+            if workers <= 1:
+                # One shard or one worker: no processes to start or model to ship.
+                for task in tasks:
+                    finished(*_score_shard(*task))
+            else:
+                # Same process pool as the hyperparameter search. Shards are
+                # handed out lazily (two per worker ahead), which bounds the
+                # finished-but-unmerged part files.
+                parallel = Parallel(n_jobs=workers, return_as="generator_unordered", pre_dispatch="2*n_jobs")
+                for outcome in parallel(delayed(_score_shard)(*task) for task in tasks):
+                    finished(*outcome)
+        finally:
+            output.close()
+            shutil.rmtree(parts, ignore_errors=True)
+        elapsed = time.perf_counter() - start
+        return {
+            **progress,
+            "output_path": output_path,
+            "output_format": output_format,
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(progress["rows"] / elapsed) if elapsed > 0 else None
+        }
+
+
+# Progress of bulk scoring jobs, in the same shape (and over the same
+# websocket) as training jobs: current_epoch / total_epochs count shards.
+scoring_jobs = TrainingJobs(directory=BULK_SCORING_JOBS_DIR)
+
+
+def prune_scoring_files(directory: str = BULK_SCORING_DIR,
+                        retention_hours: float = BULK_SCORING_RETENTION_HOURS) -> int:
+    # Files are named after their job (<job_id>.input.csv, <job_id>.csv or
+    # .parquet); those of a job still pending or running in any worker are
+    # kept however old. Part directories left by a killed worker go too.
+    if retention_hours <= 0 or not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - retention_hours * 3600
+    removed = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            job = scoring_jobs.get(entry.name.split(".")[0])
+            if job["status"] in ("pending", "running"):
+                continue
+        except LookupError:
+            pass
+        except FileNotFoundError:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+        removed += 1
+    return removed
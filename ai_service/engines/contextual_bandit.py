@@ -0,0 +1,188 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+
+class ThompsonBandit:
+    def __init__(self, n_arms: int, capacity: int = 1024, prior_strength: float = 2.0, seed: Optional[int] = None):
+        self.n_arms = n_arms
+        self.prior_strength = prior_strength
+        self.student_rows: Dict[str, int] = {}
+        self.student_ids: List[str] = []
+        self.alpha = np.ones((capacity, n_arms), dtype=np.float32)
+        self.beta = np.ones((capacity, n_arms), dtype=np.float32)
+        self.pulls = np.zeros((capacity, n_arms), dtype=np.uint32)
+        self.global_alpha = np.ones(n_arms, dtype=np.float64)
+        self.global_beta = np.ones(n_arms, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def n_students(self) -> int:
+        return len(self.student_ids)
+
+    def memory_bytes(self) -> int:
+        return self.alpha.nbytes + self.beta.nbytes + self.pulls.nbytes
+
+    def _grow(self, needed: int):
+        capacity = self.alpha.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name, fill in (("alpha", 1), ("beta", 1), ("pulls", 0)):
+            old = getattr(self, name)
+            grown = np.full((new_capacity, self.n_arms), fill, dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    def _prior(self):
+        # New students start from the population success rate, shrunk to a few pseudo-observations.
+        mean = self.global_alpha / (self.global_alpha + self.global_beta)
+        return 1.0 + self.prior_strength * mean, 1.0 + self.prior_strength * (1.0 - mean)
+
+    def rows(self, student_ids: Sequence[str], create: bool = True) -> np.ndarray:
+        missing = [sid for sid in dict.fromkeys(student_ids) if sid not in self.student_rows]
+        if missing and create:
+            start = self.n_students
+            self._grow(start + len(missing))
+            prior_alpha, prior_beta = self._prior()
+            self.alpha[start:start + len(missing)] = prior_alpha
+            self.beta[start:start + len(missing)] = prior_beta
+            for offset, sid in enumerate(missing):
+                self.student_rows[sid] = start + offset
+            self.student_ids.extend(missing)
+        return np.array([self.student_rows.get(sid, -1) for sid in student_ids], dtype=np.int64)
+
+    def update(self, student_ids: Sequence[str], arms: Sequence[int], rewards: Sequence[float]) -> int:
+        rows = self.rows(student_ids)
+        arms = np.asarray(arms, dtype=np.int64)
+        rewards = np.clip(np.asarray(rewards, dtype=np.float32), 0.0, 1.0)
+
+        np.add.at(self.alpha, (rows, arms), rewards)
+        np.add.at(self.beta, (rows, arms), 1.0 - rewards)
+        np.add.at(self.pulls, (rows, arms), 1)
+        np.add.at(self.global_alpha, arms, rewards)
+        np.add.at(self.global_beta, arms, 1.0 - rewards)
+        return len(rows)
+
+    def _posterior(self, student_ids: Sequence[str]):
+        # Reads never add rows: students without observations get the prior,
+        # so selecting for an unknown student allocates and persists nothing.
+        rows = self.rows(student_ids, create=False)
+        alpha, beta = self.alpha[rows], self.beta[rows]
+        unknown = rows < 0
+        if unknown.any():
+            prior_alpha, prior_beta = self._prior()
+            alpha[unknown], beta[unknown] = prior_alpha, prior_beta
+        return alpha, beta
+
+    def posterior_mean(self, student_ids: Sequence[str]) -> np.ndarray:
+        alpha, beta = self._posterior(student_ids)
+        return alpha / (alpha + beta)
+
+    def sample(self, student_ids: Sequence[str]) -> np.ndarray:
+        alpha, beta = self._posterior(student_ids)
+        return self.rng.beta(alpha, beta).astype(np.float32)
+
+    def select(self, student_ids: Sequence[str], top_n: int = 1, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        draws = self.sample(student_ids)
+        if allowed is not None:
+            draws[:, ~allowed] = -1.0
+        top_n = min(top_n, self.n_arms)
+        if top_n == 1:
+            return np.argmax(draws, axis=1)[:, None]
+        top = np.argpartition(draws, self.n_arms - top_n, axis=1)[:, -top_n:]
+        order = np.argsort(-np.take_along_axis(draws, top, axis=1), axis=1)
+        return np.take_along_axis(top, order, axis=1)
+
+    def observations(self, student_ids: Sequence[str]) -> np.ndarray:
+        rows = self.rows(student_ids, create=False)
+        return np.where(rows >= 0, self.pulls[rows].sum(axis=1), 0)
+
+    def merge(self, delta: "BanditDelta"):
+        # Adds counts recorded elsewhere; students new here start from the prior.
+        n = delta.n_students
+        if n:
+            rows = self.rows(delta.student_ids)
+            self.alpha[rows] += delta.alpha[:n]
+            self.beta[rows] += delta.beta[:n]
+            self.pulls[rows] += delta.pulls[:n]
+        self.global_alpha += delta.global_alpha
+        self.global_beta += delta.global_beta
+
+    def save(self, path: str):
+        n = self.n_students
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            student_ids=np.array(self.student_ids, dtype=str),
+            alpha=self.alpha[:n],
+            beta=self.beta[:n],
+            pulls=self.pulls[:n],
+            global_alpha=self.global_alpha,
+            global_beta=self.global_beta
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, seed: Optional[int] = None) -> "ThompsonBandit":
+        data = np.load(path)
+        student_ids = data["student_ids"].tolist()
+        bandit = cls(data["alpha"].shape[1], capacity=max(1024, len(student_ids)), seed=seed)
+        n = len(student_ids)
+        bandit.alpha[:n] = data["alpha"]
+        bandit.beta[:n] = data["beta"]
+        bandit.pulls[:n] = data["pulls"]
+        bandit.global_alpha = data["global_alpha"]
+        bandit.global_beta = data["global_beta"]
+        bandit.student_ids = student_ids
+        bandit.student_rows = {sid: i for i, sid in enumerate(student_ids)}
+        return bandit
+
+
+class BanditDelta:
+    # The increments ThompsonBandit.update made since some point, in the same
+    # per-student, per-arm layout, so it stays as compact as the bandit itself
+    # however many results it covers.
+    def __init__(self, n_arms: int, capacity: int = 1024):
+        self.n_arms = n_arms
+        self.student_rows: Dict[str, int] = {}
+        self.student_ids: List[str] = []
+        self.alpha = np.zeros((capacity, n_arms), dtype=np.float32)
+        self.beta = np.zeros((capacity, n_arms), dtype=np.float32)
+        self.pulls = np.zeros((capacity, n_arms), dtype=np.uint32)
+        self.global_alpha = np.zeros(n_arms, dtype=np.float64)
+        self.global_beta = np.zeros(n_arms, dtype=np.float64)
+
+    @property
+    def n_students(self) -> int:
+        return len(self.student_ids)
+
+    def rows(self, student_ids: Sequence[str]) -> np.ndarray:
+        missing = [sid for sid in dict.fromkeys(student_ids) if sid not in self.student_rows]
+        if missing:
+            start, capacity = self.n_students, self.alpha.shape[0]
+            if start + len(missing) > capacity:
+                new_capacity = max(start + len(missing), capacity * 2)
+                for name in ("alpha", "beta", "pulls"):
+                    old = getattr(self, name)
+                    grown = np.zeros((new_capacity, self.n_arms), dtype=old.dtype)
+                    grown[:capacity] = old
+                    setattr(self, name, grown)
+            for offset, sid in enumerate(missing):
+                self.student_rows[sid] = start + offset
+            self.student_ids.extend(missing)
+        return np.array([self.student_rows[sid] for sid in student_ids], dtype=np.int64)
+
+    def update(self, student_ids: Sequence[str], arms: Sequence[int], rewards: Sequence[float]):
+        rows = self.rows(student_ids)
+        arms = np.asarray(arms, dtype=np.int64)
+        rewards = np.clip(np.asarray(rewards, dtype=np.float32), 0.0, 1.0)
+        np.add.at(self.alpha, (rows, arms), rewards)
+        np.add.at(self.beta, (rows, arms), 1.0 - rewards)
+        np.add.at(self.pulls, (rows, arms), 1)
+        np.add.at(self.global_alpha, arms, rewards)
+        np.add.at(self.global_beta, arms, 1.0 - rewards)
+
+    # Folds another delta into this one, e.g. to keep counts a failed save took.
+    merge = ThompsonBandit.merge
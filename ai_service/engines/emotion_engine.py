@@ -1,15 +1,30 @@
 import numpy as np
 from typing import Dict, Any, List
+from core.metrics import timed_engine_call
 
 class EmotionDetectionEngine:
     def __init__(self):
         self.model_loaded = False
         self.emotions = ["happy", "sad", "neutral", "anxious", "engaged", "frustrated"]
 
+    @timed_engine_call
     def analyze(self, image_data: str, student_id: str) -> Dict[str, Any]:
+        return self._results(1)[0]
+
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._results(len(requests))
+
+    def _results(self, n: int) -> List[Dict[str, Any]]:
+        scores = np.random.uniform(0.0, 1.0, size=(n, len(self.emotions)))
+        levels = np.random.uniform([0.1, 0.6], [0.5, 0.95], size=(n, 2))
+        return [self._result(row, stress_level, engagement_level)
+                for row, (stress_level, engagement_level) in zip(scores, levels)]
+
+    def _result(self, scores: np.ndarray, stress_level: float, engagement_level: float) -> Dict[str, Any]:
         emotion_scores = {
-            emotion: round(np.random.uniform(0.0, 1.0), 2)
-            for emotion in self.emotions
+            emotion: round(score, 2)
+            for emotion, score in zip(self.emotions, scores)
         }
 
         primary_emotion = max(emotion_scores, key=emotion_scores.get)
@@ -20,9 +35,6 @@ class EmotionDetectionEngine:
             "Relaxed facial muscles"
         ]
 
-        stress_level = np.random.uniform(0.1, 0.5)
-        engagement_level = np.random.uniform(0.6, 0.95)
-
         return {
             "analysis_type": "emotion",
             "primary_emotion": primary_emotion,
@@ -33,6 +45,7 @@ class EmotionDetectionEngine:
             "confidence": round(emotion_scores[primary_emotion], 2)
         }
 
+    @timed_engine_call
     def track_timeline(self, image_data: str, student_id: str) -> Dict[str, Any]:
         timeline = [
             {"timestamp": 0, "emotion": "neutral", "confidence": 0.78},
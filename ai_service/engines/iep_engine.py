@@ -1,98 +1,26 @@
 import numpy as np
 from typing import Dict, Any, List
-from datetime import datetime, timedelta
+from engines.iep_templates import IEPTemplateEngine
+from core.metrics import timed_engine_call
 
 class AutoIEPEngine:
     def __init__(self):
         self.model_loaded = False
+        self.templates = IEPTemplateEngine()
 
+    @timed_engine_call
     def generate(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
-        goals = [
-            {
-                "area": "speech_language",
-                "goal": "Improve articulation of 'r' and 'th' sounds to 80% accuracy",
-                "baseline": "Currently at 45% accuracy",
-                "target_date": (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d"),
-                "measurable_criteria": "Correct production in 8 out of 10 trials",
-                "strategies": [
-                    "Daily pronunciation practice",
-                    "Visual cue cards",
-                    "Mirror exercises"
-                ]
-            },
-            {
-                "area": "social_emotional",
-                "goal": "Increase peer interaction duration to 15 minutes per session",
-                "baseline": "Currently engages for 5-7 minutes",
-                "target_date": (datetime.now() + timedelta(days=60)).strftime("%Y-%m-%d"),
-                "measurable_criteria": "Sustained interaction for 15+ minutes in 4 out of 5 sessions",
-                "strategies": [
-                    "Structured play activities",
-                    "Social stories",
-                    "Peer modeling"
-                ]
-            },
-            {
-                "area": "academic",
-                "goal": "Complete age-appropriate math problems with 75% accuracy",
-                "baseline": "Currently at 50% accuracy",
-                "target_date": (datetime.now() + timedelta(days=120)).strftime("%Y-%m-%d"),
-                "measurable_criteria": "3 out of 4 problems correct on weekly assessments",
-                "strategies": [
-                    "Visual math aids",
-                    "Step-by-step problem solving",
-                    "Frequent breaks"
-                ]
-            }
-        ]
+        return self.templates.fill(student_data)
 
-        accommodations = [
-            "Extended time for assignments (1.5x)",
-            "Preferential seating near the front",
-            "Visual schedule for daily activities",
-            "Sensory breaks every 30 minutes",
-            "Use of assistive technology for writing",
-            "Reduced auditory distractions",
-            "Chunked assignments into smaller tasks"
-        ]
+    def generate_many(self, students: List[Dict[str, Any]]):
+        return self.templates.fill_many(students)
 
-        assessment_plan = {
-            "frequency": "bi-weekly",
-            "methods": [
-                "Direct observation",
-                "Work samples",
-                "Standardized assessments",
-                "Progress monitoring probes"
-            ],
-            "review_schedule": {
-                "progress_reviews": "Every 6 weeks",
-                "annual_review": (datetime.now() + timedelta(days=365)).strftime("%Y-%m-%d")
-            }
-        }
-
-        focus_areas = ["speech_language", "social_emotional", "academic", "behavioral"]
-
-        timeline = {
-            "start_date": datetime.now().strftime("%Y-%m-%d"),
-            "end_date": (datetime.now() + timedelta(days=365)).strftime("%Y-%m-%d"),
-            "review_dates": [
-                (datetime.now() + timedelta(days=45)).strftime("%Y-%m-%d"),
-                (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d"),
-                (datetime.now() + timedelta(days=180)).strftime("%Y-%m-%d"),
-                (datetime.now() + timedelta(days=270)).strftime("%Y-%m-%d")
-            ]
-        }
-
-        return {
-            "analysis_type": "auto_iep",
-            "goals": goals,
-            "accommodations": accommodations,
-            "assessment_plan": assessment_plan,
-            "focus_areas": focus_areas,
-            "timeline": timeline,
-            "confidence": 0.82
-        }
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # requests are generate() keyword arguments.
+        return list(self.generate_many([request["student_data"] for request in requests]))
 
+    @timed_engine_call
     def update_goals(self, student_id: str, progress_data: List[Dict]) -> Dict[str, Any]:
         return {
             "goals": [
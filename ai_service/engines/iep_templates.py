@@ -0,0 +1,220 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+
+GOAL_BANK = {
+    "speech_language": {
+        "goal": "{first_name} will improve articulation of 'r' and 'th' sounds to 80% accuracy",
+        "baseline": "Currently at {baseline} accuracy",
+        "default_baseline": "45%",
+        "target_days": 90,
+        "measurable_criteria": "Correct production in 8 out of 10 trials",
+        "strategies": ("Daily pronunciation practice", "Visual cue cards", "Mirror exercises")
+    },
+    "social_emotional": {
+        "goal": "{first_name} will increase peer interaction duration to 15 minutes per session",
+        "baseline": "Currently engages for {baseline}",
+        "default_baseline": "5-7 minutes",
+        "target_days": 60,
+        "measurable_criteria": "Sustained interaction for 15+ minutes in 4 out of 5 sessions",
+        "strategies": ("Structured play activities", "Social stories", "Peer modeling")
+    },
+    "academic": {
+        "goal": "{first_name} will complete age-appropriate math problems with 75% accuracy",
+        "baseline": "Currently at {baseline} accuracy",
+        "default_baseline": "50%",
+        "target_days": 120,
+        "measurable_criteria": "3 out of 4 problems correct on weekly assessments",
+        "strategies": ("Visual math aids", "Step-by-step problem solving", "Frequent breaks")
+    },
+    "behavioral": {
+        "goal": "{first_name} will transition between activities with no more than one prompt",
+        "baseline": "Currently needs {baseline} per transition",
+        "default_baseline": "3-4 prompts",
+        "target_days": 90,
+        "measurable_criteria": "Independent transitions in 4 out of 5 observed opportunities",
+        "strategies": ("Visual schedules", "First-then boards", "Positive reinforcement")
+    },
+    "sensory": {
+        "goal": "{first_name} will use a self-regulation strategy when overwhelmed in 80% of opportunities",
+        "baseline": "Currently uses a strategy in {baseline} of opportunities",
+        "default_baseline": "20%",
+        "target_days": 120,
+        "measurable_criteria": "Strategy use observed in 8 out of 10 recorded episodes",
+        "strategies": ("Sensory diet", "Calm-down corner", "Noise-reducing headphones")
+    },
+    "life_skills": {
+        "goal": "{first_name} will complete a 4-step self-care routine independently",
+        "baseline": "Currently completes {baseline} independently",
+        "default_baseline": "1-2 steps",
+        "target_days": 120,
+        "measurable_criteria": "Routine completed without prompts on 4 out of 5 days",
+        "strategies": ("Task analysis cards", "Backward chaining", "Video modeling")
+    }
+}
+
+CONDITION_AREAS = {
+    "autism": ("social_emotional", "speech_language", "behavioral"),
+    "adhd": ("behavioral", "academic"),
+    "speech_delay": ("speech_language",),
+    "learning_disability": ("academic",),
+    "behavioral_issues": ("behavioral", "social_emotional")
+}
+
+DEFAULT_AREAS = ("speech_language", "social_emotional", "academic")
+
+COMMON_ACCOMMODATIONS = (
+    "Extended time for assignments (1.5x)",
+    "Preferential seating near the front",
+    "Visual schedule for daily activities"
+)
+
+CONDITION_ACCOMMODATIONS = {
+    "autism": ("Sensory breaks every 30 minutes", "Reduced auditory distractions", "Advance notice of schedule changes"),
+    "adhd": ("Chunked assignments into smaller tasks", "Movement breaks between tasks", "Checklists for multi-step work"),
+    "speech_delay": ("Use of augmentative communication supports", "Additional response time for verbal answers"),
+    "learning_disability": ("Use of assistive technology for writing", "Chunked assignments into smaller tasks", "Read-aloud for written instructions"),
+    "behavioral_issues": ("Clear behavior expectations posted visually", "Scheduled check-ins with staff")
+}
+
+DEFAULT_ACCOMMODATIONS = (
+    "Sensory breaks every 30 minutes",
+    "Use of assistive technology for writing",
+    "Reduced auditory distractions",
+    "Chunked assignments into smaller tasks"
+)
+
+ASSESSMENT_METHODS = ("Direct observation", "Work samples", "Standardized assessments", "Progress monitoring probes")
+REVIEW_OFFSETS = (45, 90, 180, 270)
+PLAN_DAYS = 365
+
+
+def _template_fields(template: str) -> Tuple[str, ...]:
+    return tuple(field for _, field, _, _ in Formatter().parse(template) if field)
+
+
+class CompiledGoal:
+    __slots__ = ("area", "goal", "goal_fields", "baseline", "default_baseline", "target_days",
+                 "measurable_criteria", "strategies")
+
+    def __init__(self, area: str, spec: Dict[str, Any]):
+        self.area = area
+        self.goal = spec["goal"]
+        self.goal_fields = _template_fields(self.goal)
+        self.baseline = spec["baseline"]
+        self.default_baseline = self.baseline.format(baseline=spec["default_baseline"])
+        self.target_days = spec["target_days"]
+        self.measurable_criteria = spec["measurable_criteria"]
+        self.strategies = spec["strategies"]
+
+    def fill(self, fields: Dict[str, str], baselines: Dict[str, Any], dates: Dict[int, str]) -> Dict[str, Any]:
+        baseline = baselines.get(self.area)
+        return {
+            "area": self.area,
+            "goal": self.goal.format_map(fields) if self.goal_fields else self.goal,
+            "baseline": self.baseline.format(baseline=baseline) if baseline is not None else self.default_baseline,
+            "target_date": dates[self.target_days],
+            "measurable_criteria": self.measurable_criteria,
+            "strategies": self.strategies
+        }
+
+
+@lru_cache(maxsize=4)
+def _date_table(today: date) -> Dict[int, str]:
+    offsets = {0, PLAN_DAYS, *REVIEW_OFFSETS, *(spec["target_days"] for spec in GOAL_BANK.values())}
+    return {offset: (today + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in offsets}
+
+
+# Distinct (conditions, focus areas) plans kept; both keys are normalized, so
+# this only matters for unusual mixes of many conditions.
+PLAN_CACHE_SIZE = 512
+
+
+class IEPTemplateEngine:
+    def __init__(self):
+        self.goals = {area: CompiledGoal(area, spec) for area, spec in GOAL_BANK.items()}
+        self._plan_cache: Dict[Tuple[str, ...], Tuple[Tuple[CompiledGoal, ...], Tuple[str, ...]]] = {}
+
+    def _plan_for(self, conditions: Tuple[str, ...], focus_areas: Tuple[str, ...]):
+        key = conditions + ("|",) + focus_areas
+        plan = self._plan_cache.get(key)
+        if plan is not None:
+            return plan
+
+        if focus_areas:
+            areas = focus_areas
+        elif conditions:
+            areas = tuple(dict.fromkeys(a for c in conditions for a in CONDITION_AREAS.get(c, ())))
+        else:
+            areas = ()
+        areas = tuple(a for a in areas if a in self.goals) or DEFAULT_AREAS
+
+        accommodations = COMMON_ACCOMMODATIONS + tuple(
+            dict.fromkeys(a for c in conditions for a in CONDITION_ACCOMMODATIONS.get(c, ()))
+        )
+        if len(accommodations) == len(COMMON_ACCOMMODATIONS):
+            accommodations = COMMON_ACCOMMODATIONS + DEFAULT_ACCOMMODATIONS
+
+        plan = (tuple(self.goals[a] for a in areas), accommodations)
+        if len(self._plan_cache) >= PLAN_CACHE_SIZE:
+            del self._plan_cache[next(iter(self._plan_cache))]
+        self._plan_cache[key] = plan
+        return plan
+
+    @staticmethod
+    def _conditions(student_data: Dict[str, Any]) -> Tuple[str, ...]:
+        conditions = []
+        for condition in student_data.get("conditions") or []:
+            if isinstance(condition, dict):
+                condition = condition.get("condition_type")
+            if condition in CONDITION_AREAS:
+                conditions.append(condition)
+        return tuple(sorted(set(conditions)))
+
+    def _focus_areas(self, student_data: Dict[str, Any]) -> Tuple[str, ...]:
+        # Known areas once each, in goal bank order, whatever the client sent.
+        requested = {a for a in student_data.get("focus_areas") or () if isinstance(a, str)}
+        return tuple(a for a in self.goals if a in requested)
+
+    def fill(self, student_data: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+        dates = _date_table(today or date.today())
+        goals, accommodations = self._plan_for(self._conditions(student_data), self._focus_areas(student_data))
+
+        full_name = str(student_data.get("full_name") or "").strip()
+        fields = {
+            "first_name": full_name.split(" ")[0] if full_name else "Student",
+            "full_name": full_name or "Student"
+        }
+        baselines = student_data.get("baselines") or {}
+
+        plan = {
+            "analysis_type": "auto_iep",
+            "goals": [goal.fill(fields, baselines, dates) for goal in goals],
+            "accommodations": list(accommodations),
+            "assessment_plan": {
+                "frequency": "bi-weekly",
+                "methods": ASSESSMENT_METHODS,
+                "review_schedule": {
+                    "progress_reviews": "Every 6 weeks",
+                    "annual_review": dates[PLAN_DAYS]
+                }
+            },
+            "focus_areas": [goal.area for goal in goals],
+            "timeline": {
+                "start_date": dates[0],
+                "end_date": dates[PLAN_DAYS],
+                "review_dates": [dates[offset] for offset in REVIEW_OFFSETS]
+            },
+            "confidence": 0.82
+        }
+
+        student_id = student_data.get("id") or student_data.get("student_id")
+        if student_id is not None:
+            plan["student_id"] = str(student_id)
+        return plan
+
+    def fill_many(self, students: List[Dict[str, Any]]):
+        today = date.today()
+        for student_data in students:
+            yield self.fill(student_data, today)
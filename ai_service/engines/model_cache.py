@@ -0,0 +1,185 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from core.metrics import MODEL_LOAD_SECONDS, registry, Counter, Gauge
+from engines.model_manager import MODELS_DIR, resolve_model_path
+
+# For the whole service: every pre-fork worker (WEB_CONCURRENCY) keeps its own
+# cache, so each gets an equal share.
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "512"))
+MODEL_CACHE_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+MODEL_CACHE_MAX_MODELS = int(os.getenv("MODEL_CACHE_MAX_MODELS", "64"))
+
+MODEL_CACHE_EVENTS = registry.register(Counter(
+    "ai_model_cache_events", "Trained-model cache lookups and evictions by event", ("event",)))
+MODEL_CACHE_BYTES = registry.register(Gauge(
+    "ai_model_cache_bytes", "Pickled size of the trained models held in the cache"))
+
+
+class TrainedModel:
+    # A bundle written by training.runner.save_model, ready to score records.
+    def __init__(self, configuration_id: str, path: str):
+        with open(path, 'rb') as f:
+            obj = pickle.load(f)
+        if not isinstance(obj, dict) or 'model' not in obj or obj.get('pipeline') is None:
+            raise ValueError(f"{path} is not a trained model bundle")
+        self.configuration_id = configuration_id
+        self.path = path
+        self.model = obj['model']
+        self.pipeline = obj['pipeline']
+        self.target_column = obj.get('target_column')
+        stat = os.stat(path)
+        self.mtime_ns = stat.st_mtime_ns
+        # Pickled size stands in for the memory footprint: fitted estimators are
+        # mostly numpy arrays, which pickle at their in-memory size.
+        self.size_bytes = stat.st_size
+        self.loaded_at = time.time()
+        self.labels = [self.pipeline.label(c) for c in self.model.classes_]
+
+    def predict(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        X = self.pipeline.transform_records(records)
+        if not hasattr(self.model, 'predict_proba'):
+            return [{"prediction": self.pipeline.label(p), "probabilities": None} for p in self.model.predict(X)]
+        probabilities = self.model.predict_proba(X)
+        best = probabilities.argmax(axis=1)
+        return [
+            {
+                "prediction": self.labels[i],
+                "confidence": float(row[i]),
+                "probabilities": {str(label): float(p) for label, p in zip(self.labels, row)}
+            }
+            for i, row in zip(best, probabilities)
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "configuration_id": self.configuration_id,
+            "model_class": type(self.model).__name__,
+            "features": self.pipeline.feature_columns,
+            "target_column": self.target_column,
+            "labels": [str(label) for label in self.labels],
+            "size_bytes": self.size_bytes,
+            "loaded_at": self.loaded_at
+        }
+
+
+class ModelCache:
+    # Least-recently-used pool of trained models keyed by configuration_id and
+    # bounded by total pickled size and count. A model retrained since it was
+    # loaded (file mtime changed) is reloaded on its next lookup. Loads run
+    # outside the cache lock, one at a time per configuration_id, so a burst of
+    # requests for a cold model reads the pickle once.
+    def __init__(self, max_bytes: float = MODEL_CACHE_MAX_MB * 2 ** 20 / MODEL_CACHE_WORKERS, max_models: int = MODEL_CACHE_MAX_MODELS,
+                 models_dir: str = MODELS_DIR):
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self.models_dir = models_dir
+        self.entries: "OrderedDict[str, TrainedModel]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0, "evictions": 0, "uncached": 0, "load_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def path_for(self, configuration_id: str) -> str:
+        return resolve_model_path(os.path.join(self.models_dir, f"{configuration_id}.pkl"), self.models_dir)
+
+    def _lookup(self, configuration_id: str, mtime_ns: int) -> Optional[TrainedModel]:
+        with self._lock:
+            entry = self.entries.get(configuration_id)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                self.entries.move_to_end(configuration_id)
+                self.stats["hits"] += 1
+                MODEL_CACHE_EVENTS.labels("hit").inc()
+                return entry
+        return None
+
+    def get(self, configuration_id: str) -> TrainedModel:
+        path = self.path_for(configuration_id)
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = self._lookup(configuration_id, mtime_ns)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            loading = self._loading.setdefault(configuration_id, threading.Lock())
+        try:
+            with loading:
+                # Another request may have loaded it while this one waited.
+                entry = self._lookup(configuration_id, mtime_ns)
+                if entry is not None:
+                    return entry
+                start = time.perf_counter()
+                entry = TrainedModel(configuration_id, path)
+                elapsed = time.perf_counter() - start
+                MODEL_LOAD_SECONDS.set(elapsed, "trained_model", "cache")
+                self._store(entry, elapsed)
+        finally:
+            # Also when the pickle fails to load, so the id is not left
+            # with a lock entry for good.
+            with self._lock:
+                self._loading.pop(configuration_id, None)
+        return entry
+
+    def _store(self, entry: TrainedModel, elapsed: float):
+        with self._lock:
+            self.stats["load_seconds"] += elapsed
+            stale = self.entries.pop(entry.configuration_id, None)
+            if stale is not None:
+                self.bytes -= stale.size_bytes
+                self.stats["reloads"] += 1
+                MODEL_CACHE_EVENTS.labels("reload").inc()
+            else:
+                self.stats["misses"] += 1
+                MODEL_CACHE_EVENTS.labels("miss").inc()
+            if entry.size_bytes > self.max_bytes:
+                # Serve it, but don't flush every other school's model for it.
+                self.stats["uncached"] += 1
+                MODEL_CACHE_EVENTS.labels("uncached").inc()
+            else:
+                self.entries[entry.configuration_id] = entry
+                self.bytes += entry.size_bytes
+                while self.bytes > self.max_bytes or len(self.entries) > self.max_models:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.bytes -= evicted.size_bytes
+                    self.stats["evictions"] += 1
+                    MODEL_CACHE_EVENTS.labels("eviction").inc()
+            MODEL_CACHE_BYTES.set(self.bytes)
+
+    def predict(self, configuration_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        entry = self.get(configuration_id)
+        start = time.perf_counter()
+        predictions = entry.predict(records)
+        return {
+            "configuration_id": configuration_id,
+            "predictions": predictions,
+            "count": len(predictions),
+            "inference_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    def evict(self, configuration_id: str) -> bool:
+        with self._lock:
+            entry = self.entries.pop(configuration_id, None)
+            if entry is None:
+                return False
+            self.bytes -= entry.size_bytes
+            MODEL_CACHE_BYTES.set(self.bytes)
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"] + self.stats["reloads"]
+            return {
+                "entries": [entry.describe() for entry in reversed(self.entries.values())],
+                "bytes": self.bytes,
+                "max_bytes": int(self.max_bytes),
+                "max_models": self.max_models,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                **{key: round(value, 4) if isinstance(value, float) else value for key, value in self.stats.items()}
+            }
+
+
+trained_models = ModelCache()
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from core.metrics import MODEL_LOAD_SECONDS, registry, Counter
+from core.serialization import dumps, loads
+from db.database import database, Database
+from engines.autism_screening_engine import AutismScreeningEngine, ScreeningModel
+
+MODELS_DIR = os.getenv("MODELS_DIR", "./models")
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "10"))
+# Written by the worker that handled a reload/activate request and read by the
+# others on their next watch tick, so every prefork worker serves the same model.
+ACTIVE_MODEL_FILE = os.getenv("ACTIVE_MODEL_FILE", os.path.join(MODELS_DIR, "active_model.json"))
+
+MODEL_RELOADS = registry.register(Counter(
+    "ai_model_reloads", "Model hot-reload attempts by outcome", ("model", "outcome")))
+
+
+def resolve_model_path(path: str, models_dir: str = MODELS_DIR) -> str:
+    root = os.path.realpath(models_dir)
+    candidate = path if os.path.isabs(path) or path.startswith(".") else os.path.join(models_dir, path)
+    resolved = os.path.realpath(candidate)
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Model path {path} is outside {models_dir}")
+    if not os.path.exists(resolved):
+        raise LookupError(f"Model file {path} not found")
+    return resolved
+
+
+class ModelManager:
+    # Loads new screening models off the event loop and swaps them into the
+    # engine in one assignment; predictions already running keep the bundle they
+    # started with. New versions come from the reload/activate endpoints, from
+    # model_versions.is_active (polled when a database is configured) or from the
+    # active pickle changing on disk. Explicit reloads are recorded in
+    # active_file for the other workers to follow.
+    def __init__(self, engine: AutismScreeningEngine, db: Database = database,
+                 watch_interval: float = MODEL_WATCH_INTERVAL, active_file: str = ACTIVE_MODEL_FILE):
+        self.engine = engine
+        self.db = db
+        self.watch_interval = watch_interval
+        self.active_file = active_file
+        self._active_token: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+        self.reloads = 0
+        # The model_versions row last seen active. Only a change of it is
+        # followed, so a reload to another file or version is not undone on
+        # the next tick.
+        self._db_active_id: Optional[str] = None
+        self._failed_mtime: Optional[int] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self):
+        if self.watch_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _publish(self, path: str, version: Optional[Dict[str, Any]], encoders_path: Optional[str]):
+        self._active_token = uuid.uuid4().hex
+        record = {"token": self._active_token, "path": path, "version": version or {}, "encoders_path": encoders_path,
+                  "published_at": time.time()}
+        os.makedirs(os.path.dirname(self.active_file) or ".", exist_ok=True)
+        staging = f"{self.active_file}.{os.getpid()}.tmp"
+        with open(staging, "wb") as f:
+            f.write(dumps(record))
+        os.replace(staging, self.active_file)
+
+    def _published(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.active_file, "rb") as f:
+                return loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def _read(self, path: str, version: Optional[Dict[str, Any]], encoders_path: Optional[str]):
+        try:
+            resolved = resolve_model_path(path)
+            bundle = await asyncio.get_running_loop().run_in_executor(
+                None, ScreeningModel.load, resolved, encoders_path, version or {})
+        except Exception as e:
+            self.last_error = f"{path}: {e}"
+            MODEL_RELOADS.labels("autism_screening", "failed").inc()
+            raise
+        return resolved, bundle
+
+    def _swap(self, bundle, resolved: str, version: Optional[Dict[str, Any]], encoders_path: Optional[str],
+              publish: bool, start: float) -> Dict[str, Any]:
+        previous = self.engine.swap_model(bundle)
+        if publish:
+            self._publish(resolved, version, encoders_path)
+        self.reloads += 1
+        self.last_error = None
+        self._failed_mtime = None
+        MODEL_RELOADS.labels("autism_screening", "swapped").inc()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start, "autism_screening", "hot_reload")
+        print(f"Screening model swapped: {previous.describe()['path']} -> {resolved}")
+        return {"active": bundle.describe(), "previous": previous.describe()}
+
+    async def load(self, path: str, version: Optional[Dict[str, Any]] = None,
+                   encoders_path: Optional[str] = None, publish: bool = False) -> Dict[str, Any]:
+        async with self._get_lock():
+            start = time.perf_counter()
+            resolved, bundle = await self._read(path, version, encoders_path)
+            return self._swap(bundle, resolved, version, encoders_path, publish, start)
+
+    async def reload(self, version_id: Optional[str] = None, model_path: Optional[str] = None) -> Dict[str, Any]:
+        if model_path:
+            return await self.load(model_path, publish=True)
+        if version_id:
+            version = await self.db.fetch_model_version(version_id)
+            if version is None:
+                raise LookupError(f"Model version {version_id} not found")
+            return await self.load(version["model_path"], version, publish=True)
+        if self.db.enabled:
+            version = await self.db.fetch_active_model_version()
+            if version is not None:
+                return await self.load(version["model_path"], version, publish=True)
+        engine = self.engine
+        return await self.load(engine.model_path, {}, engine.encoders_path, publish=True)
+
+    async def activate(self, version_id: str) -> Dict[str, Any]:
+        # Load to the side first so a version that fails validation is never
+        # marked active, and flip the row before serving or publishing it so a
+        # failed DB write leaves every worker on the current model.
+        version = await self.db.fetch_model_version(version_id)
+        if version is None:
+            raise LookupError(f"Model version {version_id} not found")
+        version = {**version, "is_active": True}
+        async with self._get_lock():
+            start = time.perf_counter()
+            resolved, bundle = await self._read(version["model_path"], version, None)
+            await self.db.activate_model_version(version_id)
+            self._db_active_id = version_id
+            return self._swap(bundle, resolved, version, None, True, start)
+
+    async def check(self) -> bool:
+        self.last_checked = time.time()
+        active = self.engine.active
+        published = self._published()
+        if published is not None and published["token"] != self._active_token:
+            # Another worker reloaded. Taking the token first means a model
+            # that fails to load here is not retried every tick.
+            self._active_token = published["token"]
+            if (published["path"], published["version"].get("id")) != (active.path, active.version.get("id")):
+                await self.load(published["path"], published["version"], published["encoders_path"])
+                return True
+        if self.db.enabled:
+            version = await self.db.fetch_active_model_version()
+            if version is not None and version["id"] != self._db_active_id:
+                # Recorded first: a broken version is not retried every tick;
+                # a new activation or an explicit reload will try again.
+                self._db_active_id = version["id"]
+                if version["id"] != active.version.get("id"):
+                    await self.load(version["model_path"], version)
+                    return True
+        if active.path and active.mtime_ns is not None and os.path.exists(active.path):
+            mtime_ns = os.stat(active.path).st_mtime_ns
+            if mtime_ns not in (active.mtime_ns, self._failed_mtime):
+                encoders_path = self.engine.encoders_path if active.path == os.path.realpath(self.engine.model_path) else None
+                try:
+                    await self.load(active.path, active.version, encoders_path)
+                except Exception:
+                    # Same for a file rewritten with something unloadable: wait
+                    # for it to change again.
+                    self._failed_mtime = mtime_ns
+                    raise
+                return True
+        return False
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                # Keep serving the current model; the failure is visible in status().
+                self.last_error = str(e)
+                print(f"Model watch check failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.engine.active.describe(),
+            "reloads": self.reloads,
+            "watching": self._task is not None,
+            "watch_interval": self.watch_interval,
+            "database_polling": self.db.enabled,
+            "active_file": self.active_file,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error
+        }
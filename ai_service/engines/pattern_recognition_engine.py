@@ -1,10 +1,12 @@
 import numpy as np
 from typing import Dict, Any, List
+from core.metrics import timed_engine_call
 
 class PatternRecognitionEngine:
     def __init__(self):
         self.model_loaded = False
 
+    @timed_engine_call
     def analyze(self, student_id: str, historical_data: List[Dict], data_type: str) -> Dict[str, Any]:
         identified_patterns = [
             {
@@ -84,6 +86,11 @@ class PatternRecognitionEngine:
             "confidence": 0.80
         }
 
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.analyze(**request) for request in requests]
+
+    @timed_engine_call
     def discover_insights(self, student_id: str, time_range: str) -> Dict[str, Any]:
         return {
             "patterns": [
@@ -1,23 +1,35 @@
 import numpy as np
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
+from core.metrics import timed_engine_call
 
 class ProgressPredictionEngine:
     def __init__(self):
         self.model_loaded = False
 
+    @timed_engine_call
     def predict(self, student_id: str, progress_data: List[Dict]) -> Dict[str, Any]:
-        trajectories = ["improving", "stable", "needs_attention"]
-        current_trajectory = np.random.choice(trajectories, p=[0.6, 0.3, 0.1])
+        return self._results(1)[0]
 
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._results(len(requests))
+
+    def _results(self, n: int) -> List[Dict[str, Any]]:
+        trajectories = np.random.choice(["improving", "stable", "needs_attention"], size=n, p=[0.6, 0.3, 0.1])
+        probabilities = np.random.uniform(0.65, 0.92, size=n)
+        now = datetime.now()
+        dates = [(now + timedelta(days=days)).isoformat() for days in (7, 14, 30)]
+        return [self._result(trajectory, probability, dates)
+                for trajectory, probability in zip(trajectories, probabilities)]
+
+    def _result(self, current_trajectory: str, goal_achievement_probability: float, dates: List[str]) -> Dict[str, Any]:
         predicted_progress = [
-            {"date": (datetime.now() + timedelta(days=7)).isoformat(), "predicted_score": 7.2, "area": "speech"},
-            {"date": (datetime.now() + timedelta(days=14)).isoformat(), "predicted_score": 7.8, "area": "speech"},
-            {"date": (datetime.now() + timedelta(days=30)).isoformat(), "predicted_score": 8.5, "area": "speech"}
+            {"date": dates[0], "predicted_score": 7.2, "area": "speech"},
+            {"date": dates[1], "predicted_score": 7.8, "area": "speech"},
+            {"date": dates[2], "predicted_score": 8.5, "area": "speech"}
         ]
 
-        goal_achievement_probability = np.random.uniform(0.65, 0.92)
-
         estimated_timeline = {
             "short_term_goals": 14,
             "medium_term_goals": 45,
@@ -32,7 +44,7 @@ class ProgressPredictionEngine:
 
         return {
             "analysis_type": "progress_prediction",
-            "current_trajectory": current_trajectory,
+            "current_trajectory": str(current_trajectory),
             "predicted_progress": predicted_progress,
             "goal_achievement_probability": round(goal_achievement_probability, 2),
             "estimated_timeline": estimated_timeline,
@@ -40,6 +52,7 @@ class ProgressPredictionEngine:
             "confidence": 0.78
         }
 
+    @timed_engine_call
     def forecast(self, student_id: str, progress_data: List[Dict]) -> Dict[str, Any]:
         return {
             "short_term": [
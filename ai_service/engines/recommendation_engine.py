@@ -1,37 +1,31 @@
 import numpy as np
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, List, Optional
+from engines.activity_catalog import ActivityCatalog
+from core.metrics import timed_engine_call
 
 class RecommendationEngine:
     def __init__(self):
         self.model_loaded = False
+        self.catalog_path = os.getenv('ACTIVITY_CATALOG_PATH', './datas/activities/activity_catalog.json')
+        self.catalog = ActivityCatalog.load_or_default(self.catalog_path)
 
-    def generate(self, student_id: str, current_performance: Dict, focus_areas: List[str]) -> Dict[str, Any]:
-        activities = [
-            {
-                "title": "Sound Sorting Game",
-                "focus_area": "linguistic",
-                "duration_minutes": 15,
-                "difficulty": "moderate",
-                "materials": ["Sound cards", "Sorting mat"],
-                "expected_benefit": "Improve phonemic awareness"
-            },
-            {
-                "title": "Emotion Recognition Cards",
-                "focus_area": "emotional",
-                "duration_minutes": 10,
-                "difficulty": "easy",
-                "materials": ["Emotion cards", "Mirror"],
-                "expected_benefit": "Enhance emotional understanding"
-            },
-            {
-                "title": "Fine Motor Practice",
-                "focus_area": "life_skills",
-                "duration_minutes": 20,
-                "difficulty": "moderate",
-                "materials": ["Beads", "String", "Tweezers"],
-                "expected_benefit": "Develop hand-eye coordination"
-            }
-        ]
+    def reload_catalog(self) -> int:
+        self.catalog = ActivityCatalog.load_or_default(self.catalog_path)
+        return self.catalog.size
+
+    @timed_engine_call
+    def generate(self, student_id: str, current_performance: Dict, focus_areas: List[str], top_k: int = 3,
+                 difficulty: Optional[str] = None, modality: Optional[str] = None,
+                 available_materials: Optional[List[str]] = None) -> Dict[str, Any]:
+        activities = self.catalog.recommend(
+            current_performance,
+            focus_areas,
+            top_k=top_k,
+            difficulty=difficulty,
+            modality=modality,
+            available_materials=available_materials
+        )
 
         interventions = [
             {
@@ -92,6 +86,7 @@ class RecommendationEngine:
             "confidence": 0.84
         }
 
+    @timed_engine_call
     def create_daily_plan(self, student_id: str, preferences: Dict) -> Dict[str, Any]:
         return {
             "morning": [
@@ -1,14 +1,25 @@
 import numpy as np
 from typing import Dict, Any, List
+from core.metrics import timed_engine_call
 
 class RiskDetectionEngine:
     def __init__(self):
         self.model_loaded = False
 
+    @timed_engine_call
     def analyze(self, student_id: str, behavioral_data: List[Dict], progress_data: List[Dict]) -> Dict[str, Any]:
-        risk_levels = ["low", "moderate", "high"]
-        risk_level = np.random.choice(risk_levels, p=[0.6, 0.3, 0.1])
+        return self._results(1)[0]
 
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._results(len(requests))
+
+    def _results(self, n: int) -> List[Dict[str, Any]]:
+        risk_levels = np.random.choice(["low", "moderate", "high"], size=n, p=[0.6, 0.3, 0.1])
+        priorities = np.random.choice(["immediate", "high", "medium", "low"], size=n, p=[0.1, 0.2, 0.5, 0.2])
+        return [self._result(str(level), str(priority)) for level, priority in zip(risk_levels, priorities)]
+
+    def _result(self, risk_level: str, intervention_priority: str) -> Dict[str, Any]:
         identified_risks = [
             {
                 "risk_type": "academic_regression",
@@ -36,9 +47,6 @@ class RiskDetectionEngine:
                 "Social engagement below baseline"
             ]
 
-        priorities = ["immediate", "high", "medium", "low"]
-        intervention_priority = np.random.choice(priorities, p=[0.1, 0.2, 0.5, 0.2])
-
         recommended_actions = [
             "Schedule additional one-on-one sessions",
             "Implement sensory diet protocol",
@@ -56,6 +64,7 @@ class RiskDetectionEngine:
             "confidence": 0.76
         }
 
+    @timed_engine_call
     def continuous_monitor(self, student_id: str) -> Dict[str, Any]:
         return {
             "status": "monitoring",
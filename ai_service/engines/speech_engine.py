@@ -1,17 +1,26 @@
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List
 import base64
 import io
+from core.metrics import timed_engine_call
 
 class SpeechAnalysisEngine:
     def __init__(self):
         self.model_loaded = False
 
+    @timed_engine_call
     def analyze(self, audio_data: str, student_id: str) -> Dict[str, Any]:
-        pronunciation_score = np.random.uniform(0.6, 0.95)
-        clarity_score = np.random.uniform(0.65, 0.92)
-        fluency_score = np.random.uniform(0.55, 0.88)
+        return self._results(1)[0]
 
+    @timed_engine_call
+    def analyze_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._results(len(requests))
+
+    def _results(self, n: int) -> List[Dict[str, Any]]:
+        scores = np.random.uniform([0.6, 0.65, 0.55], [0.95, 0.92, 0.88], size=(n, 3))
+        return [self._result(*row) for row in scores]
+
+    def _result(self, pronunciation_score: float, clarity_score: float, fluency_score: float) -> Dict[str, Any]:
         detected_words = ["hello", "world", "therapy", "learning"]
         problematic_sounds = ["r", "th", "s"]
 
@@ -32,6 +41,7 @@ class SpeechAnalysisEngine:
             "confidence": round(np.mean([pronunciation_score, clarity_score, fluency_score]), 2)
         }
 
+    @timed_engine_call
     def transcribe(self, audio_data: str) -> Dict[str, Any]:
         sample_transcription = "Hello, I am learning to speak better every day."
 
@@ -1,14 +1,30 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Response
 from fastapi.middleware.cors import CORSMiddleware
+from dotenv import load_dotenv
 import uvicorn
+import asyncio
 import json
+import os
 
+load_dotenv()
+
+from core.batching import batchers
+from core.broadcast import create_broadcast
+from core.metrics import MetricsMiddleware, registry
+from core.prefork import PreforkServer
+from core.profiling import ProfilingMiddleware, PROFILING_ENABLED
+from core.serialization import EngineJSONResponse, dumps
+from db.database import database
+from db.result_writer import result_writer
+from engines.bulk_scoring import scoring_jobs
+from training.jobs import training_jobs
 from api.routes import speech, behavior, emotion, progress, iep, adaptive_learning, risk_detection, recommendations, pattern_recognition, comprehensive_analysis, training, audio_processing, video_processing
 
 app = FastAPI(
     title="AI Therapy Platform",
     description="AI-powered analysis engines for therapeutic education",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=EngineJSONResponse
 )
 
 app.add_middleware(
@@ -18,6 +34,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(speech.router, prefix="/api/speech", tags=["Speech Analysis"])
 app.include_router(behavior.router, prefix="/api/behavior", tags=["Behavior Recognition"])
@@ -51,27 +70,62 @@ async def root():
         ]
     }
 
+@app.on_event("startup")
+async def startup():
+    await result_writer.start()
+    await manager.start()
+    training_jobs.bind(asyncio.get_running_loop(), manager.broadcast)
+    scoring_jobs.bind(asyncio.get_running_loop(), manager.broadcast)
+    training.resume_training_jobs(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await manager.stop()
+    await result_writer.stop()
+    await database.disconnect()
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/batching")
+async def batching_status():
+    return {name: batcher.status() for name, batcher in batchers.items()}
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: list[WebSocket] = []
+        self.backend = create_broadcast(handler=self.deliver)
+
+    async def start(self):
+        await self.backend.start(self.deliver)
+
+    async def stop(self):
+        await self.backend.stop()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        # Goes through the backend so clients connected to other workers get it too.
+        await self.backend.publish(message)
+
+    async def deliver(self, message: dict):
+        text = dumps(message).decode("utf-8")
+        for connection in list(self.active_connections):
             try:
-                await connection.send_json(message)
-            except:
-                pass
+                await connection.send_text(text)
+            except Exception:
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
@@ -87,4 +141,8 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        PreforkServer(app, host="0.0.0.0", port=8000, workers=workers).run()
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,52 @@
+import itertools
+from math import factorial
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+
+from training.attributions import TreeAttributions
+
+# Shared by tests/test_attributions.py and benchmarks/bench_attributions.py.
+TOLERANCE = 1e-9
+
+
+def _conditional(tree, x: np.ndarray, known: set, node: int = 0) -> float:
+    # E[tree(x) | features in `known`], path-dependent (Lundberg et al.,
+    # Algorithm 1): follow x on known features, split by cover otherwise.
+    if tree.children_left[node] < 0:
+        return tree.value[node, 0, 0]
+    left, right = tree.children_left[node], tree.children_right[node]
+    if tree.feature[node] in known:
+        return _conditional(tree, x, known, left if np.float32(x[tree.feature[node]]) <= tree.threshold[node] else right)
+    cover = tree.weighted_n_node_samples
+    return (_conditional(tree, x, known, left) * cover[left]
+            + _conditional(tree, x, known, right) * cover[right]) / cover[node]
+
+
+def split_features(model: GradientBoostingClassifier) -> list:
+    return sorted({int(f) for stage in model.estimators_ for f in stage[0].tree_.feature if f >= 0})
+
+
+def brute_force(model: GradientBoostingClassifier, x: np.ndarray, features: list) -> np.ndarray:
+    # Shapley values straight from the definition, over the features the model
+    # actually splits on (the rest are exactly zero).
+    def value(known):
+        return sum(model.learning_rate * _conditional(stage[0].tree_, x, known) for stage in model.estimators_)
+
+    n = len(features)
+    phi = np.zeros(model.n_features_in_)
+    for i in features:
+        others = [j for j in features if j != i]
+        for k in range(n):
+            weight = factorial(k) * factorial(n - k - 1) / factorial(n)
+            for subset in itertools.combinations(others, k):
+                phi[i] += weight * (value(set(subset) | {i}) - value(set(subset)))
+    return phi
+
+
+def additivity_error(model, X: np.ndarray) -> float:
+    # Attributions plus the expected value against the raw decision function.
+    explainer = TreeAttributions(model)
+    raw = model.decision_function(X)
+    raw = raw[:, None] if raw.ndim == 1 else raw
+    return float(np.abs(explainer.shap_values(X).sum(axis=1) + explainer.expected_value - raw).max())
@@ -0,0 +1,16 @@
+import os
+import shutil
+import tempfile
+
+# Set before any test module imports the app: models trained at startup, job
+# records, checkpoints and caches go to a scratch directory, not the tree.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="ai_service_tests_")
+for name, path in (("MODELS_DIR", "models"), ("TRAINING_JOBS_DIR", "jobs/training"),
+                   ("BULK_SCORING_JOBS_DIR", "jobs/scoring"), ("BULK_SCORING_DIR", "scoring"),
+                   ("TRAINING_CHECKPOINT_DIR", "checkpoints"), ("FEATURE_CACHE_DIR", "feature_cache"),
+                   ("PROFILE_OUTPUT_DIR", "profiles")):
+    os.environ.setdefault(name, os.path.join(SCRATCH_DIR, path))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
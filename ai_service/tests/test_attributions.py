@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+
+from benchmarks.fixtures import SCREENING_CSV
+from tests.attribution_checks import TOLERANCE, additivity_error, brute_force, split_features
+from training.attributions import TreeAttributions
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+@pytest.fixture(scope="module")
+def screening():
+    df = pd.read_csv(SCREENING_CSV)
+    df.columns = df.columns.str.strip()
+    return FeaturePipeline(FEATURES).fit(df).transform(df), df["Class"].astype(str).str.strip()
+
+
+def test_attributions_add_up_to_the_raw_prediction(screening):
+    X, y = screening
+    multiclass = np.digitize(X[:, FEATURES.index("Age")], [4, 12])
+    models = [GradientBoostingClassifier(n_estimators=20, max_depth=4, random_state=0).fit(X, y),
+              HistGradientBoostingClassifier(max_iter=20, max_depth=4, random_state=0).fit(X, y),
+              GradientBoostingClassifier(n_estimators=5, max_depth=3, random_state=0).fit(X, multiclass)]
+    for model in models:
+        assert additivity_error(model, X) < TOLERANCE
+
+
+def test_attributions_match_the_shapley_definition(screening):
+    # Brute force is exponential in the split features, so the model is tiny.
+    X, y = screening
+    model = GradientBoostingClassifier(n_estimators=4, max_depth=2, random_state=0).fit(X, y)
+    features = split_features(model)
+    explainer = TreeAttributions(model)
+    assert len(features) > 1
+    for x in X[:3]:
+        assert np.abs(brute_force(model, x, features) - explainer.shap_values(x[None])[0, :, 0]).max() < TOLERANCE
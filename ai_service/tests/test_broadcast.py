@@ -0,0 +1,44 @@
+import asyncio
+import socket
+
+from core.broadcast import MemoryBroadcast, UnixSocketBroadcast, create_broadcast
+from core.serialization import loads
+
+
+def test_memory_backend_delivers_before_start():
+    received = []
+
+    async def deliver(message):
+        received.append(message)
+
+    asyncio.run(create_broadcast("memory://", deliver).publish({"n": 1}))
+    asyncio.run(MemoryBroadcast().publish({"n": 2}))
+    assert received == [{"n": 1}]
+
+
+def test_unix_backend_skips_peers_it_cannot_send_to(tmp_path):
+    # The peer is a plain socket: backends in one process would share a pid-named path.
+    peer = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    peer.bind(str(tmp_path / "peer.sock"))
+    peer.setblocking(False)
+    received = []
+
+    async def deliver(message):
+        received.append(message)
+
+    async def scenario():
+        publisher = UnixSocketBroadcast(str(tmp_path))
+        await publisher.publish({"n": 0})
+        await publisher.start(deliver)
+        # Far larger than any datagram the kernel accepts (EMSGSIZE).
+        await publisher.publish({"blob": "x" * (64 * 2 ** 20)})
+        await publisher.publish({"n": 1})
+        status = publisher.status()
+        await publisher.stop()
+        return status
+
+    status = asyncio.run(scenario())
+    assert status["send_errors"] == 1 and status["sent"] == 1
+    assert [message.get("n") for message in received] == [None, 1]
+    assert loads(peer.recv(1024)) == {"n": 1}
+    peer.close()
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import SCREENING_CSV, write_scaled_csv
+from engines import bulk_scoring
+from training.estimators import build_model
+from training.jobs import TrainingJobs
+from training.preprocessing import FeaturePipeline
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+def test_old_scoring_files_are_pruned_unless_their_job_is_running(tmp_path, monkeypatch):
+    jobs = TrainingJobs(directory=str(tmp_path / "jobs"))
+    monkeypatch.setattr(bulk_scoring, "scoring_jobs", jobs)
+    running, done = jobs.create("autism_screening", "bulk_scoring"), jobs.create("autism_screening", "bulk_scoring")
+    jobs.update(running, status="running")
+    jobs.update(done, status="completed")
+
+    scoring = tmp_path / "scoring"
+    (scoring / "bulk_scoring_abc").mkdir(parents=True)
+    (scoring / "bulk_scoring_abc" / "0.part").write_bytes(b"x")
+    for name in (f"{running}.input.csv", f"{done}.csv", "unknown.parquet", "fresh.csv"):
+        (scoring / name).write_bytes(b"x")
+    day_ago = time.time() - 25 * 3600
+    for name in (f"{running}.input.csv", f"{done}.csv", "unknown.parquet", "bulk_scoring_abc"):
+        os.utime(scoring / name, (day_ago, day_ago))
+
+    assert bulk_scoring.prune_scoring_files(str(scoring), 0) == 0
+    assert bulk_scoring.prune_scoring_files(str(scoring), 24) == 3
+    assert sorted(os.listdir(scoring)) == sorted([f"{running}.input.csv", "fresh.csv"])
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    df = pd.read_csv(SCREENING_CSV)
+    pipeline = FeaturePipeline(FEATURES).fit(df)
+    model = build_model("gradient_boosting", {"n_estimators": 20, "random_state": 0}).fit(pipeline.transform(df),
+                                                                                        df["Class"])
+    labels = [pipeline.label(c) for c in model.classes_]
+    return model, pipeline, labels, labels.index("YES")
+
+
+def test_parquet_output_matches_csv_output(scorer, tmp_path):
+    path = write_scaled_csv(str(tmp_path / "export.csv"), 5000)
+    # Small shards and chunks: many part files merged in order, several row groups each.
+    bulk = bulk_scoring.BulkScorer(*scorer, workers=1, shard_mb=0.05, chunk_rows=300)
+    keep = ["A1", "Age", "Sex"]
+    csv = bulk.run(path, str(tmp_path / "scores.csv"), "csv", keep)
+    parquet = bulk.run(path, str(tmp_path / "scores.parquet"), "parquet", keep)
+
+    assert csv["shards"] > 1 and csv["rows"] == parquet["rows"] == 5000
+    expected = pd.read_csv(tmp_path / "scores.csv")
+    # Kept categorical inputs stay categorical in Parquet; CSV reads them back as strings.
+    actual = pd.read_parquet(tmp_path / "scores.parquet")
+    actual["Sex"] = actual["Sex"].astype(str)
+    assert list(actual.columns) == keep + bulk_scoring.SCORE_COLUMNS
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
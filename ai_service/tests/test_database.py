@@ -0,0 +1,128 @@
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from db.database import Database, DatabaseNotConfigured
+from db.schema import metadata, model_versions, progress_tracking, student_conditions, students
+
+STUDENT = "0b6a4c1e-3f5d-4b8e-9a7c-2d1e0f9b8a76"
+OTHER = "7c2f9e4a-1b3d-4e5f-8a6b-9c0d1e2f3a4b"
+VERSIONS = ("11111111-1111-4111-8111-111111111111", "22222222-2222-4222-8222-222222222222")
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _seed(db: Database):
+    async with db.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(students.insert(), [
+            {"id": STUDENT, "full_name": "Sam Doe", "date_of_birth": date(2018, 3, 1), "gender": "m"},
+            {"id": OTHER, "full_name": "Ana Roe", "date_of_birth": date(2017, 6, 9), "gender": "f"}
+        ])
+        await conn.execute(student_conditions.insert(), [
+            {"student_id": STUDENT, "condition_type": "autism", "severity": "mild"},
+            {"student_id": STUDENT, "condition_type": "adhd", "severity": "moderate"}
+        ])
+        await conn.execute(progress_tracking.insert(), [
+            {"student_id": STUDENT, "tracking_date": date(2024, 1, day), "focus_area": "linguistic",
+             "metric_name": "articulation", "metric_value": float(day)}
+            for day in range(1, 11)
+        ] + [{"student_id": OTHER, "tracking_date": date(2024, 1, 5), "focus_area": "academic",
+              "metric_name": "reading", "metric_value": 3.0}])
+        await conn.execute(model_versions.insert(), [
+            {"id": VERSIONS[0], "model_type": "random_forest", "version_number": 1, "model_path": "a.pkl",
+             "is_active": True},
+            {"id": VERSIONS[1], "model_type": "gradient_boosting", "version_number": 2, "model_path": "b.pkl",
+             "is_active": False}
+        ])
+    # Each test runs its own event loop; pooled connections must not outlive one.
+    await db.disconnect()
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'ai.db'}")
+    _run(_seed(database))
+    yield database
+    _run(database.disconnect())
+
+
+def test_progress_history_by_student_and_date_range(db):
+    async def check():
+        everything = await db.fetch_progress_history(STUDENT)
+        window = await db.fetch_progress_history(STUDENT, date(2024, 1, 3), date(2024, 1, 6))
+        limited = await db.fetch_progress_history(STUDENT, limit=2)
+        await db.disconnect()
+        return everything, window, limited
+
+    everything, window, limited = _run(check())
+    assert len(everything) == 10
+    assert {row["student_id"] for row in everything} == {STUDENT}
+    assert [row["tracking_date"] for row in window] == ["2024-01-06", "2024-01-05", "2024-01-04", "2024-01-03"]
+    assert [row["metric_value"] for row in limited] == [10.0, 9.0]
+
+
+def test_inline_history_skips_the_database(db):
+    provided = [{"metric_value": 1}]
+    assert _run(db.resolve_progress_history(STUDENT, provided)) is provided
+
+
+def test_students_come_with_their_conditions(db):
+    async def check():
+        found = await db.fetch_students([STUDENT, OTHER])
+        missing = await db.fetch_student("00000000-0000-4000-8000-000000000000")
+        await db.disconnect()
+        return found, missing
+
+    found, missing = _run(check())
+    by_id = {student["id"]: student for student in found}
+    assert sorted(c["condition_type"] for c in by_id[STUDENT]["conditions"]) == ["adhd", "autism"]
+    assert by_id[OTHER]["conditions"] == []
+    assert missing is None
+
+
+def test_activating_a_model_version_deactivates_the_others(db):
+    async def check():
+        activated = await db.activate_model_version(VERSIONS[1])
+        active = await db.fetch_active_model_version()
+        previous = await db.fetch_model_version(VERSIONS[0])
+        with pytest.raises(LookupError):
+            await db.activate_model_version("33333333-3333-4333-8333-333333333333")
+        await db.disconnect()
+        return activated, active, previous
+
+    activated, active, previous = _run(check())
+    assert activated["is_active"] and active["id"] == VERSIONS[1]
+    assert not previous["is_active"]
+
+
+def test_unconfigured_database_raises():
+    with pytest.raises(DatabaseNotConfigured):
+        _run(Database(None).fetch_progress_history(STUDENT))
+
+
+def test_progress_route_reads_history_by_id(db, monkeypatch):
+    from api.routes import progress
+
+    seen = {}
+    predict = progress.progress_engine.predict
+
+    def spy(student_id, progress_data):
+        seen["rows"] = progress_data
+        return predict(student_id, progress_data)
+
+    monkeypatch.setattr(progress, "database", db)
+    monkeypatch.setattr(progress.progress_engine, "predict", spy)
+    monkeypatch.setattr(progress.result_writer, "submit", lambda *args, **kwargs: None)
+    app = FastAPI()
+    app.include_router(progress.router, prefix="/api/progress")
+
+    response = TestClient(app).post("/api/progress/predict", json={
+        "student_id": STUDENT, "start_date": "2024-01-08", "end_date": None})
+    assert response.status_code == 200
+    assert [row["tracking_date"] for row in seen["rows"]] == ["2024-01-10", "2024-01-09", "2024-01-08"]
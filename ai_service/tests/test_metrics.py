@@ -0,0 +1,40 @@
+import json
+import os
+
+from core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def _registry():
+    registry = Registry()
+    requests = registry.register(Counter("requests", "Requests", ("route",)))
+    in_flight = registry.register(Gauge("in_flight", "In flight"))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    return registry, requests, in_flight, latency
+
+
+def test_shared_registry_renders_every_worker(tmp_path):
+    # Another worker's snapshot, written under a pid that has since exited.
+    other, requests, in_flight, latency = _registry()
+    requests.inc(3, "/a")
+    in_flight.set(7)
+    latency.observe(0.5)
+    exited = 2 ** 22 + 12345
+    with open(tmp_path / f"{exited}.json", "w") as f:
+        json.dump({name: metric.dump() for name, metric in other.metrics.items()}, f)
+
+    registry, requests, in_flight, latency = _registry()
+    registry.share(str(tmp_path))
+    requests.inc(2, "/a")
+    requests.inc(1, "/b")
+    in_flight.set(1)
+    latency.observe(0.05)
+    text = registry.render()
+
+    assert 'requests_total{route="/a"} 5' in text and 'requests_total{route="/b"} 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text and 'latency_seconds_count 2' in text
+    # Gauges are per live worker, so the exited one's is gone.
+    assert f'in_flight{{worker="{os.getpid()}"}} 1' in text and f'worker="{exited}"' not in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+    # The worker's own metrics are untouched by the merge.
+    registry.directory = None
+    assert 'requests_total{route="/a"} 2' in registry.render()
@@ -0,0 +1,18 @@
+import pickle
+
+import pytest
+
+from engines.model_cache import ModelCache
+
+
+def test_failed_load_does_not_leave_a_loading_lock(tmp_path):
+    cache = ModelCache(models_dir=str(tmp_path))
+    (tmp_path / "broken.pkl").write_bytes(b"not a pickle")
+    with open(tmp_path / "plain.pkl", "wb") as f:
+        pickle.dump({"weights": [1, 2]}, f)
+
+    with pytest.raises(pickle.UnpicklingError):
+        cache.get("broken")
+    with pytest.raises(ValueError):
+        cache.get("plain")
+    assert cache._loading == {} and cache.entries == {}
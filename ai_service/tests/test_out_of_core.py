@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import write_scaled_csv
+from training.out_of_core import OutOfCoreTrainer, holdout_mask
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+
+
+@pytest.fixture(scope="module")
+def sorted_csv(tmp_path_factory):
+    # The worst case for streaming SGD: every NO row before every YES row.
+    path = str(tmp_path_factory.mktemp("out_of_core") / "export.csv")
+    df = pd.read_csv(write_scaled_csv(path, 20000))
+    df.columns = df.columns.str.strip()
+    df.sort_values("Class", kind="stable").to_csv(path, index=False)
+    return path
+
+
+def test_batches_from_a_class_sorted_file_are_mixed(sorted_csv):
+    trainer = OutOfCoreTrainer(sorted_csv, FEATURES, "Class", chunk_rows=1000)
+    trainer._prepare()
+    positive = list(trainer.classes).index("YES")
+    rates, rows, held_out = [], 0, 0
+    for X, codes, test in trainer.shuffled_batches(np.random.default_rng(0)):
+        rates.append(float(np.mean(codes == positive)))
+        rows += len(codes)
+        held_out += int(test.sum())
+
+    overall = float(np.mean(pd.read_csv(sorted_csv)["Class"] == "YES"))
+    # Every row once per epoch, each with the split it has in every other pass.
+    assert rows == 20000
+    assert held_out == int(holdout_mask(0, 20000, trainer.train_split, trainer.random_state).sum())
+    # In file order nearly every batch would be all NO or all YES.
+    assert max(abs(rate - overall) for rate in rates) < 0.25
+
+
+def test_first_epoch_of_a_single_chunk_reports_no_validation_metrics(sorted_csv):
+    trainer = OutOfCoreTrainer(sorted_csv, FEATURES, "Class", epochs=2, chunk_rows=50000)
+    history = []
+    trainer.fit(on_epoch=history.append)
+    assert len(trainer.ranges) == 1
+    assert history[0]["validation_accuracy"] is None and history[0]["validation_loss"] is None
+    assert history[1]["validation_accuracy"] > 0.5
@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import OperationalError
+
+from db.result_writer import AnalysisResultWriter
+
+
+class FakeDatabase:
+    # Records inserted rows; execute can be slowed down or made to fail.
+    enabled = True
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, during_insert=None):
+        self.delay = delay
+        self.fail = fail
+        self.during_insert = during_insert
+        self.rows = []
+        self.attempts = 0
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+
+    async def execute(self, statement, rows):
+        self.attempts += 1
+        if self.during_insert:
+            self.during_insert()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        self.rows.extend(rows if isinstance(rows, list) else [rows])
+
+
+def _submit(writer: AnalysisResultWriter, n: int, start: int = 0):
+    for i in range(start, start + n):
+        writer.submit(str(uuid.uuid4()), "speech", {"confidence": 0.5, "n": i})
+
+
+def test_stop_waits_for_the_insert_in_flight():
+    async def scenario():
+        db = FakeDatabase(delay=0.2)
+        writer = AnalysisResultWriter(db, enabled=True, batch_size=10, flush_interval=60)
+        await writer.start()
+        _submit(writer, 25)
+        await asyncio.sleep(0.05)
+        # The background loop is now suspended inside execute().
+        await writer.stop()
+        return db, writer
+
+    db, writer = asyncio.run(scenario())
+    assert sorted(row["results"]["n"] for row in db.rows) == list(range(25))
+    assert writer.stats["written"] == 25 and not writer.buffer
+
+
+def test_cancelled_flush_puts_its_batch_back():
+    async def scenario():
+        writer = AnalysisResultWriter(FakeDatabase(delay=1), enabled=True, batch_size=10)
+        _submit(writer, 15)
+        task = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [row["results"]["n"] for row in writer.buffer] == list(range(15))
+
+
+def test_requeue_into_a_full_buffer_counts_the_overflow():
+    writer = None
+
+    def fill():
+        # New traffic fills the buffer while the failing insert is running.
+        _submit(writer, 8, start=100)
+
+    async def scenario():
+        return await writer.flush()
+
+    writer = AnalysisResultWriter(FakeDatabase(fail=True, during_insert=fill), enabled=True, batch_size=5,
+                                  max_buffer=10)
+    _submit(writer, 5)
+    assert asyncio.run(scenario()) is False
+    kept = [row["results"]["n"] for row in writer.buffer]
+    assert len(kept) == 10
+    # The 3 oldest retried rows did not fit; everything else is kept in order.
+    assert kept == [3, 4] + list(range(100, 108))
+    assert writer.stats["dropped"] == 3
+    assert writer.stats["submitted"] == 13
+
+
+def test_failed_flushes_back_off_instead_of_retrying_per_request():
+    async def scenario():
+        db = FakeDatabase(fail=True)
+        writer = AnalysisResultWriter(db, enabled=True, batch_size=2, flush_interval=0.4, retry_delay=0.05)
+        await writer.start()
+        # 100 requests over about half a second, each enough for a full batch.
+        for i in range(100):
+            _submit(writer, 1, start=i)
+            await asyncio.sleep(0.005)
+        attempts = db.attempts
+        db.fail = False
+        await asyncio.sleep(0.5)
+        await writer.stop()
+        return db, writer, attempts
+
+    db, writer, attempts = asyncio.run(scenario())
+    # Retries after 0.05, 0.1, 0.2 and 0.4s rather than one per request.
+    assert 2 <= attempts <= 6
+    assert sorted(row["results"]["n"] for row in db.rows) == list(range(100))
+    assert writer.status()["retry_in_seconds"] == 0
+
+
+def test_submit_returns_the_id_of_the_row_it_keeps():
+    writer = AnalysisResultWriter(FakeDatabase(), enabled=True)
+    session_id = str(uuid.uuid4())
+    row_id = writer.submit(str(uuid.uuid4()), "speech", {"confidence": 0.5}, {"audio_data": "reference"}, session_id)
+    assert writer.buffer[0]["id"] == row_id
+    assert writer.buffer[0]["session_id"] == session_id and writer.buffer[0]["input_data"] == {"audio_data": "reference"}
+    assert writer.submit("not-a-uuid", "speech", {}) is None
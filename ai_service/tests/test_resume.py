@@ -0,0 +1,91 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.routes.training import TrainingRequest
+from benchmarks.fixtures import write_scaled_csv
+from training import runner
+from training.checkpoints import Checkpointer, CheckpointStore
+from training.jobs import TrainingJobs
+
+FEATURES = [f"A{i}" for i in range(1, 11)] + ["Age", "Sex", "Jauundice", "Family_ASD"]
+METRICS = ("accuracy", "precision", "recall", "f1_score")
+BASE = {"dataset_id": "export.csv", "target_column": "Class", "feature_columns": FEATURES, "train_test_split": 0.8}
+
+
+class Killed(BaseException):
+    # Not an Exception, so run_training_job cannot record it as a failure and
+    # clear the checkpoint: the job stops the way a SIGKILL leaves it.
+    pass
+
+
+@pytest.fixture
+def training(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_scaled_csv(str(data_dir / "export.csv"), 5000)
+    monkeypatch.setattr(runner, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(runner, "MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(runner, "TRAINING_CHECKPOINT_STAGES", 10)
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(runner, "training_checkpoints", store)
+    kills = []
+    save = Checkpointer.save
+
+    def save_then_die(self, force=False, **updates):
+        # Every save is written, and a pending kill lands right after one.
+        save(self, True, **updates)
+        if kills:
+            kills.pop()
+            raise Killed()
+
+    monkeypatch.setattr(Checkpointer, "save", save_then_die)
+    return TrainingJobs(directory=str(tmp_path / "jobs")), store, kills
+
+
+def _predictions(result, df):
+    with open(result["model_path"], "rb") as f:
+        bundle = pickle.load(f)
+    return bundle["model"].predict_proba(bundle["pipeline"].transform(df))
+
+
+@pytest.mark.parametrize("request_fields, resumed_from", [
+    ({"model_type": "random_forest", "hyperparameters": {"n_estimators": 40, "random_state": 0}}, ["ensemble"]),
+    ({"model_type": "sgd_logistic", "hyperparameters": {},
+      "out_of_core": {"enabled": True, "epochs": 4, "chunk_rows": 1000}}, ["out_of_core"])
+])
+def test_killed_training_job_resumes_to_the_same_model(training, request_fields, resumed_from):
+    jobs, store, kills = training
+    reference_id = jobs.create("reference", "training")
+    reference = runner.run_training_job(reference_id, TrainingRequest(**BASE, **request_fields,
+                                                                      configuration_id="reference"), jobs)
+
+    request = TrainingRequest(**BASE, **request_fields, configuration_id="resumed")
+    job_id = jobs.create("resumed", "training")
+    kills.append(True)
+    with pytest.raises(Killed):
+        runner.run_training_job(job_id, request, jobs)
+    assert store.load(job_id) is not None and jobs.get(job_id)["status"] == "running"
+    # The kernel would drop the dead worker's flock.
+    store.release(job_id)
+
+    result = runner.run_training_job(job_id, request, jobs)
+    assert result["checkpoint"]["resumed_from"] == resumed_from
+    assert {key: result[key] for key in METRICS} == {key: reference[key] for key in METRICS}
+    df = pd.read_csv(os.path.join(runner.DATA_DIR, "export.csv"))
+    df.columns = df.columns.str.strip()
+    assert np.array_equal(_predictions(result, df), _predictions(reference, df))
+    assert not os.path.exists(os.path.join(store.directory, job_id))
+
+
+@pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="spawns workers and kills them; set RUN_BENCHMARKS=1")
+def test_killed_training_workers_resume_to_the_same_model():
+    from benchmarks import bench_resume
+
+    # End to end over HTTP: a worker SIGKILLed after its first save, a fresh
+    # one resuming the job at startup.
+    report = bench_resume.run(rows=5000, names=["random_forest", "out_of_core"], timeout=120)
+    assert report["passed"], report["scenarios"]
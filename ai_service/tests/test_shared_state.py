@@ -0,0 +1,233 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from engines import model_manager
+from engines.adaptive_learning_engine import AdaptiveLearningEngine
+from engines.model_manager import ModelManager
+from training.jobs import TrainingJobs
+
+# Two instances over the same directory stand in for two prefork workers.
+
+
+def test_jobs_started_by_one_worker_are_visible_to_another(tmp_path):
+    first, second = TrainingJobs(directory=str(tmp_path)), TrainingJobs(directory=str(tmp_path))
+    job_id = first.create("config", "single")
+    first.update(job_id, status="running")
+    first.add_metric(job_id, {"epoch": 1, "training_loss": 0.4})
+
+    job = second.get(job_id)
+    assert job["status"] == "running" and job["current_epoch"] == 1 and len(job["metrics"]) == 1
+    assert [summary["job_id"] for summary in second.list()] == [job_id]
+
+    first.update(job_id, status="completed", result={"accuracy": np.float64(0.9)})
+    assert second.get(job_id)["result"] == {"accuracy": 0.9}
+
+
+def test_finished_job_records_are_pruned_across_workers(tmp_path):
+    first, second = TrainingJobs(2, str(tmp_path)), TrainingJobs(2, str(tmp_path))
+    for _ in range(3):
+        first.update(first.create("config", "single"), status="completed")
+    second.create("config", "single")
+    # first keeps its own two newest, second keeps its pending job.
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+def test_bandit_saves_merge_results_from_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADAPTIVE_BANDIT_PATH", str(tmp_path / "bandit.npz"))
+    first, second = AdaptiveLearningEngine(), AdaptiveLearningEngine()
+    first.record_results([{"student_id": "a", "activity": "Memory Matching", "score": 1.0}] * 3)
+    second.record_results([{"student_id": "a", "activity": "Memory Matching", "score": 0.0}] * 2
+                          + [{"student_id": "b", "activity": "Rhythm Clapping", "score": 0.5}])
+    first.save()
+    second.save()
+    first.save()
+
+    saved = AdaptiveLearningEngine()
+    assert saved.bandit.n_students == 2
+    assert int(saved.bandit.observations(["a"])[0]) == 5
+    assert int(saved.bandit.observations(["b"])[0]) == 1
+    assert int(first.bandit.observations(["a"])[0]) == 5
+
+
+def test_unsaved_bandit_results_are_kept_as_counts(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADAPTIVE_BANDIT_PATH", str(tmp_path / "bandit.npz"))
+    engine = AdaptiveLearningEngine()
+    for _ in range(50):
+        engine.record_results([{"student_id": "a", "activity": "Memory Matching", "score": 1.0}] * 20)
+    # One row per student however many results, not a log of every batch.
+    assert engine._unsaved.n_students == 1 and int(engine._unsaved.pulls.sum()) == 1000
+
+    # A failed save keeps the counts for the next one.
+    (tmp_path / "not_a_directory").write_text("")
+    engine.bandit_path = str(tmp_path / "not_a_directory" / "bandit.npz")
+    with pytest.raises(OSError):
+        engine.save()
+    engine.bandit_path = str(tmp_path / "bandit.npz")
+    assert int(engine._unsaved.pulls.sum()) == 1000
+    engine.save()
+    assert int(AdaptiveLearningEngine().bandit.observations(["a"])[0]) == 1000
+    assert int(engine._unsaved.pulls.sum()) == 0
+
+
+class FakeDatabase:
+    enabled = False
+
+
+class FakeBundle:
+    def __init__(self, path, version=None):
+        self.path = path
+        self.version = version or {}
+        self.mtime_ns = None
+
+    def describe(self):
+        return {"path": self.path, "version_id": self.version.get("id")}
+
+
+class FakeEngine:
+    model_path, encoders_path = "base.pkl", None
+
+    def __init__(self):
+        self.active = FakeBundle("base.pkl")
+
+    def swap_model(self, bundle):
+        previous, self.active = self.active, bundle
+        return previous
+
+
+def test_reload_in_one_worker_is_followed_by_the_others(tmp_path, monkeypatch):
+    loads = []
+
+    def load(path, encoders_path, version):
+        loads.append(path)
+        if path == "broken.pkl":
+            raise ValueError("bad pickle")
+        return FakeBundle(path, version)
+
+    monkeypatch.setattr(model_manager, "resolve_model_path", lambda path: path)
+    monkeypatch.setattr(model_manager.ScreeningModel, "load", staticmethod(load))
+    active_file = str(tmp_path / "active_model.json")
+    first, second = (ModelManager(FakeEngine(), FakeDatabase(), 0, active_file) for _ in range(2))
+
+    async def scenario():
+        await first.reload(model_path="v2.pkl")
+        assert await first.check() is False
+        assert await second.check() is True
+        assert second.engine.active.path == "v2.pkl"
+        assert await second.check() is False
+
+        # A worker already serving the published model does not load it again.
+        third = ModelManager(FakeEngine(), FakeDatabase(), 0, active_file)
+        third.engine.active = FakeBundle("v2.pkl")
+        assert await third.check() is False
+
+        # A published model that fails to load is not retried every tick.
+        with open(active_file, "w") as f:
+            f.write('{"token": "t", "path": "broken.pkl", "version": {}, "encoders_path": null}')
+        for _ in range(2):
+            try:
+                await second.check()
+            except ValueError:
+                pass
+        assert second.engine.active.path == "v2.pkl"
+
+    asyncio.run(scenario())
+    assert loads == ["v2.pkl", "v2.pkl", "broken.pkl"]
+
+
+def test_failed_reload_of_a_changed_file_is_not_retried(tmp_path, monkeypatch):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"v1")
+    attempts = []
+
+    def load(path, encoders_path, version):
+        attempts.append(path)
+        raise ValueError("truncated pickle")
+
+    monkeypatch.setattr(model_manager, "resolve_model_path", lambda path: path)
+    monkeypatch.setattr(model_manager.ScreeningModel, "load", staticmethod(load))
+    engine = FakeEngine()
+    engine.active = FakeBundle(str(path))
+    engine.active.mtime_ns = path.stat().st_mtime_ns - 1
+    manager = ModelManager(engine, FakeDatabase(), 0, str(tmp_path / "active_model.json"))
+
+    async def scenario():
+        for _ in range(3):
+            try:
+                await manager.check()
+            except ValueError:
+                pass
+
+    asyncio.run(scenario())
+    assert attempts == [str(path)]
+    path.write_bytes(b"v2")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 10 ** 9))
+    asyncio.run(scenario())
+    assert attempts == [str(path)] * 2
+
+
+class FakeVersionDatabase:
+    enabled = True
+
+    def __init__(self, active):
+        self.versions = {v: {"id": v, "model_path": f"{v}.pkl"} for v in ("v1", "v2", "v3", "v4")}
+        self.active = active
+        self.fail = False
+
+    async def fetch_active_model_version(self):
+        return self.versions[self.active]
+
+    async def fetch_model_version(self, version_id):
+        return self.versions.get(version_id)
+
+    async def activate_model_version(self, version_id):
+        if self.fail:
+            raise OSError("connection refused")
+        self.active = version_id
+
+
+def test_database_polling_only_follows_a_new_activation(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_manager, "resolve_model_path", lambda path: path)
+    monkeypatch.setattr(model_manager.ScreeningModel, "load",
+                        staticmethod(lambda path, encoders_path, version: FakeBundle(path, version)))
+    db = FakeVersionDatabase("v1")
+    active_file = str(tmp_path / "active_model.json")
+    first, second = (ModelManager(FakeEngine(), db, 0, active_file) for _ in range(2))
+
+    async def scenario():
+        # The row active at startup is adopted.
+        assert await first.check() is True and first.engine.active.path == "v1.pkl"
+        assert await second.check() is True
+
+        # Explicit reloads to a file or a non-active version survive the next
+        # ticks, here and in the other worker.
+        for reload in ({"model_path": "manual.pkl"}, {"version_id": "v2"}):
+            await first.reload(**reload)
+            expected = first.engine.active.path
+            await first.check()
+            await second.check()
+            assert first.engine.active.path == second.engine.active.path == expected != "v1.pkl"
+
+        # A failed DB write leaves every worker on the current model.
+        db.fail = True
+        try:
+            await first.activate("v3")
+        except OSError:
+            pass
+        assert first.engine.active.path == "v2.pkl" and await second.check() is False
+
+        db.fail = False
+        await first.activate("v3")
+        assert db.active == "v3" and first.engine.active.path == "v3.pkl"
+        assert await first.check() is False
+        assert await second.check() is True and second.engine.active.path == "v3.pkl"
+        assert await second.check() is False
+
+        # An activation made elsewhere is followed once.
+        db.active = "v4"
+        assert await first.check() is True and first.engine.active.path == "v4.pkl"
+        assert await first.check() is False
+
+    asyncio.run(scenario())
@@ -0,0 +1,196 @@
+import functools
+import os
+from math import factorial
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+
+from training.boosting import _init_raw
+
+ATTRIBUTION_MAX_PATH_FEATURES = int(os.getenv("ATTRIBUTION_MAX_PATH_FEATURES", "8"))
+# rows x path conditions evaluated per block; bounds the temporaries of a batch.
+ATTRIBUTION_BLOCK_CELLS = int(os.getenv("ATTRIBUTION_BLOCK_CELLS", "4000000"))
+
+
+def _gradient_boosting_trees(model: GradientBoostingClassifier):
+    for stage in model.estimators_:
+        for k, estimator in enumerate(stage):
+            tree = estimator.tree_
+            yield k, {
+                "left": tree.children_left, "right": tree.children_right, "feature": tree.feature,
+                "threshold": tree.threshold, "value": model.learning_rate * tree.value[:, 0, 0],
+                "cover": tree.weighted_n_node_samples, "nan_left": np.zeros(tree.node_count, dtype=bool),
+                "is_leaf": tree.children_left < 0
+            }
+
+
+def _hist_gradient_boosting_trees(model: HistGradientBoostingClassifier):
+    for predictors in model._predictors:
+        for k, predictor in enumerate(predictors):
+            nodes = predictor.nodes
+            if nodes["is_categorical"].any():
+                raise ValueError("Attributions do not support categorical splits")
+            yield k, {
+                "left": nodes["left"].astype(np.int64), "right": nodes["right"].astype(np.int64),
+                "feature": nodes["feature_idx"], "threshold": nodes["num_threshold"], "value": nodes["value"],
+                "cover": nodes["count"].astype(np.float64), "nan_left": nodes["missing_go_to_left"].astype(bool),
+                "is_leaf": nodes["is_leaf"].astype(bool)
+            }
+
+
+def _leaf_paths(tree: Dict[str, np.ndarray]):
+    # Every root-to-leaf path as (leaf value, cover fraction, conditions),
+    # conditions being (feature, threshold, went_left, nan_left, zero fraction).
+    stack = [(0, [])]
+    while stack:
+        node, path = stack.pop()
+        if tree["is_leaf"][node]:
+            yield tree["value"][node], tree["cover"][node] / tree["cover"][0], path
+            continue
+        split = (tree["feature"][node], tree["threshold"][node], tree["nan_left"][node])
+        for child, went_left in ((tree["left"][node], True), (tree["right"][node], False)):
+            fraction = tree["cover"][child] / tree["cover"][node]
+            stack.append((child, path + [(*split, went_left, fraction)]))
+
+
+@functools.lru_cache(maxsize=None)
+def _pattern_weights(m: int) -> Tuple[np.ndarray, np.ndarray]:
+    # For a leaf whose path uses m distinct features, the record either follows
+    # the path on feature j or not (o_j), and the tree's cover sends a fraction
+    # z_j of the "feature unknown" mass down it. Path-dependent TreeSHAP is
+    #   phi_i = v (o_i - z_i) sum_{S in A} w(|S|) prod_{j not in S, j != i} z_j
+    # with A the features (other than i) the record follows and
+    # w(k) = k! (m-k-1)! / m!. Writing the sum over T = complement of S gives a
+    # fixed weight M[o, i, T] on the monomial prod_{j in T} z_j.
+    n = 1 << m
+    full = n - 1
+    patterns = np.arange(n)
+    bits = (patterns[:, None] >> np.arange(m)) & 1
+    sizes = np.array([bin(t).count("1") for t in range(n)])
+    weights = np.array([factorial(k) * factorial(m - k - 1) / factorial(m) for k in range(m)])
+    i_bit = 1 << np.arange(m)
+    outside = (~patterns[:, None]) & full & ~i_bit[None, :]
+    T = patterns[None, None, :]
+    valid = ((T & i_bit[None, :, None]) == 0) & ((outside[:, :, None] & ~T) == 0)
+    M = np.where(valid, weights[np.clip(m - 1 - sizes, 0, m - 1)][None, None, :], 0.0)
+    return M, bits.astype(np.float64)
+
+
+class TreeAttributions:
+    # Exact path-dependent TreeSHAP for sklearn boosted trees, rearranged per
+    # leaf: a leaf's contribution only depends on which of its path features the
+    # record follows, so every (leaf, follow pattern) pair is tabulated once when
+    # the explainer is built. Explaining a batch is then one vectorized pass:
+    # compare the batch against all path conditions, fold them into a pattern per
+    # leaf (two sparse products), gather from the tables and sum per feature.
+    # Values are in raw score (log-odds) units and sum, with expected_value, to
+    # decision_function.
+    def __init__(self, model, max_path_features: int = ATTRIBUTION_MAX_PATH_FEATURES):
+        if isinstance(model, GradientBoostingClassifier):
+            trees = _gradient_boosting_trees(model)
+            n_columns = model.estimators_.shape[1]
+            base = _init_raw(model, np.zeros((1, model.n_features_in_)))[0]
+            self.float32 = True  # sklearn trees compare float32 features
+        elif isinstance(model, HistGradientBoostingClassifier):
+            trees = _hist_gradient_boosting_trees(model)
+            n_columns = model.n_trees_per_iteration_
+            base = np.asarray(model._baseline_prediction, dtype=np.float64).ravel()
+            self.float32 = False
+        else:
+            raise ValueError(f"Attributions support gradient boosting models, not {type(model).__name__}")
+        self.n_features = model.n_features_in_
+        self.n_columns = n_columns
+        self.expected_value = base.astype(np.float64).copy()
+
+        conditions, slots, leaves = [], [], []
+        for k, tree in trees:
+            for value, cover, path in _leaf_paths(tree):
+                self.expected_value[k] += value * cover
+                features, zero = [], []
+                for feature, threshold, nan_left, went_left, fraction in path:
+                    if feature not in features:
+                        features.append(feature)
+                        zero.append(1.0)
+                    position = features.index(feature)
+                    zero[position] *= fraction
+                    conditions.append((len(slots) + position, feature, threshold, went_left, nan_left))
+                if not features:
+                    continue
+                if len(features) > max_path_features:
+                    raise ValueError(f"A tree path uses {len(features)} features; "
+                                     f"attributions are limited to {max_path_features}")
+                slots.extend((len(leaves), position) for position in range(len(features)))
+                leaves.append((value, np.array(zero), [k * self.n_features + f for f in features]))
+
+        conditions.sort(key=lambda c: c[0])
+        self.cond_feature = np.array([c[1] for c in conditions], dtype=np.int64)
+        self.cond_threshold = np.array([c[2] for c in conditions], dtype=np.float64)
+        self.cond_threshold32 = self.cond_threshold.astype(np.float32)
+        self.cond_left = np.array([c[3] for c in conditions], dtype=bool)
+        self.cond_nan_left = np.array([c[4] for c in conditions], dtype=bool)
+        # A slot (leaf, path feature) is followed when none of its conditions
+        # fail; a leaf's pattern is the bitmask of its followed slots.
+        n_conditions, n_slots = len(conditions), len(slots)
+        slot_leaf = np.array([leaf for leaf, _ in slots], dtype=np.int64)
+        slot_bit = np.array([1 << position for _, position in slots], dtype=np.float32)
+        self.condition_slots = sparse.csr_matrix(
+            (np.ones(n_conditions, dtype=np.float32), ([c[0] for c in conditions], np.arange(n_conditions))),
+            shape=(n_slots, n_conditions))
+        self.slot_patterns = sparse.csr_matrix((slot_bit, (slot_leaf, np.arange(n_slots))), shape=(len(leaves), n_slots))
+
+        # Leaves grouped by path length m. Each group keeps a table with one row
+        # per (position, leaf) and one column per pattern, holding v * coefficient,
+        # and a sparse map from those rows to output (feature, raw column) cells.
+        self.groups = []
+        lengths = np.array([len(zero) for _, zero, _ in leaves])
+        for m in np.unique(lengths):
+            ids = np.flatnonzero(lengths == m)
+            M, bits = _pattern_weights(int(m))
+            values = np.array([leaves[i][0] for i in ids])
+            zero = np.stack([leaves[i][1] for i in ids])
+            monomials = np.ones((len(ids), 1 << m))
+            for j in range(m):
+                monomials[:, (np.arange(1 << m) >> j) & 1 == 1] *= zero[:, j:j + 1]
+            table = (bits[None] - zero[:, None, :]) * np.einsum("lt,bit->lbi", monomials, M) * values[:, None, None]
+            columns = np.array([[leaves[i][2][j] for i in ids] for j in range(m)]).ravel()
+            outputs = sparse.csr_matrix((np.ones(len(columns)), (columns, np.arange(len(columns)))),
+                                        shape=(n_columns * self.n_features, len(columns)))
+            self.groups.append((int(m), ids, table.transpose(2, 0, 1).reshape(m * len(ids), 1 << m), outputs))
+
+    def _block(self, X: np.ndarray) -> np.ndarray:
+        # Laid out (conditions, rows) so the sparse products see contiguous rows.
+        values = X.T[self.cond_feature]
+        if self.float32:
+            goes_left = values.astype(np.float32) <= self.cond_threshold32[:, None]
+        else:
+            goes_left = values <= self.cond_threshold[:, None]
+        missing = np.isnan(values)
+        if missing.any():
+            goes_left = np.where(missing, self.cond_nan_left[:, None], goes_left)
+        fails = (goes_left != self.cond_left[:, None]).astype(np.float32)
+        follows = ((self.condition_slots @ fails) == 0).astype(np.float32)
+        patterns = (self.slot_patterns @ follows).astype(np.int64)
+        out = np.zeros((self.n_columns * self.n_features, len(X)))
+        for m, ids, table, outputs in self.groups:
+            out += outputs @ np.take_along_axis(table, np.tile(patterns[ids], (m, 1)), axis=1)
+        return out.T
+
+    def shap_values(self, X) -> np.ndarray:
+        # (rows, features, raw columns); binary models have one raw column.
+        X = np.asarray(X, dtype=np.float64)
+        out = np.zeros((len(X), self.n_columns * self.n_features))
+        if self.groups:
+            step = max(1, ATTRIBUTION_BLOCK_CELLS // max(1, len(self.cond_feature)))
+            for start in range(0, len(X), step):
+                out[start:start + step] = self._block(X[start:start + step])
+        return out.reshape(len(X), self.n_columns, self.n_features).transpose(0, 2, 1)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "leaves": sum(len(ids) for _, ids, _, _ in self.groups),
+            "path_conditions": len(self.cond_feature),
+            "table_entries": sum(table.size for _, _, table, _ in self.groups),
+            "expected_value": self.expected_value.tolist()
+        }
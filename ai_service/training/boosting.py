@@ -0,0 +1,178 @@
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+
+EARLY_STOPPING_PATIENCE = int(os.getenv("EARLY_STOPPING_PATIENCE", "10"))
+EARLY_STOPPING_TOL = float(os.getenv("EARLY_STOPPING_TOL", "1e-4"))
+
+MetricCallback = Callable[[Dict[str, Any]], None]
+
+_EPS = 1e-15
+
+
+def _init_raw(model: GradientBoostingClassifier, X: np.ndarray) -> np.ndarray:
+    # Raw scores of the initial estimator, the same transform sklearn applies
+    # before the first stage: log-odds for two classes, log-probabilities
+    # otherwise.
+    n_columns = 1 if len(model.classes_) == 2 else len(model.classes_)
+    if model.init_ == "zero":
+        return np.zeros((len(X), n_columns))
+    proba = np.clip(model.init_.predict_proba(X), _EPS, 1 - _EPS)
+    if n_columns == 1:
+        return np.log(proba[:, 1] / (1 - proba[:, 1]))[:, None]
+    return np.log(proba)
+
+
+def _log_loss(codes: np.ndarray, raw: np.ndarray) -> float:
+    # Straight from raw scores: no probabilities, and no log(0) to clip.
+    if raw.shape[1] == 1:
+        return float(np.mean(np.logaddexp(0.0, raw[:, 0]) - codes * raw[:, 0]))
+    top = raw.max(axis=1)
+    log_norm = top + np.log(np.exp(raw - top[:, None]).sum(axis=1))
+    return float(np.mean(log_norm - raw[np.arange(len(codes)), codes]))
+
+
+def _predicted(raw: np.ndarray) -> np.ndarray:
+    return (raw[:, 0] > 0).astype(int) if raw.shape[1] == 1 else raw.argmax(axis=1)
+
+
+def confusion_counts(codes: np.ndarray, predicted: np.ndarray, n_classes: int) -> np.ndarray:
+    return np.bincount(codes * n_classes + predicted, minlength=n_classes ** 2).reshape(n_classes, n_classes)
+
+
+def weighted_scores(confusion: np.ndarray) -> Dict[str, float]:
+    # precision/recall/f1 with average='weighted' from a confusion matrix;
+    # sklearn's scorers cost milliseconds each, which would dominate a
+    # per-tree callback, and a matrix can be summed over chunks.
+    n_classes = len(confusion)
+    true_positive = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted_count = confusion.sum(axis=0)
+    precision = np.divide(true_positive, predicted_count, out=np.zeros(n_classes), where=predicted_count > 0)
+    recall = np.divide(true_positive, support, out=np.zeros(n_classes), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(n_classes), where=precision + recall > 0)
+    weights = support / max(1, support.sum())
+    return {
+        "precision": float(weights @ precision),
+        "recall": float(weights @ recall),
+        "f1_score": float(weights @ f1)
+    }
+
+
+class EarlyStoppingBooster:
+    # Grows a GradientBoostingClassifier one stage at a time through sklearn's
+    # fit monitor and scores the held-out split incrementally (each new tree
+    # is added to running raw scores, so evaluation stays O(rows) per stage).
+    # Fitting stops once validation log loss has not improved by tol for
+    # `patience` stages; like sklearn's n_iter_no_change, the trees grown
+    # while waiting are kept. Every stage is reported in the shape of a
+    # training_metrics row. With checkpoint_every the ensemble is grown that
+    # many stages per warm-started fit call and, between calls, the partial
+    # model and the monitor's running scores go to on_checkpoint; fit(resume=)
+    # continues from such a state and ends with the same trees.
+    def __init__(self, hyperparameters: Optional[Dict[str, Any]] = None, validation_fraction: float = 0.1,
+                 patience: int = EARLY_STOPPING_PATIENCE, tol: float = EARLY_STOPPING_TOL, random_state: int = 42):
+        if not 0 < validation_fraction < 1:
+            raise ValueError("validation_fraction must be between 0 and 1")
+        if patience < 1:
+            raise ValueError("patience must be at least 1")
+        self.hyperparameters = dict(hyperparameters or {})
+        self.validation_fraction = validation_fraction
+        self.patience = patience
+        self.tol = tol
+        self.random_state = random_state
+        self.history: List[Dict[str, Any]] = []
+        self.best_iteration: Optional[int] = None
+        self.stopped_early = False
+
+    def fit(self, X, y, on_iteration: Optional[MetricCallback] = None, checkpoint_every: Optional[int] = None,
+            resume: Optional[Dict[str, Any]] = None,
+            on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None) -> GradientBoostingClassifier:
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        X_train, X_val, y_train, y_val = train_test_split(
+            X, y, test_size=self.validation_fraction, stratify=y, random_state=self.random_state)
+
+        model = GradientBoostingClassifier(**{"random_state": self.random_state, **self.hyperparameters})
+        classes = np.unique(y_train)
+        n_classes = len(classes)
+        train_codes, val_codes = np.searchsorted(classes, y_train), np.searchsorted(classes, y_val)
+        # Trees predict on float32; converting once avoids a copy per stage.
+        X_train32, X_val32 = X_train.astype(np.float32), X_val.astype(np.float32)
+        state = {"train_raw": None, "val_raw": None, "best_loss": np.inf, "since_best": 0}
+        self.history, self.best_iteration, self.stopped_early = [], None, False
+        start = time.perf_counter()
+        # Taken before a resumed model (sized to its last block) replaces it.
+        total, warm_start = model.n_estimators, model.warm_start
+        if resume is not None:
+            model, state = resume["model"], resume["monitor"]
+            self.best_iteration = resume["best_iteration"]
+            # The stages fitted before the restart, reported again so the job
+            # shows the whole curve; elapsed carries on from the last one.
+            for metric in resume["history"]:
+                self.history.append(metric)
+                if on_iteration:
+                    on_iteration(metric)
+            start -= self.history[-1]["elapsed"] if self.history else 0
+
+        def monitor(i: int, estimator: GradientBoostingClassifier, _locals) -> bool:
+            if state["val_raw"] is None:
+                state["train_raw"], state["val_raw"] = _init_raw(estimator, X_train), _init_raw(estimator, X_val)
+            for k, tree in enumerate(estimator.estimators_[i]):
+                state["train_raw"][:, k] += estimator.learning_rate * tree.predict(X_train32, check_input=False)
+                state["val_raw"][:, k] += estimator.learning_rate * tree.predict(X_val32, check_input=False)
+
+            train_raw, val_raw = state["train_raw"], state["val_raw"]
+            val_predicted = _predicted(val_raw)
+            val_loss = _log_loss(val_codes, val_raw)
+            metric = {
+                "epoch": i + 1,
+                "batch": 0,
+                "accuracy": float(np.mean(_predicted(train_raw) == train_codes)),
+                "loss": _log_loss(train_codes, train_raw),
+                **weighted_scores(confusion_counts(val_codes, val_predicted, n_classes)),
+                "validation_accuracy": float(np.mean(val_predicted == val_codes)),
+                "validation_loss": val_loss,
+                "elapsed": round(time.perf_counter() - start, 4)
+            }
+            self.history.append(metric)
+            if on_iteration:
+                on_iteration(metric)
+
+            if val_loss < state["best_loss"] - self.tol:
+                state["best_loss"], state["since_best"] = val_loss, 0
+                self.best_iteration = i + 1
+            else:
+                state["since_best"] += 1
+            if state["since_best"] >= self.patience:
+                self.stopped_early = True
+                return True
+            return False
+
+        if not checkpoint_every:
+            model.fit(X_train, y_train, monitor=monitor)
+            return model
+        model.set_params(warm_start=True)
+        done = len(getattr(model, "estimators_", []))
+        while done < total and not self.stopped_early:
+            done = min(total, done + checkpoint_every)
+            model.set_params(n_estimators=done).fit(X_train, y_train, monitor=monitor)
+            if on_checkpoint and done < total and not self.stopped_early:
+                on_checkpoint({"model": model, "monitor": state, "history": self.history,
+                               "best_iteration": self.best_iteration})
+        return model.set_params(n_estimators=total, warm_start=warm_start)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "max_estimators": self.hyperparameters.get("n_estimators", 100),
+            "fitted_estimators": len(self.history),
+            "best_iteration": self.best_iteration,
+            "best_validation_loss": min((m["validation_loss"] for m in self.history), default=None),
+            "stopped_early": self.stopped_early,
+            "patience": self.patience,
+            "validation_fraction": self.validation_fraction
+        }
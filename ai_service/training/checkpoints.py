@@ -0,0 +1,183 @@
+import fcntl
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+TRAINING_CHECKPOINT_ENABLED = os.getenv("TRAINING_CHECKPOINT_ENABLED", "1") == "1"
+TRAINING_CHECKPOINT_DIR = os.getenv("TRAINING_CHECKPOINT_DIR", "./datas/checkpoints")
+# Minimum time between two writes of the same job; 0 writes at every
+# opportunity (each block of trees, search trial or out-of-core epoch).
+TRAINING_CHECKPOINT_SECONDS = float(os.getenv("TRAINING_CHECKPOINT_SECONDS", "30"))
+# Trees added per fit call when an ensemble is grown in checkpointable blocks.
+TRAINING_CHECKPOINT_STAGES = int(os.getenv("TRAINING_CHECKPOINT_STAGES", "25"))
+TRAINING_RESUME_ON_STARTUP = os.getenv("TRAINING_RESUME_ON_STARTUP", "1") == "1"
+
+
+class CheckpointStore:
+    # One directory per unfinished training job: job.json holds the request
+    # needed to start it again and state.pkl whatever the job has finished so
+    # far. Both are replaced atomically, so a kill mid-write leaves the
+    # previous checkpoint. A running job holds an flock on the directory; the
+    # kernel drops it when the process dies, which is how a restarted worker
+    # tells an orphaned job from one another worker is still running.
+    def __init__(self, directory: str = TRAINING_CHECKPOINT_DIR):
+        self.directory = directory
+        self._claims: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str, name: str = "") -> str:
+        return os.path.join(self.directory, job_id, name)
+
+    def _write(self, path: str, write: Callable[[Any], None], mode: str):
+        staging = f"{path}.tmp"
+        with open(staging, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, path)
+
+    def claim(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._claims:
+                return True
+            os.makedirs(self._path(job_id), exist_ok=True)
+            fd = os.open(self._path(job_id, "lock"), os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._claims[job_id] = fd
+            return True
+
+    def release(self, job_id: str):
+        with self._lock:
+            fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def open(self, job_id: str, meta: Dict[str, Any], interval: float = TRAINING_CHECKPOINT_SECONDS) -> "Checkpointer":
+        if not self.claim(job_id):
+            raise RuntimeError(f"Training job {job_id} is already running in another process")
+        meta = json.loads(json.dumps(meta, default=str))
+        state = None
+        saved = self.meta(job_id)
+        if saved is not None and all(saved.get(key) == value for key, value in meta.items()):
+            state = self.load(job_id)
+        else:
+            # New job, or the request or dataset changed since the checkpoint.
+            if os.path.exists(self._path(job_id, "state.pkl")):
+                os.remove(self._path(job_id, "state.pkl"))
+            self._write(self._path(job_id, "job.json"),
+                        lambda f: json.dump({"job_id": job_id, "created_at": time.time(), **meta}, f), "w")
+        return Checkpointer(self, job_id, state, interval)
+
+    def meta(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(job_id, "job.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(job_id, "state.pkl"), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, job_id: str, state: Dict[str, Any]):
+        self._write(self._path(job_id, "state.pkl"), lambda f: pickle.dump(state, f), "wb")
+
+    def clear(self, job_id: str):
+        shutil.rmtree(self._path(job_id), ignore_errors=True)
+        self.release(job_id)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        # Every unfinished job on disk; claim() tells which ones are orphaned.
+        if not os.path.isdir(self.directory):
+            return []
+        jobs = [self.meta(entry.name) for entry in os.scandir(self.directory) if entry.is_dir()]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job["created_at"])
+
+    def status(self) -> Dict[str, Any]:
+        jobs = self.pending()
+        with self._lock:
+            running = set(self._claims)
+        return {
+            "enabled": TRAINING_CHECKPOINT_ENABLED,
+            "directory": self.directory,
+            "interval_seconds": TRAINING_CHECKPOINT_SECONDS,
+            "jobs": [{"job_id": job["job_id"], "mode": job.get("mode"), "created_at": job["created_at"],
+                      "running_here": job["job_id"] in running,
+                      "state_bytes": os.path.getsize(self._path(job["job_id"], "state.pkl"))
+                      if os.path.exists(self._path(job["job_id"], "state.pkl")) else 0}
+                     for job in jobs]
+        }
+
+
+class Checkpointer:
+    # The resumable state of one job. Stages add their progress with save();
+    # writes closer together than `interval` are skipped unless forced, so a
+    # kill loses at most that much work. Without a store nothing is written.
+    def __init__(self, store: Optional[CheckpointStore], job_id: str, state: Optional[Dict[str, Any]] = None,
+                 interval: float = TRAINING_CHECKPOINT_SECONDS):
+        self.store = store
+        self.job_id = job_id
+        self.state = dict(state or {})
+        self.resumed_from = sorted(self.state)
+        self.interval = interval
+        self.saves = 0
+        self._last_save = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def save(self, force: bool = False, **updates):
+        self.state.update(updates)
+        if self.store is None or not (force or time.monotonic() - self._last_save >= self.interval):
+            return
+        self.store.save(self.job_id, self.state)
+        self._last_save = time.monotonic()
+        self.saves += 1
+
+    def finish(self):
+        if self.store is not None:
+            self.store.clear(self.job_id)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "resumed": bool(self.resumed_from), "resumed_from": self.resumed_from,
+                "saves": self.saves}
+
+
+def grows_in_blocks(model) -> bool:
+    params = model.get_params(deep=False)
+    return "warm_start" in params and "n_estimators" in params
+
+
+def fit_in_blocks(model, X, y, block: int = TRAINING_CHECKPOINT_STAGES, resume=None,
+                  on_block: Optional[Callable[[Any], None]] = None):
+    # Grows a forest or boosted ensemble `block` trees per fit call through
+    # warm_start, handing the partial model to on_block after each call.
+    # sklearn advances the estimator's random state across warm-started
+    # calls, so the finished model is the one a single fit would produce.
+    params = model.get_params(deep=False)
+    total, warm_start = params["n_estimators"], params["warm_start"]
+    if resume is not None:
+        model = resume
+    model.set_params(warm_start=True)
+    done = len(getattr(model, "estimators_", []))
+    while done < total:
+        done = min(total, done + max(1, block))
+        model.set_params(n_estimators=done).fit(X, y)
+        if on_block and done < total:
+            on_block(model)
+    return model.set_params(warm_start=warm_start)
+
+
+training_checkpoints = CheckpointStore()
@@ -0,0 +1,65 @@
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+
+from training.estimators import build_model
+
+COST_REPORT_REPEATS = int(os.getenv("COST_REPORT_REPEATS", "50"))
+COST_REPORT_BATCH_ROWS = int(os.getenv("COST_REPORT_BATCH_ROWS", "1000"))
+
+
+def _median_seconds(call, repeats: int) -> float:
+    call()  # warm-up: first calls pay for lazy imports and allocations
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def measure_costs(model_type: str, model, fit_seconds: float, X_test: np.ndarray, y_test,
+                  repeats: int = COST_REPORT_REPEATS, batch_rows: int = COST_REPORT_BATCH_ROWS) -> Dict[str, Any]:
+    # Latencies are medians of predict_proba, which is what the screening
+    # engine calls; batch rows are tiled from the test split when it is small.
+    X_test = np.asarray(X_test, dtype=np.float64)
+    batch = np.resize(X_test, (batch_rows, X_test.shape[1]))
+    single = X_test[:1]
+    batch_seconds = _median_seconds(lambda: model.predict_proba(batch), max(3, repeats // 10))
+    y_pred = model.predict(X_test)
+    return {
+        "model_type": model_type,
+        "model_class": type(model).__name__,
+        "fit_seconds": round(fit_seconds, 4),
+        "single_row_ms": round(_median_seconds(lambda: model.predict_proba(single), repeats) * 1000, 4),
+        "batch_ms": round(batch_seconds * 1000, 4),
+        "batch_row_us": round(batch_seconds / batch_rows * 1e6, 4),
+        "model_size_kb": round(len(pickle.dumps(model)) / 1024, 1),
+        "accuracy": round(float(accuracy_score(y_test, y_pred)), 4),
+        "f1_score": round(float(f1_score(y_test, y_pred, average="weighted")), 4)
+    }
+
+
+def compare_backends(model_types: List[str], X_train, y_train, X_test, y_test,
+                     hyperparameters: Optional[Dict[str, Dict[str, Any]]] = None,
+                     repeats: int = COST_REPORT_REPEATS, batch_rows: int = COST_REPORT_BATCH_ROWS) -> List[Dict[str, Any]]:
+    # Fits each backend on the same split so the rows are comparable.
+    hyperparameters = hyperparameters or {}
+    rows = []
+    for model_type in model_types:
+        model = build_model(model_type, hyperparameters.get(model_type, {}))
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        rows.append(measure_costs(model_type, model, time.perf_counter() - start, X_test, y_test, repeats, batch_rows))
+    return rows
+
+
+def cost_table(rows: List[Dict[str, Any]]) -> str:
+    columns = ["model_type", "fit_seconds", "single_row_ms", "batch_row_us", "model_size_kb", "accuracy", "f1_score"]
+    cells = [columns] + [[str(row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in cells)
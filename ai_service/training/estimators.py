@@ -0,0 +1,49 @@
+from typing import Any, Callable, Dict
+
+from sklearn.ensemble import (
+    RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier, VotingClassifier
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+Backend = Callable[[Dict[str, Any]], Any]
+
+ENSEMBLE_MEMBERS = ["hist_gradient_boosting", "logistic_regression", "random_forest"]
+
+
+def _logistic_regression(hyperparameters: Dict[str, Any]):
+    # Encoded features mix 0/1 answers with age in months; without scaling the
+    # L2 penalty falls almost entirely on the binary columns.
+    return make_pipeline(StandardScaler(), LogisticRegression(**{"C": 1.0, "max_iter": 1000, **hyperparameters}))
+
+
+def _ensemble(hyperparameters: Dict[str, Any]):
+    # Soft vote over other backends. Member settings go under the member's
+    # name, e.g. {"members": [...], "random_forest": {"n_estimators": 50}}.
+    members = hyperparameters.get("members", ENSEMBLE_MEMBERS)
+    if not members or "ensemble" in members:
+        raise ValueError("ensemble needs a list of member backends other than 'ensemble'")
+    return VotingClassifier(
+        [(name, build_model(name, hyperparameters.get(name, {}))) for name in members],
+        voting="soft", weights=hyperparameters.get("weights")
+    )
+
+
+MODEL_BACKENDS: Dict[str, Backend] = {
+    "random_forest": lambda hyperparameters: RandomForestClassifier(**hyperparameters),
+    "gradient_boosting": lambda hyperparameters: GradientBoostingClassifier(**hyperparameters),
+    "hist_gradient_boosting": lambda hyperparameters: HistGradientBoostingClassifier(**hyperparameters),
+    "logistic_regression": _logistic_regression,
+    "ensemble": _ensemble
+}
+
+
+def register_backend(name: str, backend: Backend):
+    MODEL_BACKENDS[name] = backend
+
+
+def build_model(model_type: str, hyperparameters: Dict[str, Any]):
+    if model_type not in MODEL_BACKENDS:
+        raise ValueError(f"Unsupported model type '{model_type}'. Use one of {sorted(MODEL_BACKENDS)}")
+    return MODEL_BACKENDS[model_type](dict(hyperparameters))
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from training.preprocessing import PIPELINE_VERSION, FeaturePipeline
+
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "1") == "1"
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "./datas/feature_cache")
+FEATURE_CACHE_MAX_MB = float(os.getenv("FEATURE_CACHE_MAX_MB", "2048"))
+ARRAYS = ("X_train", "X_test", "y_train", "y_test")
+
+# (realpath, size, mtime_ns) -> content digest, so an unchanged file is hashed
+# once per process.
+_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str) -> str:
+    stat = os.stat(path)
+    memo = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    if memo not in _digests:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _digests[memo] = digest.hexdigest()
+    return _digests[memo]
+
+
+def _directory_bytes(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class FeatureCache:
+    # Encoded train/test matrices keyed by dataset content, the columns and
+    # preprocessing options, the split and PIPELINE_VERSION. Each entry is a
+    # directory of .npy files plus the fitted pipeline; hits open the arrays
+    # with mmap_mode="r", so every job and worker process reading the same
+    # entry shares one copy in the page cache (joblib also hands memmaps to
+    # its workers by filename instead of pickling them). Entries are written
+    # to a temporary directory and renamed into place, and the least recently
+    # used ones (by directory mtime, touched on every hit) are deleted once the
+    # cache exceeds its disk budget. Deleting an entry another process has
+    # mapped is safe: its pages stay valid until that process unmaps them.
+    def __init__(self, directory: str = FEATURE_CACHE_DIR, max_bytes: float = FEATURE_CACHE_MAX_MB * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "build_seconds": 0.0, "load_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def key(self, dataset_digest: str, spec: Dict[str, Any]) -> str:
+        text = json.dumps({"dataset": dataset_digest, "pipeline_version": PIPELINE_VERSION, **spec},
+                          sort_keys=True, default=str)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], FeaturePipeline]]:
+        path = self._path(key)
+        start = time.perf_counter()
+        try:
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+            with open(os.path.join(path, "pipeline.pkl"), "rb") as f:
+                pipeline = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            # Not cached, or evicted by another process between the files.
+            return None
+        with self._lock:
+            self.stats["load_seconds"] += time.perf_counter() - start
+        return arrays, pipeline
+
+    def store(self, key: str, arrays: Dict[str, np.ndarray], pipeline: FeaturePipeline, spec: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory)
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(staging, f"{name}.npy"), arrays[name], allow_pickle=False)
+            with open(os.path.join(staging, "pipeline.pkl"), "wb") as f:
+                pickle.dump(pipeline, f)
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({"key": key, "created_at": time.time(), "shapes": {n: arrays[n].shape for n in ARRAYS},
+                           **spec}, f, default=str)
+            os.rename(staging, self._path(key))
+        except OSError:
+            # Another job stored the same key first; theirs is identical.
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=key)
+
+    def get_or_build(self, key: str, build: Callable[[], Tuple[Dict[str, np.ndarray], FeaturePipeline]],
+                     spec: Dict[str, Any]) -> Tuple[Dict[str, np.ndarray], FeaturePipeline, bool]:
+        cached = self.load(key)
+        if cached is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return (*cached, True)
+        start = time.perf_counter()
+        arrays, pipeline = build()
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["build_seconds"] += time.perf_counter() - start
+        self.store(key, arrays, pipeline, spec)
+        # Hand back the mapped copy when it survived eviction, so a miss and a
+        # hit give the caller the same arrays.
+        cached = self.load(key)
+        return (*(cached or (arrays, pipeline)), False)
+
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            {"key": entry.name, "bytes": _directory_bytes(entry.path), "last_used": entry.stat().st_mtime}
+            for entry in os.scandir(self.directory) if entry.is_dir() and not entry.name.startswith(".")
+        ]
+
+    def evict(self, keep: Optional[str] = None):
+        entries = sorted(self.entries(), key=lambda entry: entry["last_used"])
+        total = sum(entry["bytes"] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            shutil.rmtree(self._path(entry["key"]), ignore_errors=True)
+            total -= entry["bytes"]
+            with self._lock:
+                self.stats["evictions"] += 1
+
+    def status(self) -> Dict[str, Any]:
+        entries = sorted(self.entries(), key=lambda entry: entry["last_used"], reverse=True)
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "enabled": FEATURE_CACHE_ENABLED,
+                "directory": self.directory,
+                "entries": entries,
+                "bytes": sum(entry["bytes"] for entry in entries),
+                "max_bytes": int(self.max_bytes),
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                **{key: round(value, 4) if isinstance(value, float) else value for key, value in self.stats.items()}
+            }
+
+
+feature_cache = FeatureCache()
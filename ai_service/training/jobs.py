@@ -0,0 +1,173 @@
+import asyncio
+import copy
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.serialization import dumps, loads
+
+Publisher = Callable[[Dict[str, Any]], Awaitable[None]]
+
+MAX_FINISHED_JOBS = 200
+TRAINING_JOBS_DIR = os.getenv("TRAINING_JOBS_DIR", "./datas/jobs/training")
+SUMMARY_FIELDS = ("job_id", "configuration_id", "mode", "status", "current_epoch", "total_epochs", "created_at",
+                  "completed_at")
+
+
+class TrainingJobs:
+    # Status of the training jobs started by this worker. Training runs in the
+    # threadpool, so updates are published to /ws/training by scheduling the
+    # websocket broadcast on the event loop captured at startup. With a
+    # directory, every change is also written to <directory>/<job_id>.json so
+    # the other prefork workers (which share the directory) can answer for
+    # jobs they did not start.
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS, directory: Optional[str] = None):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.max_finished = max_finished
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._publish: Optional[Publisher] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop, publish: Publisher):
+        self._loop = loop
+        self._publish = publish
+
+    def _emit(self, message: Dict[str, Any]):
+        if self._loop is None or self._publish is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._loop.create_task(self._publish(message))
+        else:
+            asyncio.run_coroutine_threadsafe(self._publish(message), self._loop)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _persist(self, job: Dict[str, Any]):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(job["job_id"])
+        staging = f"{path}.{os.getpid()}.tmp"
+        with open(staging, "wb") as f:
+            f.write(dumps(job))
+        os.replace(staging, path)
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(job_id), "rb") as f:
+                return loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _stored_ids(self) -> List[str]:
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        return [name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def create(self, configuration_id: str, mode: str, job_id: Optional[str] = None,
+               total_epochs: int = 0) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            self._prune()
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "configuration_id": configuration_id,
+                "mode": mode,
+                "status": "pending",
+                "created_at": time.time(),
+                "started_at": None,
+                "completed_at": None,
+                "current_epoch": 0,
+                "total_epochs": total_epochs,
+                "trials": [],
+                "metrics": [],
+                "result": None,
+                "error": None
+            }
+            self._persist(self.jobs[job_id])
+        return job_id
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job["status"] in ("completed", "failed")]
+        for job in sorted(finished, key=lambda job: job["created_at"])[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job["job_id"]]
+            if self.directory is not None and os.path.exists(self._path(job["job_id"])):
+                os.remove(self._path(job["job_id"]))
+        # Records left by workers that have since exited are dropped by
+        # whichever worker next finds too many finished jobs on disk.
+        stored = [job for job in map(self._read, self._stored_ids()) if job is not None]
+        finished = [job for job in stored if job["status"] in ("completed", "failed") and job["job_id"] not in self.jobs]
+        for job in sorted(finished, key=lambda job: job["created_at"])[:max(0, len(finished) - self.max_finished)]:
+            try:
+                os.remove(self._path(job["job_id"]))
+            except FileNotFoundError:
+                pass
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self.jobs[job_id]
+            if fields.get("status") == "running" and job["started_at"] is None:
+                job["started_at"] = time.time()
+            if fields.get("status") in ("completed", "failed"):
+                job["completed_at"] = time.time()
+            job.update(fields)
+            self._persist(job)
+            message = {
+                "type": "status",
+                "job_id": job_id,
+                "status": job["status"],
+                "current_epoch": job["current_epoch"],
+                "total_epochs": job["total_epochs"],
+                "error": job["error"]
+            }
+        self._emit(message)
+
+    def add_trial(self, job_id: str, trial: Dict[str, Any]):
+        with self._lock:
+            job = self.jobs[job_id]
+            job["trials"].append(trial)
+            job["current_epoch"] = len(job["trials"])
+            self._persist(job)
+        self._emit({"type": "trial", "job_id": job_id, "trial": trial})
+
+    def add_metric(self, job_id: str, metric: Dict[str, Any]):
+        # metric has the columns of a training_metrics row, which is what
+        # TrainingProgressMonitor charts from {"type": "metric"} messages.
+        with self._lock:
+            job = self.jobs[job_id]
+            job["metrics"].append(metric)
+            job["current_epoch"] = metric["epoch"]
+            self._persist(job)
+        self._emit({"type": "metric", "job_id": job_id, "metric": metric})
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            if job_id in self.jobs:
+                return copy.deepcopy(self.jobs[job_id])
+        job = self._read(job_id)
+        if job is None:
+            raise LookupError(f"Training job {job_id} not found")
+        return job
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = {job_id: {key: job[key] for key in SUMMARY_FIELDS} for job_id, job in self.jobs.items()}
+        for job_id in self._stored_ids():
+            if job_id not in jobs:
+                job = self._read(job_id)
+                if job is not None:
+                    jobs[job_id] = {key: job[key] for key in SUMMARY_FIELDS}
+        return sorted(jobs.values(), key=lambda job: job["created_at"], reverse=True)
+
+
+training_jobs = TrainingJobs(directory=TRAINING_JOBS_DIR)
@@ -0,0 +1,179 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.special import expit, softmax
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+
+from training.boosting import _init_raw
+
+LOOKUP_MAX_CELLS = int(os.getenv("LOOKUP_MAX_CELLS", "20000000"))
+LOOKUP_VERIFY_ROWS = int(os.getenv("LOOKUP_VERIFY_ROWS", "5000"))
+LOOKUP_TOLERANCE = 1e-6
+
+
+def split_thresholds(model) -> Optional[Dict[int, np.ndarray]]:
+    # Every threshold a tree ensemble compares each feature against; None when
+    # the model is not made of trees and every domain value has to be kept.
+    if isinstance(model, HistGradientBoostingClassifier):
+        nodes = [predictor.nodes for predictors in model._predictors for predictor in predictors]
+        pairs = [(n["feature_idx"][~n["is_leaf"].astype(bool)], n["num_threshold"][~n["is_leaf"].astype(bool)])
+                 for n in nodes]
+    elif hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in np.ravel(model.estimators_)):
+        trees = [e.tree_ for e in np.ravel(model.estimators_)]
+        # sklearn trees compare in float32.
+        pairs = [(t.feature[t.feature >= 0], t.threshold[t.feature >= 0].astype(np.float32)) for t in trees]
+    else:
+        return None
+    features = np.concatenate([f for f, _ in pairs]) if pairs else np.zeros(0, dtype=np.int64)
+    thresholds = np.concatenate([t.astype(np.float64) for _, t in pairs]) if pairs else np.zeros(0)
+    return {int(f): np.unique(thresholds[features == f]) for f in np.unique(features)}
+
+
+class ProbabilityGrid:
+    # predict_proba of a model tabulated over a finite input domain. `domains`
+    # gives an inclusive integer range per encoded feature; for tree models the
+    # values of a feature that fall between the same split thresholds are one
+    # cell, so the table only grows with what the model can distinguish. A row
+    # is answered from the table when every feature is an in-range integer;
+    # anything else goes to the live model.
+    def __init__(self, model, domains: Dict[int, Tuple[int, int]], max_cells: int = LOOKUP_MAX_CELLS,
+                 verify_rows: int = LOOKUP_VERIFY_ROWS, random_state: int = 0):
+        start = time.perf_counter()
+        n_features = model.n_features_in_
+        if sorted(domains) != list(range(n_features)):
+            raise ValueError("Every feature needs a finite domain for a lookup table")
+        self.model = model
+        self.low = np.array([domains[f][0] for f in range(n_features)], dtype=np.int64)
+        self.high = np.array([domains[f][1] for f in range(n_features)], dtype=np.int64)
+        thresholds = split_thresholds(model)
+
+        # Per feature: domain value -> cell along that axis, and one
+        # representative value per cell.
+        cell_of, self.representatives = [], []
+        for f in range(n_features):
+            values = np.arange(self.low[f], self.high[f] + 1)
+            if thresholds is None:
+                cells = np.arange(len(values))
+            else:
+                cells = np.searchsorted(thresholds.get(f, np.zeros(0)), values.astype(np.float32), side="left")
+            _, first, cells = np.unique(cells, return_index=True, return_inverse=True)
+            cell_of.append(cells)
+            self.representatives.append(values[first].astype(np.float64))
+        self.shape = tuple(len(r) for r in self.representatives)
+        self.n_cells = int(np.prod(self.shape, dtype=np.float64))
+        if self.n_cells > max_cells:
+            raise ValueError(f"Lookup table would have {self.n_cells} cells, more than {max_cells}")
+        strides = np.cumprod((1,) + self.shape[:0:-1])[::-1]
+        # One flat array for every feature's value -> cell * stride, so a lookup
+        # is a single gather plus a row sum.
+        self.offsets = np.concatenate(([0], np.cumsum(self.high - self.low + 1)[:-1]))
+        self.cell_index = np.concatenate([cells * stride for cells, stride in zip(cell_of, strides)])
+        self._cell_index = self.cell_index.tolist()
+        self._bounds = list(zip(self.low.tolist(), self.high.tolist(), self.offsets.tolist()))
+
+        if isinstance(model, GradientBoostingClassifier):
+            self.table = self._boosted_table(model)
+        else:
+            self.table = self._evaluated_table(model)
+        self.build_seconds = time.perf_counter() - start
+        self.hits = 0
+        self.misses = 0
+        self.max_error = self._verify(verify_rows, random_state)
+        if self.max_error > LOOKUP_TOLERANCE:
+            raise ValueError(f"Lookup table disagrees with the model by {self.max_error:.2e}")
+
+    def _cells(self, cells: np.ndarray) -> np.ndarray:
+        index = np.unravel_index(cells, self.shape)
+        return np.column_stack([rep[i] for rep, i in zip(self.representatives, index)])
+
+    def _evaluated_table(self, model, chunk: int = 200000) -> np.ndarray:
+        table = np.empty((self.n_cells, len(model.classes_)), dtype=np.float32)
+        for start in range(0, self.n_cells, chunk):
+            cells = np.arange(start, min(start + chunk, self.n_cells))
+            table[cells] = model.predict_proba(self._cells(cells))
+        return table
+
+    def _boosted_table(self, model: GradientBoostingClassifier) -> np.ndarray:
+        # Raw scores are a sum of trees and each tree reads only a few features,
+        # so every tree is evaluated on the sub-grid of its own features and
+        # broadcast-added into the full grid: cost per tree is its sub-grid plus
+        # one pass over the table, instead of a tree walk per cell.
+        n_columns = model.estimators_.shape[1]
+        raw = np.empty(self.shape + (n_columns,))
+        raw[...] = _init_raw(model, self._cells(np.zeros(1, dtype=np.int64)))[0]
+        base = np.array([rep[0] for rep in self.representatives], dtype=np.float32)
+        for stage in model.estimators_:
+            for k, estimator in enumerate(stage):
+                tree = estimator.tree_
+                used = np.unique(tree.feature[tree.feature >= 0])
+                sub_shape = [self.shape[f] for f in used]
+                X = np.empty(sub_shape + [len(base)], dtype=np.float32)
+                X[...] = base
+                for axis, f in enumerate(used):
+                    X[..., f] = self.representatives[f].reshape([-1 if a == axis else 1 for a in range(len(used))])
+                X = X.reshape(-1, len(base))
+                broadcast = [1] * len(self.shape)
+                for f in used:
+                    broadcast[f] = self.shape[f]
+                raw[..., k] += model.learning_rate * estimator.predict(X, check_input=False).reshape(broadcast)
+        raw = raw.reshape(self.n_cells, n_columns)
+        if n_columns == 1:
+            positive = expit(2 * raw[:, 0] if model.loss == "exponential" else raw[:, 0])
+            return np.column_stack([1 - positive, positive]).astype(np.float32)
+        return softmax(raw, axis=1).astype(np.float32)
+
+    def _verify(self, rows: int, random_state: int) -> float:
+        # Random points of the whole domain (not just representatives) against
+        # the live model.
+        rng = np.random.default_rng(random_state)
+        X = rng.integers(self.low, self.high + 1, size=(rows, len(self.low))).astype(np.float64)
+        probabilities, found = self.lookup(X)
+        self.hits = self.misses = 0
+        return float(np.abs(probabilities[found] - self.model.predict_proba(X[found])).max()) if found.any() else 0.0
+
+    def lookup(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # (probabilities, found); rows that are not found have undefined probabilities.
+        values = np.rint(X).astype(np.int64)
+        found = ((values == X) & (values >= self.low) & (values <= self.high)).all(axis=1)
+        values = np.where(found[:, None], values - self.low, 0)
+        cells = self.cell_index[values + self.offsets].sum(axis=1)
+        hits = int(found.sum())
+        self.hits += hits
+        self.misses += len(X) - hits
+        return self.table[cells], found
+
+    def _lookup_row(self, row: List[float]) -> Optional[int]:
+        # One record in plain Python: a dozen int ops beat numpy's per-call
+        # overhead when the batch is a single screening.
+        cell = 0
+        for value, (low, high, offset) in zip(row, self._bounds):
+            index = int(value)
+            if index != value or index < low or index > high:
+                return None
+            cell += self._cell_index[offset + index - low]
+        return cell
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if len(X) == 1:
+            cell = self._lookup_row(X[0].tolist())
+            if cell is not None:
+                self.hits += 1
+                return self.table[cell:cell + 1].astype(np.float64)
+        probabilities, found = self.lookup(X)
+        probabilities = probabilities.astype(np.float64)
+        if not found.all():
+            probabilities[~found] = self.model.predict_proba(X[~found])
+        return probabilities
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "cells": self.n_cells,
+            "shape": list(self.shape),
+            "table_kb": round(self.table.nbytes / 1024, 1),
+            "build_seconds": round(self.build_seconds, 3),
+            "verified_max_error": self.max_error,
+            "hits": self.hits,
+            "misses": self.misses
+        }
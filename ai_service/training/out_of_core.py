@@ -0,0 +1,386 @@
+import io
+import os
+import resource
+import time
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from core.csv_ranges import ByteRange, shard_ranges
+from training.boosting import confusion_counts, weighted_scores
+from training.preprocessing import FeaturePipeline
+
+OUT_OF_CORE_MEMORY_MB = float(os.getenv("OUT_OF_CORE_MEMORY_MB", "256"))
+# Chunks' worth of encoded rows that training batches are drawn from.
+OUT_OF_CORE_SHUFFLE_CHUNKS = int(os.getenv("OUT_OF_CORE_SHUFFLE_CHUNKS", "8"))
+PLAN_SAMPLE_ROWS = int(os.getenv("OUT_OF_CORE_PLAN_SAMPLE_ROWS", "10000"))
+MIN_CHUNK_ROWS = 1000
+
+INCREMENTAL_MODELS = {
+    "sgd_logistic": lambda params: SGDClassifier(**{"loss": "log_loss", "random_state": 42, **params}),
+    "naive_bayes": lambda params: GaussianNB(**params)
+}
+# Gradient-trained models need standardized inputs; the scaler is fitted in
+# its own pass because the first partial_fit already needs it.
+SCALED_MODELS = {"sgd_logistic"}
+
+EpochCallback = Callable[[Dict[str, Any]], None]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def dtype_plan(path: str, feature_columns: List[str], target_column: str,
+               categorical_columns: Optional[List[str]] = None,
+               sample_rows: int = PLAN_SAMPLE_ROWS) -> Tuple[Dict[str, str], float]:
+    # Decided once from the head of the file and then enforced on every
+    # chunk, so a column can't silently flip between numeric and object (and
+    # change size) halfway through. Numbers are read as float32, everything
+    # else as category.
+    sample = pd.read_csv(path, nrows=sample_rows)
+    sample.columns = sample.columns.str.strip()
+    missing = [col for col in feature_columns + [target_column] if col not in sample.columns]
+    if missing:
+        raise ValueError(f"Columns not found in dataset: {missing}")
+    categorical = set(categorical_columns or [])
+    plan = {}
+    for col in feature_columns:
+        numeric = pd.api.types.is_numeric_dtype(sample[col]) and not pd.api.types.is_bool_dtype(sample[col])
+        plan[col] = "float32" if numeric and col not in categorical else "category"
+    plan[target_column] = "category"
+    typed = sample[list(plan)].astype(plan)
+    bytes_per_row = float(typed.memory_usage(deep=True, index=False).sum()) / max(1, len(typed))
+    return plan, bytes_per_row
+
+
+def holdout_mask(start: int, n: int, train_split: float, seed: int = 42) -> np.ndarray:
+    # A row's split depends only on its position in the file, so every pass
+    # (and a resumed run) agrees on which rows are held out without keeping
+    # an index in memory.
+    index = np.arange(start, start + n, dtype=np.uint64) + np.uint64(seed)
+    mixed = index * np.uint64(0x9E3779B97F4A7C15)
+    mixed ^= mixed >> np.uint64(31)
+    mixed *= np.uint64(0xBF58476D1CE4E5B9)
+    mixed ^= mixed >> np.uint64(29)
+    return (mixed >> np.uint64(11)).astype(np.float64) / float(2 ** 53) >= train_split
+
+
+class OutOfCoreTrainer:
+    # Trains on a CSV without loading it: every pass streams chunks sized so
+    # that one parsed chunk plus its encoded copies stays within half of the
+    # memory budget (the rest is left for the model, the pipeline's reservoir
+    # sample and the interpreter). Pass 1 fits the preprocessing pipeline and
+    # collects the target classes, pass 2 fits the scaler when the model
+    # needs one, then each epoch streams the file again through partial_fit
+    # in shuffled batches (see shuffled_batches).
+    # Held-out rows are scored progressively during each epoch and by a final
+    # pass with the finished model. After every epoch the model, the fitted
+    # preprocessing and the shuffle generator can be handed to on_checkpoint;
+    # fit(resume=) skips the passes that state already covers.
+    def __init__(self, path: str, feature_columns: List[str], target_column: str,
+                 model_type: str = "sgd_logistic", hyperparameters: Optional[Dict[str, Any]] = None,
+                 epochs: int = 5, train_split: float = 0.8, memory_budget_mb: float = OUT_OF_CORE_MEMORY_MB,
+                 categorical_columns: Optional[List[str]] = None, chunk_rows: Optional[int] = None,
+                 random_state: int = 42, shuffle_chunks: int = OUT_OF_CORE_SHUFFLE_CHUNKS):
+        if model_type not in INCREMENTAL_MODELS:
+            raise ValueError(f"Out-of-core training supports {sorted(INCREMENTAL_MODELS)}, not '{model_type}'")
+        if epochs < 1:
+            raise ValueError("epochs must be at least 1")
+        if not 0 < train_split < 1:
+            raise ValueError("train_test_split must be between 0 and 1")
+        self.path = path
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.model_type = model_type
+        self.hyperparameters = dict(hyperparameters or {})
+        self.epochs = epochs
+        self.train_split = train_split
+        self.memory_budget_mb = memory_budget_mb
+        self.categorical_columns = categorical_columns
+        self.random_state = random_state
+        self.shuffle_chunks = max(1, shuffle_chunks)
+
+        self.plan, self.bytes_per_row = dtype_plan(path, self.feature_columns, target_column, categorical_columns)
+        # Parsed chunk, its float64 encoding and the scaled copy. The CSV
+        # parser's own buffers and temporaries measure at roughly 2.3x that
+        # again, so a chunk is sized to a fifth of the budget, together with
+        # its share of the shuffle buffer (float32 features, label, split).
+        n_features = len(self.feature_columns)
+        working_bytes = self.bytes_per_row + 16 * n_features + 64 + self.shuffle_chunks * (4 * n_features + 5)
+        self.chunk_rows = chunk_rows or max(MIN_CHUNK_ROWS, int(memory_budget_mb * 2 ** 20 * 0.2 / working_bytes))
+        # Byte ranges of about chunk_rows lines, sized from the head of the file.
+        with open(path, "rb") as f:
+            f.readline()
+            head = f.read(1 << 20)
+        self.range_bytes = max(1, int(self.chunk_rows * len(head) / max(1, head.count(b"\n"))))
+        # (start byte, end byte, first row) of every range, known after the first pass.
+        self.ranges: Optional[List[Tuple[int, int, int]]] = None
+        self.columns: Optional[List[str]] = None
+        self.pipeline: Optional[FeaturePipeline] = None
+        self.scaler: Optional[StandardScaler] = None
+        self.classes: Optional[np.ndarray] = None
+        self.stats: Dict[str, Any] = {"rows": 0, "chunks": 0, "peak_chunk_mb": 0.0, "passes": []}
+
+    def _read_range(self, index: int, start: int, end: int, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        with ByteRange(self.path, start, end) as source:
+            try:
+                reader = pd.read_csv(io.BufferedReader(source, 1 << 20), header=None, names=self.columns,
+                                     usecols=list(self.plan), dtype=self.plan, chunksize=chunk_rows)
+                for chunk in reader:
+                    chunk_mb = float(chunk.memory_usage(deep=True, index=False).sum()) / 2 ** 20
+                    self.stats["peak_chunk_mb"] = max(self.stats["peak_chunk_mb"], chunk_mb)
+                    yield chunk
+            except pd.errors.EmptyDataError:
+                # Only blank lines in this range.
+                return
+            except ValueError as e:
+                raise ValueError(f"Chunk {index} does not match the dtype plan {self.plan}: {e}. "
+                                 f"List the column in preprocessing_options.categorical_columns") from e
+
+    def _range_chunks(self, index: int, start: int, end: int, row: int,
+                      chunk_rows: int) -> Generator[Tuple[int, pd.DataFrame], None, int]:
+        # Returns the row after the range.
+        for chunk in self._read_range(index, start, end, chunk_rows):
+            rows = len(chunk)
+            # Offsets count file rows, so dropping unlabeled rows doesn't move
+            # any other row between the train and holdout splits.
+            yield row, chunk.dropna(subset=[self.target_column])
+            row += rows
+        return row
+
+    def chunks(self) -> Iterator[Tuple[int, pd.DataFrame]]:
+        # The file in order, one byte range at a time. Ranges are sized from
+        # an average line length, so a quarter of slack keeps one that runs a
+        # little long from splitting off a tiny chunk. The first pass also
+        # counts the rows that place each range in the file.
+        chunk_rows = self.chunk_rows + self.chunk_rows // 4
+        if self.ranges is not None:
+            for index, (start, end, row) in enumerate(self.ranges):
+                yield from self._range_chunks(index, start, end, row, chunk_rows)
+            return
+        self.columns, spans = shard_ranges(self.path, self.range_bytes)
+        ranges, row = [], 0
+        for index, (start, end) in enumerate(spans):
+            ranges.append((start, end, row))
+            row = yield from self._range_chunks(index, start, end, row, chunk_rows)
+        self.ranges = ranges
+
+    def shuffled_batches(self, rng: np.random.Generator) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        # One epoch as encoded (X, codes, holdout) batches of chunk_rows rows.
+        # Byte ranges are read in a random order into a buffer of
+        # shuffle_chunks chunks and every batch is drawn at random from the
+        # whole buffer, so a file sorted by class still gives mixed batches.
+        capacity = self.shuffle_chunks * self.chunk_rows
+        chunk_rows = self.chunk_rows + self.chunk_rows // 4
+        X_buffer = codes_buffer = test_buffer = None
+        held = 0
+
+        def draw(n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            nonlocal held
+            taken = rng.choice(held, n, replace=False)
+            batch = (X_buffer[taken], codes_buffer[taken], test_buffer[taken])
+            # Rows left past the new end move into the slots just emptied.
+            remaining = held - n
+            holes = taken[taken < remaining]
+            moved = np.setdiff1d(np.arange(remaining, held), taken, assume_unique=True)
+            for buffer in (X_buffer, codes_buffer, test_buffer):
+                buffer[holes] = buffer[moved]
+            held = remaining
+            return batch
+
+        for index in rng.permutation(len(self.ranges)).tolist():
+            for offset, chunk in self._range_chunks(index, *self.ranges[index], chunk_rows):
+                X, codes = self._encode(chunk)
+                if X_buffer is None:
+                    X_buffer = np.empty((capacity + chunk_rows, X.shape[1]), dtype=np.float32)
+                    codes_buffer = np.empty(capacity + chunk_rows, dtype=np.int32)
+                    test_buffer = np.empty(capacity + chunk_rows, dtype=bool)
+                n = len(codes)
+                X_buffer[held:held + n], codes_buffer[held:held + n] = X, codes
+                test_buffer[held:held + n] = holdout_mask(offset, n, self.train_split, self.random_state)
+                held += n
+                while held >= capacity:
+                    yield draw(self.chunk_rows)
+        while held:
+            yield draw(min(self.chunk_rows, held))
+
+    def _encode(self, chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        X = self.pipeline.transform(chunk)
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        return X, self._label_codes(chunk[self.target_column])
+
+    def _label_codes(self, labels: pd.Series) -> np.ndarray:
+        # The target is read as a category, so only its distinct values are
+        # turned into strings.
+        lookup = np.searchsorted(self.classes, labels.cat.categories.astype(str).str.strip())
+        return lookup[labels.cat.codes.to_numpy()]
+
+    def _prepare(self):
+        start = time.perf_counter()
+        labels, counts = set(), {"rows": 0, "chunks": 0}
+
+        def on_chunk(chunk: pd.DataFrame):
+            target = chunk[self.target_column]
+            present = target.cat.categories[np.unique(target.cat.codes[target.cat.codes >= 0])]
+            labels.update(present.astype(str).str.strip().tolist())
+            counts["rows"] += len(chunk)
+            counts["chunks"] += 1
+
+        self.pipeline = FeaturePipeline(self.feature_columns, self.categorical_columns).fit_stream(
+            (chunk for _, chunk in self.chunks()), sample_rows=self.chunk_rows, random_state=self.random_state,
+            on_chunk=on_chunk)
+        if len(labels) < 2:
+            raise ValueError(f"Target column '{self.target_column}' needs at least two classes")
+        self.classes = np.array(sorted(labels))
+        self.stats.update(counts)
+        self._record_pass("fit_preprocessing", counts["rows"], time.perf_counter() - start)
+
+        if self.model_type in SCALED_MODELS:
+            start = time.perf_counter()
+            scaler = StandardScaler()
+            for offset, chunk in self.chunks():
+                train = ~holdout_mask(offset, len(chunk), self.train_split, self.random_state)
+                if train.any():
+                    scaler.partial_fit(self.pipeline.transform(chunk)[train])
+            self.scaler = scaler
+            self._record_pass("fit_scaler", self.stats["rows"], time.perf_counter() - start)
+
+    def _record_pass(self, name: str, rows: int, seconds: float):
+        self.stats["passes"].append({
+            "pass": name,
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None
+        })
+
+    def _holdout_metrics(self, confusion: np.ndarray, loss_sum: float, rows: int) -> Dict[str, Optional[float]]:
+        if rows == 0:
+            # Nothing was scored yet: the first epoch of a file that fits in
+            # one chunk only meets its holdout rows before the first fit.
+            return dict.fromkeys(("precision", "recall", "f1_score", "validation_accuracy", "validation_loss"))
+        return {
+            **weighted_scores(confusion),
+            "validation_accuracy": float(np.trace(confusion) / max(1, confusion.sum())),
+            "validation_loss": loss_sum / max(1, rows)
+        }
+
+    def _log_loss_sum(self, model, X: np.ndarray, codes: np.ndarray) -> float:
+        proba = model.predict_proba(X)
+        return float(-np.log(np.clip(proba[np.arange(len(codes)), codes], 1e-15, 1.0)).sum())
+
+    def _checkpoint(self, model, epoch: int, fitted: bool, rng: np.random.Generator,
+                    history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"model": model, "epoch": epoch, "fitted": fitted, "rng": rng.bit_generator.state,
+                "ranges": self.ranges, "columns": self.columns, "pipeline": self.pipeline, "scaler": self.scaler,
+                "classes": self.classes, "stats": self.stats, "history": history}
+
+    def fit(self, on_epoch: Optional[EpochCallback] = None, resume: Optional[Dict[str, Any]] = None,
+            on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None):
+        rng = np.random.default_rng(self.random_state)
+        history: List[Dict[str, Any]] = []
+        if resume is None:
+            self._prepare()
+            model = INCREMENTAL_MODELS[self.model_type](self.hyperparameters)
+            fitted, first_epoch = False, 1
+        else:
+            model, fitted, first_epoch = resume["model"], resume["fitted"], resume["epoch"] + 1
+            rng.bit_generator.state = resume["rng"]
+            self.pipeline, self.scaler, self.classes = resume["pipeline"], resume["scaler"], resume["classes"]
+            self.stats = resume["stats"]
+            self.ranges, self.columns = resume["ranges"], resume["columns"]
+            for metric in resume["history"]:
+                history.append(metric)
+                if on_epoch:
+                    on_epoch(metric)
+        n_classes = len(self.classes)
+
+        for epoch in range(first_epoch, self.epochs + 1):
+            start = time.perf_counter()
+            scored_rows, train_correct, train_loss = 0, 0, 0.0
+            holdout_rows, holdout_loss = 0, 0.0
+            confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+            for X, codes, test in self.shuffled_batches(rng):
+                if fitted:
+                    # Progressive validation: every row is scored by the model
+                    # as it was before that row could influence it.
+                    if test.any():
+                        confusion += confusion_counts(codes[test], model.predict(X[test]), n_classes)
+                        holdout_loss += self._log_loss_sum(model, X[test], codes[test])
+                        holdout_rows += int(test.sum())
+                    train = ~test
+                    if train.any():
+                        train_correct += int((model.predict(X[train]) == codes[train]).sum())
+                        train_loss += self._log_loss_sum(model, X[train], codes[train])
+                        scored_rows += int(train.sum())
+                # Rows of the interleaved ranges are mixed within the batch too.
+                order = rng.permutation(np.flatnonzero(~test))
+                if len(order):
+                    model.partial_fit(X[order], codes[order], classes=np.arange(n_classes))
+                    fitted = True
+
+            elapsed = time.perf_counter() - start
+            self._record_pass(f"epoch_{epoch}", self.stats["rows"], elapsed)
+            metric = {
+                "epoch": epoch,
+                "batch": self.stats["chunks"],
+                "accuracy": train_correct / scored_rows if scored_rows else None,
+                "loss": train_loss / scored_rows if scored_rows else None,
+                **self._holdout_metrics(confusion, holdout_loss, holdout_rows),
+                "rows_per_second": round(self.stats["rows"] / elapsed, 1),
+                "peak_rss_mb": round(peak_rss_mb(), 1)
+            }
+            history.append(metric)
+            if on_epoch:
+                on_epoch(metric)
+            if on_checkpoint and epoch < self.epochs:
+                on_checkpoint(self._checkpoint(model, epoch, fitted, rng, history))
+
+        return self._finish(model)
+
+    def _finish(self, model):
+        start = time.perf_counter()
+        n_classes = len(self.classes)
+        confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        loss, rows = 0.0, 0
+        for offset, chunk in self.chunks():
+            test = holdout_mask(offset, len(chunk), self.train_split, self.random_state)
+            if test.any():
+                X, codes = self._encode(chunk[test])
+                confusion += confusion_counts(codes, model.predict(X), n_classes)
+                loss += self._log_loss_sum(model, X, codes)
+                rows += len(codes)
+        self._record_pass("evaluate", self.stats["rows"], time.perf_counter() - start)
+        self.metrics = {
+            "accuracy": float(np.trace(confusion) / max(1, confusion.sum())),
+            **weighted_scores(confusion),
+            "log_loss": loss / max(1, rows),
+            "holdout_rows": rows
+        }
+        # Predictions come out as class labels again, and the scaler travels
+        # with the estimator, so the bundle works like any other trained model.
+        model.classes_ = self.classes
+        return make_pipeline(self.scaler, model) if self.scaler is not None else model
+
+    def summary(self) -> Dict[str, Any]:
+        seconds = sum(p["seconds"] for p in self.stats["passes"])
+        return {
+            "model_type": self.model_type,
+            "rows": self.stats["rows"],
+            "chunks": self.stats["chunks"],
+            "chunk_rows": self.chunk_rows,
+            "shuffle_chunks": self.shuffle_chunks,
+            "dtype_plan": self.plan,
+            "memory_budget_mb": self.memory_budget_mb,
+            "peak_chunk_mb": round(self.stats["peak_chunk_mb"], 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "passes": self.stats["passes"],
+            "rows_per_second": round(self.stats["rows"] * len(self.stats["passes"]) / seconds, 1) if seconds else None
+        }
@@ -0,0 +1,216 @@
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_CATEGORY = "__unknown__"
+# Part of every feature-cache key: bump it when the encoding changes so
+# matrices encoded by older code are not reused.
+PIPELINE_VERSION = 1
+# Below this many records, per-record dict lookups beat building a DataFrame.
+RECORD_PATH_MAX_ROWS = 512
+
+
+class FeaturePipeline:
+    # Turns raw columns into the float matrix a model was fitted on. It is
+    # fitted once on the training split and pickled next to the model, so
+    # training, batch scoring and single predictions all encode the same way.
+    # Categorical columns become ordinal codes; a value not seen during fit
+    # (or a missing one) goes to an extra code after the known categories
+    # instead of silently colliding with category 0. Numeric columns are
+    # coerced and missing values filled with the training median.
+    def __init__(self, feature_columns: List[str], categorical_columns: Optional[Iterable[str]] = None,
+                 aliases: Optional[Dict[str, str]] = None,
+                 value_aliases: Optional[Dict[str, Dict[str, str]]] = None, lowercase: bool = True):
+        self.feature_columns = list(feature_columns)
+        self.categorical_columns = set(categorical_columns) if categorical_columns is not None else None
+        self.aliases = dict(aliases or {})
+        self.value_aliases = {col: dict(mapping) for col, mapping in (value_aliases or {}).items()}
+        self.lowercase = lowercase
+        self.categories: Dict[str, List[str]] = {}
+        self.fill_values: Dict[str, float] = {}
+        self.target_classes: Optional[List[Any]] = None
+        self._codes: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def fitted(self) -> bool:
+        return len(self.categories) + len(self.fill_values) == len(self.feature_columns)
+
+    def _rename(self, df: pd.DataFrame) -> pd.DataFrame:
+        renames = {source: target for source, target in self.aliases.items()
+                   if source in df.columns and target not in df.columns}
+        return df.rename(columns=renames) if renames else df
+
+    def _normalize(self, column: str, values: pd.Series) -> pd.Series:
+        values = values.astype("string").str.strip()
+        if self.lowercase:
+            values = values.str.lower()
+        if column in self.value_aliases:
+            values = values.replace(self.value_aliases[column])
+        return values
+
+    def _normalize_value(self, column: str, value: Any) -> Optional[str]:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        value = str(value).strip()
+        if self.lowercase:
+            value = value.lower()
+        return self.value_aliases.get(column, {}).get(value, value)
+
+    def _is_categorical(self, column: str, values: pd.Series) -> bool:
+        if self.categorical_columns is not None:
+            return column in self.categorical_columns
+        return not (pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values))
+
+    def fit(self, df: pd.DataFrame) -> "FeaturePipeline":
+        df = self._rename(df)
+        missing = [col for col in self.feature_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Feature columns not found in dataset: {missing}")
+        self.categories, self.fill_values = {}, {}
+        for col in self.feature_columns:
+            if self._is_categorical(col, df[col]):
+                self.categories[col] = sorted(self._distinct(col, df[col]))
+            else:
+                median = pd.to_numeric(df[col], errors="coerce").median()
+                self.fill_values[col] = 0.0 if pd.isna(median) else float(median)
+        self._index()
+        return self
+
+    def fit_stream(self, chunks: Iterable[pd.DataFrame], sample_rows: int = 100000, random_state: int = 0,
+                   on_chunk: Optional[Callable[[pd.DataFrame], None]] = None) -> "FeaturePipeline":
+        # One pass over a dataset too large to load: categories are the union
+        # over every chunk and numeric fills are the median of a uniform
+        # reservoir sample of at most sample_rows rows.
+        rng = np.random.default_rng(random_state)
+        categories: Dict[str, set] = {}
+        numeric: Optional[List[str]] = None
+        reservoir, filled, seen = None, 0, 0
+        for chunk in chunks:
+            chunk = self._rename(chunk)
+            if numeric is None:
+                missing = [col for col in self.feature_columns if col not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Feature columns not found in dataset: {missing}")
+                categories = {col: set() for col in self.feature_columns if self._is_categorical(col, chunk[col])}
+                numeric = [col for col in self.feature_columns if col not in categories]
+                reservoir = np.empty((sample_rows, len(numeric)))
+            for col in categories:
+                categories[col].update(self._distinct(col, chunk[col]))
+            values = np.empty((len(chunk), len(numeric)))
+            for j, col in enumerate(numeric):
+                values[:, j] = pd.to_numeric(chunk[col], errors="coerce")
+            take = min(len(values), sample_rows - filled)
+            reservoir[filled:filled + take] = values[:take]
+            filled += take
+            rest = values[take:]
+            if len(rest):
+                # Algorithm R, vectorized: the k-th row seen replaces a random
+                # slot with probability sample_rows / k.
+                positions = seen + take + np.arange(1, len(rest) + 1)
+                slots = (rng.random(len(rest)) * positions).astype(np.int64)
+                keep = slots < sample_rows
+                reservoir[slots[keep]] = rest[keep]
+            seen += len(values)
+            if on_chunk:
+                on_chunk(chunk)
+        if numeric is None:
+            raise ValueError("Dataset is empty")
+
+        self.categories = {col: sorted(values) for col, values in categories.items()}
+        medians = np.nanmedian(reservoir[:filled], axis=0) if filled and numeric else []
+        self.fill_values = {col: 0.0 if np.isnan(median) else float(median) for col, median in zip(numeric, medians)}
+        self._index()
+        return self
+
+    def _index(self):
+        self._codes = {col: {value: i for i, value in enumerate(cats)} for col, cats in self.categories.items()}
+
+    def _codes_for(self, column: str, values: pd.Series) -> np.ndarray:
+        unknown = self.unknown_code(column)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Normalize each distinct category once instead of every row; the
+            # per-row work is a single take on the integer codes.
+            lookup = np.array([self._codes[column].get(self._normalize_value(column, value), unknown)
+                               for value in values.cat.categories] + [unknown])
+            return lookup[values.cat.codes.to_numpy()]
+        codes = pd.Categorical(self._normalize(column, values), categories=self.categories[column]).codes
+        return np.where(codes < 0, unknown, codes)
+
+    def _distinct(self, column: str, values: pd.Series) -> List[str]:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            present = values.cat.categories[np.unique(values.cat.codes[values.cat.codes >= 0])]
+            return sorted({self._normalize_value(column, value) for value in present})
+        return self._normalize(column, values).dropna().unique().tolist()
+
+    def unknown_code(self, column: str) -> int:
+        return len(self.categories[column])
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        df = self._rename(df)
+        X = np.empty((len(df), len(self.feature_columns)), dtype=np.float64)
+        for j, col in enumerate(self.feature_columns):
+            if col in self.categories:
+                if col not in df.columns:
+                    X[:, j] = self.unknown_code(col)
+                    continue
+                X[:, j] = self._codes_for(col, df[col])
+            elif col in df.columns:
+                X[:, j] = pd.to_numeric(df[col], errors="coerce").fillna(self.fill_values[col]).to_numpy(np.float64)
+            else:
+                X[:, j] = self.fill_values[col]
+        return X
+
+    def fit_transform(self, df: pd.DataFrame) -> np.ndarray:
+        return self.fit(df).transform(df)
+
+    def transform_record(self, record: Dict[str, Any]) -> np.ndarray:
+        # Single-row path for request handlers: dict lookups instead of
+        # building a one-row DataFrame, same encoding as transform().
+        record = {self.aliases.get(key, key): value for key, value in record.items()}
+        X = np.empty((1, len(self.feature_columns)), dtype=np.float64)
+        for j, col in enumerate(self.feature_columns):
+            value = record.get(col)
+            if col in self._codes:
+                X[0, j] = self._codes[col].get(self._normalize_value(col, value), self.unknown_code(col))
+            else:
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    number = math.nan
+                X[0, j] = self.fill_values[col] if math.isnan(number) else number
+        return X
+
+    def transform_records(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        if len(records) == 1:
+            return self.transform_record(records[0])
+        if len(records) <= RECORD_PATH_MAX_ROWS:
+            return np.vstack([self.transform_record(record) for record in records])
+        return self.transform(pd.DataFrame.from_records(records))
+
+    def label(self, prediction: Any) -> Any:
+        return self.target_classes[int(prediction)] if self.target_classes is not None else prediction
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "features": self.feature_columns,
+            "categorical": {col: cats + [UNKNOWN_CATEGORY] for col, cats in self.categories.items()},
+            "numeric": dict(self.fill_values)
+        }
+
+    @classmethod
+    def from_label_encoders(cls, feature_columns: List[str], encoders: Dict[str, Any]) -> "FeaturePipeline":
+        # Older screening pickles stored one LabelEncoder per column; their
+        # classes_ are the sorted categories, so the codes stay identical.
+        pipeline = cls(feature_columns, categorical_columns=[c for c in feature_columns if c in encoders],
+                       lowercase=False)
+        for col in feature_columns:
+            if col in encoders:
+                pipeline.categories[col] = [str(value) for value in encoders[col].classes_]
+            else:
+                pipeline.fill_values[col] = 0.0
+        pipeline._index()
+        if 'target' in encoders:
+            pipeline.target_classes = list(encoders['target'].classes_)
+        return pipeline
@@ -0,0 +1,262 @@
+import os
+import pickle
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.model_selection import train_test_split
+
+from training.boosting import EarlyStoppingBooster
+from training.checkpoints import (
+    TRAINING_CHECKPOINT_ENABLED, TRAINING_CHECKPOINT_STAGES, Checkpointer, fit_in_blocks, grows_in_blocks,
+    training_checkpoints
+)
+from training.costs import compare_backends, measure_costs
+from training.estimators import build_model
+from training.feature_cache import FEATURE_CACHE_ENABLED, feature_cache, file_digest
+from training.jobs import TrainingJobs, training_jobs
+from training.out_of_core import OutOfCoreTrainer
+from training.preprocessing import FeaturePipeline
+from training.search import SuccessiveHalvingSearch, build_candidates
+
+DATA_DIR = os.getenv("TRAINING_DATA_DIR", "./datas")
+MODELS_DIR = os.getenv("MODELS_DIR", "./models")
+
+
+def dataset_path(request) -> str:
+    return os.path.join(DATA_DIR, request.file_path or request.dataset_id)
+
+
+def load_dataset(request) -> pd.DataFrame:
+    file_path = dataset_path(request)
+    if not os.path.exists(file_path):
+        raise LookupError("Dataset not found")
+    df = pd.read_csv(file_path)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def classification_metrics(y_true, y_pred) -> Dict[str, float]:
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred, average='weighted', zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, average='weighted', zero_division=0)),
+        "f1_score": float(f1_score(y_true, y_pred, average='weighted', zero_division=0))
+    }
+
+
+def save_model(model, pipeline: FeaturePipeline, configuration_id: str, target_column: str) -> str:
+    # Same bundle layout the screening engine loads, so a trained model can be
+    # activated through /api/training/models without re-encoding anything.
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    model_path = os.path.join(MODELS_DIR, f"{configuration_id}.pkl")
+    with open(model_path, 'wb') as f:
+        pickle.dump({
+            'model': model,
+            'pipeline': pipeline,
+            'features': pipeline.feature_columns,
+            'target_column': target_column
+        }, f)
+    return model_path
+
+
+def build_pipeline(request) -> FeaturePipeline:
+    options = request.preprocessing_options or {}
+    return FeaturePipeline(request.feature_columns, options.get("categorical_columns"),
+                           options.get("column_aliases"), options.get("value_aliases"))
+
+
+def _encode(request) -> Tuple[Dict[str, np.ndarray], FeaturePipeline]:
+    df = load_dataset(request)
+    if request.target_column not in df.columns:
+        raise ValueError(f"Target column '{request.target_column}' not found in dataset")
+    df = df.dropna(subset=[request.target_column])
+    y = df[request.target_column].to_numpy()
+    # Stored as .npy, so labels need a fixed-width dtype rather than objects.
+    y = y.astype(str) if y.dtype == object else y
+
+    train_df, test_df, y_train, y_test = train_test_split(
+        df, y, test_size=1 - request.train_test_split, random_state=42
+    )
+    pipeline = build_pipeline(request).fit(train_df)
+    arrays = {"X_train": pipeline.transform(train_df), "X_test": pipeline.transform(test_df),
+              "y_train": y_train, "y_test": y_test}
+    return arrays, pipeline
+
+
+def encode_dataset(request) -> Tuple[Dict[str, np.ndarray], FeaturePipeline, Dict[str, Any]]:
+    # Encoded split for a request, from the feature cache when another job
+    # already encoded the same file the same way.
+    if not FEATURE_CACHE_ENABLED:
+        arrays, pipeline = _encode(request)
+        return arrays, pipeline, {"enabled": False}
+    file_path = dataset_path(request)
+    if not os.path.exists(file_path):
+        raise LookupError("Dataset not found")
+    spec = {
+        "feature_columns": request.feature_columns,
+        "target_column": request.target_column,
+        "preprocessing_options": request.preprocessing_options or {},
+        "train_test_split": request.train_test_split
+    }
+    start = time.perf_counter()
+    key = feature_cache.key(file_digest(file_path), spec)
+    arrays, pipeline, hit = feature_cache.get_or_build(key, lambda: _encode(request), spec)
+    return arrays, pipeline, {"enabled": True, "key": key, "hit": hit,
+                              "seconds": round(time.perf_counter() - start, 3)}
+
+
+def open_checkpoint(job_id: str, request, jobs: TrainingJobs) -> Checkpointer:
+    # A checkpoint only resumes the request it was written for, on the same
+    # dataset contents; anything else starts the job over.
+    if not TRAINING_CHECKPOINT_ENABLED:
+        return Checkpointer(None, job_id)
+    file_path = dataset_path(request)
+    return training_checkpoints.open(job_id, {
+        "configuration_id": request.configuration_id,
+        "mode": jobs.get(job_id)["mode"],
+        "dataset_digest": file_digest(file_path) if os.path.exists(file_path) else None,
+        "request": request.model_dump(mode="json")
+    })
+
+
+def _search(job_id: str, request, X_train, y_train, jobs: TrainingJobs, checkpoint: Checkpointer) -> Dict[str, Any]:
+    spec = request.search
+    candidates = [
+        {**request.hyperparameters, **params}
+        for params in build_candidates(spec.strategy, spec.space, spec.n_candidates, spec.random_state)
+    ]
+    search = SuccessiveHalvingSearch(
+        request.model_type, candidates, factor=spec.factor, cv=spec.cv, scoring=spec.scoring,
+        n_jobs=spec.n_jobs, min_resources=spec.min_resources, halving=spec.halving,
+        random_state=spec.random_state
+    )
+    rungs = search.schedule(len(y_train), len(np.unique(y_train)))
+    jobs.update(job_id, total_epochs=sum(rung["candidates"] for rung in rungs), rungs=[])
+
+    def on_rung(summary):
+        jobs.update(job_id, rungs=jobs.get(job_id)["rungs"] + [summary])
+
+    trials = []
+
+    def on_trial(trial):
+        jobs.add_trial(job_id, trial)
+        trials.append(trial)
+        checkpoint.save(trials=trials)
+
+    return search.fit(X_train, y_train, on_trial=on_trial, on_rung=on_rung,
+                      completed=checkpoint.state.get("trials"))
+
+
+def _fit(job_id: str, request, hyperparameters: Dict[str, Any], X_train, y_train, jobs: TrainingJobs,
+         checkpoint: Checkpointer):
+    early_stopping = request.early_stopping
+    booster = None
+    if request.model_type == "gradient_boosting" and early_stopping.enabled:
+        booster = EarlyStoppingBooster(hyperparameters, early_stopping.validation_fraction,
+                                       early_stopping.patience, early_stopping.tol)
+        jobs.update(job_id, total_epochs=hyperparameters.get("n_estimators", 100), current_epoch=0)
+        model = booster.fit(
+            X_train, y_train, on_iteration=lambda metric: jobs.add_metric(job_id, metric),
+            checkpoint_every=TRAINING_CHECKPOINT_STAGES if checkpoint.enabled else None,
+            resume=checkpoint.state.get("booster"), on_checkpoint=lambda state: checkpoint.save(booster=state))
+        return model, booster
+    model = build_model(request.model_type, hyperparameters)
+    if checkpoint.enabled and grows_in_blocks(model):
+        # Forests and boosted ensembles keep their partial set of trees.
+        model = fit_in_blocks(model, X_train, y_train, TRAINING_CHECKPOINT_STAGES,
+                              resume=checkpoint.state.get("ensemble"),
+                              on_block=lambda partial: checkpoint.save(ensemble=partial))
+    else:
+        model.fit(X_train, y_train)
+    return model, booster
+
+
+def _train_out_of_core(job_id: str, request, jobs: TrainingJobs, checkpoint: Checkpointer) -> Dict[str, Any]:
+    file_path = dataset_path(request)
+    if not os.path.exists(file_path):
+        raise LookupError("Dataset not found")
+    options = request.out_of_core
+    trainer = OutOfCoreTrainer(
+        file_path, request.feature_columns, request.target_column, request.model_type,
+        request.hyperparameters, epochs=options.epochs, train_split=request.train_test_split,
+        memory_budget_mb=options.memory_budget_mb, chunk_rows=options.chunk_rows,
+        shuffle_chunks=options.shuffle_chunks,
+        categorical_columns=(request.preprocessing_options or {}).get("categorical_columns")
+    )
+    jobs.update(job_id, total_epochs=options.epochs, current_epoch=0)
+    model = trainer.fit(on_epoch=lambda metric: jobs.add_metric(job_id, metric),
+                        resume=checkpoint.state.get("out_of_core"),
+                        on_checkpoint=lambda state: checkpoint.save(out_of_core=state))
+    return {
+        **{key: trainer.metrics[key] for key in ("accuracy", "precision", "recall", "f1_score")},
+        "model_path": save_model(model, trainer.pipeline, request.configuration_id, request.target_column),
+        "hyperparameters": request.hyperparameters,
+        "preprocessing": trainer.pipeline.describe(),
+        "out_of_core": {**trainer.summary(), "holdout_log_loss": trainer.metrics["log_loss"],
+                        "holdout_rows": trainer.metrics["holdout_rows"]}
+    }
+
+
+def run_training_job(job_id: str, request, jobs: TrainingJobs = training_jobs) -> Dict[str, Any]:
+    jobs.update(job_id, status="running")
+    checkpoint = None
+    try:
+        checkpoint = open_checkpoint(job_id, request, jobs)
+        start = time.perf_counter()
+        if request.out_of_core.enabled:
+            result = _train_out_of_core(job_id, request, jobs, checkpoint)
+            result["checkpoint"] = checkpoint.summary()
+            result["training_time_seconds"] = round(time.perf_counter() - start, 3)
+            jobs.update(job_id, status="completed", result=result)
+            checkpoint.finish()
+            return result
+
+        arrays, pipeline, cache = encode_dataset(request)
+        X_train, X_test, y_train, y_test = (arrays[name] for name in ("X_train", "X_test", "y_train", "y_test"))
+
+        search = checkpoint.state.get("search")
+        hyperparameters = request.hyperparameters
+        if request.search is not None:
+            if search is None:
+                search = _search(job_id, request, X_train, y_train, jobs, checkpoint)
+                # The finished search replaces its trials in the checkpoint.
+                checkpoint.state.pop("trials", None)
+                checkpoint.save(force=True, search=search)
+            hyperparameters = search["best_params"]
+
+        fit_start = time.perf_counter()
+        model, booster = _fit(job_id, request, hyperparameters, X_train, y_train, jobs, checkpoint)
+        fit_seconds = time.perf_counter() - fit_start
+
+        # The trained model first, then the requested alternatives fitted on
+        # the same split with their default settings.
+        cost_report = [measure_costs(request.model_type, model, fit_seconds, X_test, y_test)]
+        cost_report += compare_backends([m for m in request.compare_backends if m != request.model_type],
+                                        X_train, y_train, X_test, y_test)
+
+        result = {
+            **classification_metrics(y_test, model.predict(X_test)),
+            "model_path": save_model(model, pipeline, request.configuration_id, request.target_column),
+            "hyperparameters": hyperparameters,
+            "preprocessing": pipeline.describe(),
+            "cost_report": cost_report,
+            "feature_cache": cache,
+            "checkpoint": checkpoint.summary(),
+            "training_time_seconds": round(time.perf_counter() - start, 3)
+        }
+        if search is not None:
+            result["search"] = search
+        if booster is not None:
+            result["early_stopping"] = booster.summary()
+        jobs.update(job_id, status="completed", result=result)
+        checkpoint.finish()
+        return result
+    except Exception as e:
+        print(f"Training error: {e}")
+        jobs.update(job_id, status="failed", error=str(e))
+        # A job that failed on its own would fail again; only kills resume.
+        if checkpoint is not None:
+            checkpoint.finish()
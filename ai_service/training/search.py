@@ -0,0 +1,223 @@
+import itertools
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold, cross_validate, train_test_split
+
+from training.estimators import build_model
+
+SEARCH_N_JOBS = int(os.getenv("SEARCH_N_JOBS", "-1"))
+MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "500"))
+
+TrialCallback = Callable[[Dict[str, Any]], None]
+
+
+def expand_grid(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    for name, values in space.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Grid search needs a non-empty list of values for '{name}'")
+    names = list(space)
+    return [dict(zip(names, combination)) for combination in itertools.product(*(space[n] for n in names))]
+
+
+def _sample_value(rng: np.random.Generator, name: str, spec: Any):
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError(f"Empty value list for '{name}'")
+        return spec[int(rng.integers(len(spec)))]
+    if isinstance(spec, dict) and "low" in spec and "high" in spec:
+        low, high = spec["low"], spec["high"]
+        if spec.get("log"):
+            value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            value = float(rng.uniform(low, high))
+        if spec.get("type") == "int" or (isinstance(low, int) and isinstance(high, int) and spec.get("type") != "float"):
+            return int(round(value))
+        return value
+    raise ValueError(f"'{name}' must be a list of values or a {{low, high[, log, type]}} range")
+
+
+def sample_space(space: Dict[str, Any], n_candidates: int, random_state: int = 42) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(random_state)
+    candidates, seen = [], set()
+    # Discrete spaces can be smaller than n_candidates; stop once draws keep repeating.
+    for _ in range(n_candidates * 20):
+        params = {name: _sample_value(rng, name, spec) for name, spec in space.items()}
+        key = repr(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+        if len(candidates) == n_candidates:
+            break
+    return candidates
+
+
+def build_candidates(strategy: str, space: Dict[str, Any], n_candidates: Optional[int] = None,
+                     random_state: int = 42) -> List[Dict[str, Any]]:
+    if not space:
+        raise ValueError("Search space is empty")
+    if strategy == "grid":
+        candidates = expand_grid(space)
+    elif strategy == "random":
+        candidates = sample_space(space, n_candidates or 20, random_state)
+    else:
+        raise ValueError(f"Unsupported search strategy '{strategy}'. Use 'grid' or 'random'")
+    if len(candidates) > MAX_CANDIDATES:
+        raise ValueError(f"Search space has {len(candidates)} candidates; the limit is {MAX_CANDIDATES}")
+    return candidates
+
+
+def _evaluate(model_type: str, params: Dict[str, Any], X, y, resources: int, cv: int,
+              scoring: str, random_state: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        if resources < len(y):
+            X, _, y, _ = train_test_split(X, y, train_size=resources, stratify=y, random_state=random_state)
+        scores = cross_validate(
+            build_model(model_type, params), X, y, scoring=scoring, n_jobs=1, error_score="raise",
+            cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+        )
+        test_scores = scores["test_score"]
+        return {
+            "mean_score": float(np.mean(test_scores)),
+            "std_score": float(np.std(test_scores)),
+            "fit_time": float(np.sum(scores["fit_time"])),
+            "elapsed": time.perf_counter() - start,
+            "error": None
+        }
+    except Exception as e:
+        # A bad combination (e.g. an invalid value for the estimator) loses the
+        # rung instead of failing the whole search.
+        return {"mean_score": None, "std_score": None, "fit_time": None,
+                "elapsed": time.perf_counter() - start, "error": str(e)}
+
+
+def _run_trial(index: int, *args):
+    return index, _evaluate(*args)
+
+
+class SuccessiveHalvingSearch:
+    # Every candidate starts on a small stratified subsample of the training
+    # rows; after each rung only the best 1/factor go on to factor times more
+    # rows, and the last rung uses all of them. With halving=False every
+    # candidate is cross-validated on all rows (exhaustive search). Candidates
+    # of a rung run in parallel and each finished trial is reported as it
+    # completes.
+    def __init__(self, model_type: str, candidates: List[Dict[str, Any]], factor: int = 3, cv: int = 3,
+                 scoring: str = "f1_weighted", n_jobs: int = SEARCH_N_JOBS, min_resources: Optional[int] = None,
+                 halving: bool = True, random_state: int = 42):
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        if cv < 2:
+            raise ValueError("cv must be at least 2")
+        if not candidates:
+            raise ValueError("No candidates to search")
+        build_model(model_type, {})
+        self.model_type = model_type
+        self.candidates = candidates
+        self.factor = factor
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.min_resources = min_resources
+        self.halving = halving
+        self.random_state = random_state
+
+    def schedule(self, n_samples: int, n_classes: int) -> List[Dict[str, int]]:
+        n_candidates = len(self.candidates)
+        if not self.halving:
+            return [{"candidates": n_candidates, "resources": n_samples}]
+        min_resources = self.min_resources or self.cv * n_classes * 2
+        if min_resources > n_samples:
+            raise ValueError(f"min_resources {min_resources} exceeds the {n_samples} training rows")
+        wanted = max(1, math.ceil(math.log(n_candidates, self.factor)))
+        possible = int(math.floor(math.log(n_samples / min_resources, self.factor))) + 1
+        n_rungs = max(1, min(wanted, possible))
+        # Start as large as possible so the last rung lands on all rows.
+        base = max(min_resources, n_samples // self.factor ** (n_rungs - 1))
+        rungs = []
+        for i in range(n_rungs):
+            rungs.append({
+                "candidates": max(1, math.ceil(n_candidates / self.factor ** i)),
+                "resources": n_samples if i == n_rungs - 1 else min(n_samples, base * self.factor ** i)
+            })
+        return rungs
+
+    def fit(self, X, y, on_trial: Optional[TrialCallback] = None, on_rung: Optional[TrialCallback] = None,
+            completed: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
+        n_classes = len(np.unique(y))
+        rungs = self.schedule(len(y), n_classes)
+        alive = list(range(len(self.candidates)))
+        trials, summaries = [], []
+        # Trials a resumed job already ran, by (rung, candidate): reported
+        # again through on_trial but not re-evaluated. Every trial is seeded,
+        # so the search picks the same candidates it would have uninterrupted.
+        done = {(trial["rung"], trial["candidate"]): trial for trial in completed or []}
+        parallel = Parallel(n_jobs=self.n_jobs, return_as="generator_unordered")
+
+        for rung, plan in enumerate(rungs):
+            alive = alive[:plan["candidates"]]
+            resources = plan["resources"]
+            rung_start = time.perf_counter()
+            tasks = (
+                delayed(_run_trial)(
+                    index, self.model_type, self.candidates[index], X, y, resources,
+                    self.cv, self.scoring, self.random_state)
+                for index in alive if (rung, index) not in done
+            )
+            results = {}
+            for index in alive:
+                if (rung, index) in done:
+                    trial = done[(rung, index)]
+                    trials.append(trial)
+                    results[index] = trial
+                    if on_trial:
+                        on_trial(trial)
+            for index, outcome in parallel(tasks):
+                trial = {
+                    "trial": len(trials) + 1,
+                    "rung": rung,
+                    "candidate": index,
+                    "params": self.candidates[index],
+                    "resources": resources,
+                    **outcome
+                }
+                trials.append(trial)
+                results[index] = trial
+                if on_trial:
+                    on_trial(trial)
+
+            alive.sort(key=lambda i: -np.inf if results[i]["mean_score"] is None else results[i]["mean_score"],
+                       reverse=True)
+            keep = rungs[rung + 1]["candidates"] if rung + 1 < len(rungs) else 1
+            summary = {
+                "rung": rung,
+                "resources": resources,
+                "evaluated": len(results),
+                "kept": min(keep, len(alive)),
+                "best_score": results[alive[0]]["mean_score"],
+                "elapsed": round(time.perf_counter() - rung_start, 3)
+            }
+            summaries.append(summary)
+            if on_rung:
+                on_rung(summary)
+
+        best = alive[0]
+        best_trial = [t for t in trials if t["candidate"] == best][-1]
+        if best_trial["mean_score"] is None:
+            raise ValueError(f"Every candidate failed; last error: {best_trial['error']}")
+        return {
+            "strategy": "successive_halving" if self.halving else "exhaustive",
+            "best_params": self.candidates[best],
+            "best_score": best_trial["mean_score"],
+            "scoring": self.scoring,
+            "candidates": len(self.candidates),
+            "trials": len(trials),
+            "rungs": summaries,
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
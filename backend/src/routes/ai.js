@@ -10,6 +10,31 @@ router.use(authenticateToken);
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:8000';
 
+// With PERSIST_ANALYSIS_RESULTS on, the AI service writes the
+// ai_analysis_results row itself (with the same input_data) and answers with
+// its id; the row is then returned as it will be stored instead of being
+// inserted a second time.
+async function storeAnalysisResult(analysisType, studentId, sessionId, inputData, data) {
+  if (data.result_id) {
+    return {
+      id: data.result_id,
+      student_id: studentId,
+      session_id: sessionId || null,
+      analysis_type: analysisType,
+      input_data: inputData,
+      results: data,
+      confidence_score: data.confidence,
+      created_at: new Date().toISOString(),
+    };
+  }
+  const result = await query(
+    `INSERT INTO ai_analysis_results (student_id, session_id, analysis_type, input_data, results, confidence_score)
+     VALUES ($1, $2, $3, $4, $5, $6) RETURNING *`,
+    [studentId, sessionId || null, analysisType, inputData, data, data.confidence]
+  );
+  return result.rows[0];
+}
+
 router.post(
   '/analyze-speech',
   authorize('therapist', 'school_admin', 'system_admin'),
@@ -29,22 +54,18 @@ router.post(
       const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/speech/analyze`, {
         audio_data: audioData,
         student_id: studentId,
+        session_id: sessionId || null,
       });
 
-      const result = await query(
-        `INSERT INTO ai_analysis_results (student_id, session_id, analysis_type, input_data, results, confidence_score)
-         VALUES ($1, $2, $3, $4, $5, $6) RETURNING *`,
-        [
-          studentId,
-          sessionId || null,
-          'speech',
-          { audioData: 'reference' },
-          aiResponse.data,
-          aiResponse.data.confidence,
-        ]
+      const row = await storeAnalysisResult(
+        'speech',
+        studentId,
+        sessionId,
+        { audio_data: 'reference' },
+        aiResponse.data
       );
 
-      res.json(result.rows[0]);
+      res.json(row);
     } catch (error) {
       console.error('Error analyzing speech:', error);
       res.status(500).json({ error: 'Failed to analyze speech' });
@@ -71,22 +92,18 @@ router.post(
       const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/behavior/analyze`, {
         video_data: videoData,
         student_id: studentId,
+        session_id: sessionId || null,
       });
 
-      const result = await query(
-        `INSERT INTO ai_analysis_results (student_id, session_id, analysis_type, input_data, results, confidence_score)
-         VALUES ($1, $2, $3, $4, $5, $6) RETURNING *`,
-        [
-          studentId,
-          sessionId || null,
-          'behavior',
-          { videoData: 'reference' },
-          aiResponse.data,
-          aiResponse.data.confidence,
-        ]
+      const row = await storeAnalysisResult(
+        'behavior',
+        studentId,
+        sessionId,
+        { video_data: 'reference' },
+        aiResponse.data
       );
 
-      res.json(result.rows[0]);
+      res.json(row);
     } catch (error) {
       console.error('Error analyzing behavior:', error);
       res.status(500).json({ error: 'Failed to analyze behavior' });
@@ -113,22 +130,18 @@ router.post(
       const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/emotion/detect`, {
         image_data: imageData,
         student_id: studentId,
+        session_id: sessionId || null,
       });
 
-      const result = await query(
-        `INSERT INTO ai_analysis_results (student_id, session_id, analysis_type, input_data, results, confidence_score)
-         VALUES ($1, $2, $3, $4, $5, $6) RETURNING *`,
-        [
-          studentId,
-          sessionId || null,
-          'emotion',
-          { imageData: 'reference' },
-          aiResponse.data,
-          aiResponse.data.confidence,
-        ]
+      const row = await storeAnalysisResult(
+        'emotion',
+        studentId,
+        sessionId,
+        { image_data: 'reference' },
+        aiResponse.data
       );
 
-      res.json(result.rows[0]);
+      res.json(row);
     } catch (error) {
       console.error('Error detecting emotion:', error);
       res.status(500).json({ error: 'Failed to detect emotion' });
@@ -139,33 +152,36 @@ router.post(
 router.post(
   '/predict-progress',
   authorize('therapist', 'school_admin', 'system_admin'),
-  [body('studentId').isUUID()],
+  [
+    body('studentId').isUUID(),
+    body('startDate').optional().isDate({ format: 'YYYY-MM-DD', strictMode: true }),
+    body('endDate').optional().isDate({ format: 'YYYY-MM-DD', strictMode: true }),
+  ],
   async (req, res) => {
     const errors = validationResult(req);
     if (!errors.isEmpty()) {
       return res.status(400).json({ errors: errors.array() });
     }
 
-    const { studentId } = req.body;
+    const { studentId, startDate, endDate } = req.body;
 
     try {
-      const progressData = await query(
-        'SELECT * FROM progress_tracking WHERE student_id = $1 ORDER BY tracking_date DESC LIMIT 100',
-        [studentId]
-      );
-
+      // The AI service reads progress_tracking itself; send only the IDs.
       const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/progress/predict`, {
         student_id: studentId,
-        progress_data: progressData.rows,
+        start_date: startDate || null,
+        end_date: endDate || null,
       });
 
-      const result = await query(
-        `INSERT INTO ai_analysis_results (student_id, analysis_type, results, confidence_score)
-         VALUES ($1, $2, $3, $4) RETURNING *`,
-        [studentId, 'progress_prediction', aiResponse.data, aiResponse.data.confidence]
+      const row = await storeAnalysisResult(
+        'progress_prediction',
+        studentId,
+        null,
+        { start_date: startDate || null, end_date: endDate || null },
+        aiResponse.data
       );
 
-      res.json(result.rows[0]);
+      res.json(row);
     } catch (error) {
       console.error('Error predicting progress:', error);
       res.status(500).json({ error: 'Failed to predict progress' });
@@ -201,6 +201,9 @@ export function TrainingConfiguration({ selectedDataset }: TrainingConfiguration
           >
             <option value="random_forest">Random Forest</option>
             <option value="gradient_boosting">Gradient Boosting</option>
+            <option value="hist_gradient_boosting">Histogram Gradient Boosting</option>
+            <option value="logistic_regression">Logistic Regression</option>
+            <option value="ensemble">Ensemble (soft vote)</option>
             <option value="neural_network">Neural Network</option>
             <option value="svm">Support Vector Machine</option>
             <option value="xgboost">XGBoost</option>
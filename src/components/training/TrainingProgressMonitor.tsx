@@ -5,17 +5,21 @@ interface TrainingProgressMonitorProps {
   onTrainingStateChange: (isActive: boolean) => void;
 }
 
+// Streaming jobs report null for what the first epoch cannot measure yet.
 interface TrainingMetric {
   epoch: number;
-  accuracy: number;
-  loss: number;
-  precision: number;
-  recall: number;
-  f1_score: number;
-  validation_accuracy: number;
-  validation_loss: number;
+  accuracy: number | null;
+  loss: number | null;
+  precision: number | null;
+  recall: number | null;
+  f1_score: number | null;
+  validation_accuracy: number | null;
+  validation_loss: number | null;
 }
 
+const percent = (value: number | null) => (value === null ? '—' : `${(value * 100).toFixed(1)}%`);
+const decimal = (value: number | null) => (value === null ? '—' : value.toFixed(4));
+
 export function TrainingProgressMonitor({ onTrainingStateChange }: TrainingProgressMonitorProps) {
   const [trainingJobs, setTrainingJobs] = useState<any[]>([]);
   const [selectedJob, setSelectedJob] = useState<any>(null);
@@ -243,19 +247,19 @@ export function TrainingProgressMonitor({ onTrainingStateChange }: TrainingProgr
             <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
               <div className="p-4 bg-gray-50 rounded-lg">
                 <p className="text-xs text-gray-600 mb-1">Accuracy</p>
-                <p className="text-2xl font-bold text-gray-900">{(latestMetric.accuracy * 100).toFixed(1)}%</p>
+                <p className="text-2xl font-bold text-gray-900">{percent(latestMetric.accuracy)}</p>
               </div>
               <div className="p-4 bg-gray-50 rounded-lg">
                 <p className="text-xs text-gray-600 mb-1">Loss</p>
-                <p className="text-2xl font-bold text-gray-900">{latestMetric.loss.toFixed(4)}</p>
+                <p className="text-2xl font-bold text-gray-900">{decimal(latestMetric.loss)}</p>
               </div>
               <div className="p-4 bg-gray-50 rounded-lg">
                 <p className="text-xs text-gray-600 mb-1">F1-Score</p>
-                <p className="text-2xl font-bold text-gray-900">{(latestMetric.f1_score * 100).toFixed(1)}%</p>
+                <p className="text-2xl font-bold text-gray-900">{percent(latestMetric.f1_score)}</p>
               </div>
               <div className="p-4 bg-gray-50 rounded-lg">
                 <p className="text-xs text-gray-600 mb-1">Validation Acc</p>
-                <p className="text-2xl font-bold text-gray-900">{(latestMetric.validation_accuracy * 100).toFixed(1)}%</p>
+                <p className="text-2xl font-bold text-gray-900">{percent(latestMetric.validation_accuracy)}</p>
               </div>
             </div>
           )}
@@ -273,7 +277,7 @@ export function TrainingProgressMonitor({ onTrainingStateChange }: TrainingProgr
                 <div className="space-y-2 text-sm font-mono">
                   {metrics.map((metric, idx) => (
                     <div key={idx} className="text-gray-700 border-b border-gray-200 pb-2">
-                      <strong>Epoch {metric.epoch}</strong> | Acc: {(metric.accuracy * 100).toFixed(1)}% | Loss: {metric.loss.toFixed(4)} | Val Acc: {(metric.validation_accuracy * 100).toFixed(1)}%
+                      <strong>Epoch {metric.epoch}</strong> | Acc: {percent(metric.accuracy)} | Loss: {decimal(metric.loss)} | Val Acc: {percent(metric.validation_accuracy)}
                     </div>
                   ))}
                 </div>